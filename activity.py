@@ -0,0 +1,131 @@
+"""
+Activity regions: level objects far from every player sleep
+
+Enemies, coins and power-ups only change by themselves (patrols, bobbing),
+so one whose area is more than the active radius from every player is not
+updated. It remembers the game time it fell asleep at, and when a player
+comes back within the radius it wakes and advance()s over the seconds it
+missed in closed form before updating normally. Update and collision cost then
+grow with the area around the players instead of the whole level.
+
+The default radius covers the view and its cull margin, so a sleeping object
+is never drawn. GAME_ACTIVE_RADIUS sets it in pixels; 0 keeps everything
+awake. Sleeping objects keep the state they fell asleep in; the per-frame
+state hash never looks at them, so it is the same with any radius.
+Snapshots save when each sleeper fell asleep instead of waking it, so
+taking one changes nothing.
+"""
+import os
+
+from camera import CULL_MARGIN
+from constants import SCREEN_WIDTH
+from timestep import STEP
+
+RADIUS_ENV = "GAME_ACTIVE_RADIUS"
+DEFAULT_RADIUS = SCREEN_WIDTH + CULL_MARGIN
+EVERYWHERE = "everywhere"   # ActivityGroup.cells when nothing sleeps
+
+
+def radius_setting(radius=None):
+    """radius, else $GAME_ACTIVE_RADIUS, else the default"""
+    if radius is None:
+        radius = int(os.environ.get(RADIUS_ENV, DEFAULT_RADIUS))
+    if radius < 0:
+        raise ValueError(f"active radius must be 0 or more, got {radius}")
+    return radius
+
+
+class ActivityGroup:
+    """One kind of level object and its SpatialGrid, split into awake and asleep"""
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.objects = grid.objects
+        self.slept_at = [0.0] * len(self.objects)  # game time each fell asleep at, None while awake
+        self.awake = []         # indices, in level order
+        self.active = []        # the awake objects, in level order
+        self.cells = None       # grid cells the regions covered at the last refresh
+
+    def refresh(self, regions, now):
+        """Wake the objects inside regions (None: all of them), put the rest to sleep"""
+        objects = self.objects
+        slept_at = self.slept_at
+        if regions is None:
+            if self.cells == EVERYWHERE:
+                return
+            self.cells = EVERYWHERE
+            awake = range(len(objects))
+        else:
+            # Queries only see whole cells: same cells, same objects awake
+            size = self.grid.cell_size
+            cells = [(r.left // size, (r.right - 1) // size, r.top // size, (r.bottom - 1) // size)
+                     for r in regions]
+            if cells == self.cells:
+                return
+            self.cells = cells
+            found = set()
+            for region in regions:
+                found.update(self.grid.query_indices(region))
+            awake = sorted(found)
+            for i in self.awake:
+                if i not in found:
+                    slept_at[i] = now
+        for i in awake:
+            since = slept_at[i]
+            if since is not None:
+                if now > since:
+                    objects[i].advance(now - since)
+                slept_at[i] = None
+        self.awake = list(awake)
+        self.active = [objects[i] for i in awake]
+
+    def sleep_all(self, now):
+        self.slept_at = [now] * len(self.objects)
+        self.awake = []
+        self.active = []
+        self.cells = None
+
+    @property
+    def sleeping(self):
+        return len(self.objects) - len(self.awake)
+
+
+class Activity:
+    """Which enemies, coins and power-ups of a Level update this frame"""
+
+    def __init__(self, level, radius=None):
+        self.radius = radius_setting(radius)
+        self.time = 0.0         # seconds of updates so far
+        self.enemies = ActivityGroup(level.enemy_grid)
+        self.coins = ActivityGroup(level.coin_grid)
+        self.powerups = ActivityGroup(level.powerup_grid)
+        self.groups = (self.enemies, self.coins, self.powerups)
+
+    def regions(self, players):
+        if not self.radius:
+            return None
+        reach = 2 * self.radius
+        return [player.rect.inflate(reach, reach) for player in players]
+
+    def refresh(self, players):
+        """Wake what is near players and put the rest to sleep, for this frame"""
+        regions = self.regions(players)
+        for group in self.groups:
+            group.refresh(regions, self.time)
+
+    def step(self, dt=STEP):
+        """The update's dt seconds have been simulated"""
+        self.time += dt
+
+    def restore(self, time, slept_at):
+        """Objects were set from a snapshot taken at time, with each group's
+        slept_at (None while awake); sleepers catch up when next woken"""
+        self.time = time
+        for group, since in zip(self.groups, slept_at):
+            group.slept_at = since
+            group.awake = [i for i, at in enumerate(since) if at is None]
+            group.active = [group.objects[i] for i in group.awake]
+            group.cells = None  # the next refresh decides again
+
+    def sleeping(self):
+        return sum(group.sleeping for group in self.groups)
@@ -0,0 +1,126 @@
+"""
+Lazily loaded fonts and an on-disk cache of pre-rendered sprites
+
+Sprites are produced by small "painter" functions that draw onto a
+transparent surface. The first time a sprite is requested its painter runs
+once and the result is saved as a PNG named after a hash of the painter's
+code and arguments, so later runs just load the file. Editing a painter
+changes its hash, which invalidates the stale entry automatically.
+"""
+import hashlib
+import os
+import pygame
+
+CACHE_VERSION = b"1"
+CACHE_DIR = os.environ.get(
+    "GAME_ASSET_CACHE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".asset_cache"),
+)
+
+_fonts = {}
+_sprites = {}
+_converter = None   # e.g. palette.to_indexed; None keeps the display format
+stats = {"hits": 0, "disk_loads": 0, "bakes": 0}
+
+
+def get_font(size, name=None):
+    """Return a shared Font, creating it (and the font module) on first use"""
+    key = (name, size)
+    font = _fonts.get(key)
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = pygame.font.Font(name, size)
+        _fonts[key] = font
+    return font
+
+
+def _hash_code(h, code):
+    """Feed a code object (and any nested ones) into a hash"""
+    h.update(code.co_code)
+    h.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if hasattr(const, "co_code"):
+            _hash_code(h, const)
+        else:
+            h.update(repr(const).encode())
+
+
+def content_hash(name, size, painter, args=()):
+    """Hash everything that decides what a baked sprite looks like"""
+    h = hashlib.sha1(CACHE_VERSION)
+    h.update(pygame.version.ver.encode())
+    h.update(repr((name, tuple(size), args)).encode())
+    _hash_code(h, painter.__code__)
+    # Constants the painter reads (colors, sizes) are part of its content too
+    for global_name in painter.__code__.co_names:
+        value = painter.__globals__.get(global_name)
+        if isinstance(value, (int, float, str, tuple)):
+            h.update(f"{global_name}={value!r}".encode())
+    return h.hexdigest()
+
+
+def set_converter(convert):
+    """Prepare sprites with convert(surface) from now on (None: the display format)"""
+    global _converter
+    if convert is not _converter:
+        _converter = convert
+        _sprites.clear()
+
+
+def _prepare(surface):
+    """Convert to the display format once a display exists"""
+    if _converter is not None:
+        return _converter(surface)
+    if pygame.display.get_init() and pygame.display.get_surface() is not None:
+        return surface.convert_alpha()
+    return surface
+
+
+def get_sprite(name, size, painter, *args):
+    """Return the baked sprite for painter(surface, *args) at the given size"""
+    key = (name, tuple(size), args)
+    sprite = _sprites.get(key)
+    if sprite is not None:
+        stats["hits"] += 1
+        return sprite
+
+    path = os.path.join(CACHE_DIR, f"{name}-{content_hash(name, size, painter, args)}.png")
+    sprite = None
+    if os.path.exists(path):
+        try:
+            sprite = pygame.image.load(path)
+            stats["disk_loads"] += 1
+        except pygame.error:
+            sprite = None
+
+    if sprite is None:
+        sprite = pygame.Surface(size, pygame.SRCALPHA)
+        painter(sprite, *args)
+        stats["bakes"] += 1
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            tmp_path = path[:-len(".png")] + ".tmp.png"
+            pygame.image.save(sprite, tmp_path)
+            os.replace(tmp_path, path)
+        except (OSError, pygame.error):
+            pass  # Read-only installs still work, they just bake every run
+
+    sprite = _prepare(sprite)
+    _sprites[key] = sprite
+    return sprite
+
+
+def sprite_bytes():
+    """Pixel memory of the in-memory sprites"""
+    return sum(sprite.get_pitch() * sprite.get_height() for sprite in _sprites.values())
+
+
+def sprites():
+    """The in-memory sprites"""
+    return list(_sprites.values())
+
+
+def clear_memory_cache():
+    """Forget in-memory sprites (e.g. after the display mode changes)"""
+    _sprites.clear()
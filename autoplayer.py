@@ -0,0 +1,271 @@
+"""
+Automated player for soak runs and level checks
+
+AutoPlayer plans a route over the precomputed ReachabilityGraph to the
+nearest uncollected coin and turns it into per-frame Controls for
+main.Game. Jumps are steered in the air like a human would: take off at
+the edge facing the next platform, double jump near the apex if still too
+low, dash across wide gaps. If the player ends up somewhere unexpected the
+route is simply re-planned; an edge that keeps failing is blocked.
+
+Run: python autoplayer.py [--screens 4] [--frames 100000] [--show]
+"""
+import argparse
+import os
+import time
+
+from constants import *
+from controls import Controls
+from reachability import ReachabilityGraph, WALK_STEP
+
+# Frames without collecting a coin before the current edge counts as failed
+STUCK_FRAMES = 600
+EDGE_FAILURES_BEFORE_BLOCK = 3
+STEER_DEADBAND = 4
+
+
+class AutoPlayer:
+    def __init__(self, game, graph=None):
+        self.game = game
+        self.graph = graph or ReachabilityGraph(game.level)
+        self.coin_platforms = [self.graph.coin_platform(coin) for coin in game.coins]
+        self.path = []
+        self.target_coin = None
+        self.edge = None          # (from, to) currently being attempted
+        self.jump_held = False
+        self.frames_since_progress = 0
+        self.last_collected = game.coins_collected
+        self.edge_failures = {}
+        self.blocked = set()
+        self.replans = 0
+
+    # ------------- Planning -------------
+    def plan(self, start):
+        """Route from platform start to the cheapest uncollected coin"""
+        self.replans += 1
+        dist, prev = self.graph.shortest_paths(start, self.blocked)
+        player_x = self.game.player.rect.centerx
+        best = None
+        for index, coin in enumerate(self.game.coins):
+            platform = self.coin_platforms[index]
+            if coin.collected or platform not in dist:
+                continue
+            cost = dist[platform] * WALK_STEP + abs(coin.rect.centerx - player_x) // 2
+            if best is None or cost < best[0]:
+                best = (cost, index, platform)
+        if best is None:
+            self.path = []
+            self.target_coin = None
+            return
+        _, self.target_coin, platform = best
+        self.path = ReachabilityGraph.path_to(prev, start, platform)
+
+    # ------------- Control -------------
+    def controls(self):
+        """Controls for the next frame"""
+        game = self.game
+        player = game.player
+
+        if game.coins_collected != self.last_collected:
+            self.last_collected = game.coins_collected
+            self.frames_since_progress = 0
+            self.path = []
+        else:
+            self.frames_since_progress += 1
+            if self.frames_since_progress > STUCK_FRAMES:
+                self.give_up_on_edge()
+
+        if player.on_ground:
+            return self.ground_controls(player)
+        return self.air_controls(player)
+
+    def ground_controls(self, player):
+        current = self.graph.platform_under(player.rect)
+        if current is None:
+            return self.release(Controls())
+        if (self.target_coin is None or self.game.coins[self.target_coin].collected
+                or current not in self.path):
+            self.plan(current)
+            if self.target_coin is None:
+                return self.release(Controls())
+
+        step = self.path.index(current)
+        if step == len(self.path) - 1:
+            return self.collect_coin(player)
+
+        target = self.path[step + 1]
+        self.edge = (current, target)
+        here = self.graph.level.platforms[current].rect
+        there = self.graph.level.platforms[target].rect
+        if there.top == here.top and (there.left == here.right or here.left == there.right):
+            # Adjacent tiles at the same height: walk straight across
+            return self.release(self.steer(player, there.centerx))
+
+        landing_x = self.landing_x(player, here, there)
+        if there.top > here.top and self.gap_ahead(here, there) <= PLAYER_WIDTH:
+            # Lower platform next to or below this one: walking off the edge is enough
+            return self.release(self.steer(player, landing_x))
+
+        takeoff_x = self.takeoff_x(player, here, there)
+        if abs(player.rect.centerx - takeoff_x) <= WALK_STEP:
+            return self.press_jump(self.steer(player, landing_x))
+        return self.release(self.steer(player, takeoff_x))
+
+    def air_controls(self, player):
+        if self.edge is None:
+            return self.release(Controls())
+        here = self.graph.level.platforms[self.edge[0]].rect
+        there = self.graph.level.platforms[self.edge[1]].rect
+        if player.rect.bottom > there.top and self.overlaps_x(player.rect, there):
+            # Still below the target top: get out from under it first
+            aim = there.left - PLAYER_WIDTH if player.rect.centerx < there.centerx else there.right + PLAYER_WIDTH
+        else:
+            aim = self.landing_x(player, here, there)
+        controls = self.steer(player, aim)
+
+        # Double jump near the apex if still too low to land on the target
+        if (not player.has_double_jumped and player.vel_y > -120
+                and player.rect.bottom > there.top - 10):
+            return self.press_jump(controls)
+
+        # Dash across gaps that would otherwise be too wide
+        distance = abs(aim - player.rect.centerx)
+        if distance > WALK_STEP * 12 and player.dash_cooldown_timer == 0:
+            controls.dash = True
+        return self.release(controls)
+
+    def collect_coin(self, player):
+        coin = self.game.coins[self.target_coin]
+        controls = self.steer(player, coin.rect.centerx)
+        if abs(player.rect.centerx - coin.rect.centerx) <= WALK_STEP and coin.rect.bottom < player.rect.top:
+            return self.press_jump(controls)
+        return self.release(controls)
+
+    # ------------- Helpers -------------
+    @staticmethod
+    def overlaps_x(a, b):
+        return a.left < b.right and b.left < a.right
+
+    @staticmethod
+    def gap_ahead(here, there):
+        if there.left >= here.right:
+            return there.left - here.right
+        if here.left >= there.right:
+            return here.left - there.right
+        return 0
+
+    @staticmethod
+    def landing_x(player, here, there):
+        """Where to aim the player's center to land on there coming from here"""
+        half = PLAYER_WIDTH // 2
+        lo = there.left + half
+        hi = there.right - half
+        if there.top > here.top and here.left < there.right and there.left < here.right:
+            # Lower platform partly under this one: aim for its uncovered side
+            if there.right - here.right >= here.left - there.left:
+                lo = max(lo, here.right + half + 2)
+            else:
+                hi = min(hi, here.left - half - 2)
+            if lo > hi:
+                return (there.left + there.right) // 2
+        return min(max(player.rect.centerx, lo), hi)
+
+    @staticmethod
+    def takeoff_x(player, here, there):
+        """Where on here to jump from to reach there"""
+        margin = PLAYER_WIDTH // 2
+        if there.left >= here.right - margin:
+            return here.right - margin
+        if there.right <= here.left + margin:
+            return here.left + margin
+        # there overlaps here: jump from just outside one of its edges
+        left_room = there.left - here.left
+        right_room = here.right - there.right
+        if left_room >= right_room:
+            return max(here.left + margin, there.left - PLAYER_WIDTH)
+        return min(here.right - margin, there.right + PLAYER_WIDTH)
+
+    @staticmethod
+    def steer(player, x):
+        controls = Controls()
+        if x < player.rect.centerx - STEER_DEADBAND:
+            controls.left = True
+        elif x > player.rect.centerx + STEER_DEADBAND:
+            controls.right = True
+        return controls
+
+    def press_jump(self, controls):
+        """Jump is level-triggered in Player.update, so it has to be tapped"""
+        if not self.jump_held:
+            controls.jump = True
+        self.jump_held = not self.jump_held
+        return controls
+
+    def release(self, controls):
+        self.jump_held = False
+        return controls
+
+    def give_up_on_edge(self):
+        self.frames_since_progress = 0
+        if self.edge is not None:
+            failures = self.edge_failures.get(self.edge, 0) + 1
+            self.edge_failures[self.edge] = failures
+            if failures >= EDGE_FAILURES_BEFORE_BLOCK:
+                self.blocked.add(self.edge)
+        self.path = []
+
+
+def soak(screens=1, frames=100000, show=False):
+    """Play until every coin is collected (restarting each round) for frames"""
+    if not show:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from main import Game
+
+    game = Game(level_screens=screens, headless=not show)
+    game.reset_game()
+    game.state = PLAYING
+
+    start = time.perf_counter()
+    graph = ReachabilityGraph(game.level)
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"graph: {len(game.platforms)} platforms, {graph.edge_count()} edges, built in {build_ms:.1f} ms")
+    spawn = graph.platform_under(game.player.rect.move(0, 10)) or 0
+    missing = graph.unreachable_coins(spawn)
+    print(f"level check: {len(game.coins) - len(missing)}/{len(game.coins)} coins reachable")
+
+    bot = AutoPlayer(game, graph)
+    rounds = 0
+    round_start = 0
+    for frame in range(frames):
+        if show:
+            pygame.event.pump()
+        game.update([bot.controls()])
+        if show:
+            game.draw()
+            pygame.display.flip()
+            game.clock.tick(FPS)
+        if game.state != PLAYING:
+            rounds += 1
+            print(f"round {rounds}: {game.coins_collected}/{game.total_coins} coins in "
+                  f"{frame - round_start} frames ({bot.replans} replans)")
+            round_start = frame
+            game.reset_game()
+            game.state = PLAYING
+            bot = AutoPlayer(game, ReachabilityGraph(game.level, graph.table))
+    print(f"{frames} frames, {rounds} rounds completed, "
+          f"{game.coins_collected}/{game.total_coins} coins in the current round")
+    return rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Automated platformer player")
+    parser.add_argument("--screens", type=int, default=1)
+    parser.add_argument("--frames", type=int, default=100000)
+    parser.add_argument("--show", action="store_true", help="open a window and play in real time")
+    args = parser.parse_args()
+    soak(args.screens, args.frames, args.show)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+"""
+Render backends: CPU Surfaces or an SDL2 Renderer with Textures
+
+Both games draw through a backend:
+
+  surface   the display Surface, rasterised on the CPU with blit() and
+            pygame.draw, then display.flip(). World render scaling is
+            resolution.WorldSurface.
+  texture   a pygame._sdl2.video Renderer. Sprites, scratch overlays, the
+            sky and text are uploaded to Textures once and drawn by SDL's
+            renderer - on the GPU, or with SDL's software renderer where
+            there is none (GAME_RENDER_DRIVER=software, or a headless CI
+            box). A render scale draws the world into a target Texture.
+
+Pick one with GAME_RENDER_BACKEND (or --backend in main.py).
+
+Game code draws the world with draw_world(), text with text(), filled or
+outlined rectangles with rect(), darkens the frame with dim(), and
+everything else with screen.blit(). Each backend runs the post-processing
+stages of its quality level (postfx.py): on Surfaces with NumPy, on the
+texture backend with blend modes. The surface backend can also draw the
+world in 8-bit palette mode (palette.py, GAME_PALETTE).
+For the texture backend, screen is a TextureScreen that covers the part of
+the Surface API the games use (blit, fill, copy, get_size).
+"""
+import os
+import time
+from collections import OrderedDict
+
+import pygame
+import assets
+import palette
+import scratch
+import startup
+from postfx import PostFX, BLOOM, DIM, SHAKE, glow_sprite, BLOOM_MARGIN
+from resolution import WorldSurface, SMOOTH, settings, scaled_size
+
+BACKEND_ENV = "GAME_RENDER_BACKEND"
+DRIVER_ENV = "GAME_RENDER_DRIVER"
+SURFACE = "surface"
+TEXTURE = "texture"
+BACKENDS = (SURFACE, TEXTURE)
+
+TEXT_CACHE_SIZE = 256   # rendered strings kept as textures (least recently used go first)
+
+
+class SurfaceBackend:
+    name = SURFACE
+
+    def __init__(self, size, caption, render_scale=None, render_filter=None, quality=None, indexed=None):
+        self.screen = startup.init_display(size, caption)
+        self.indexed = palette.enabled(indexed)
+        self.world = WorldSurface(self.screen, render_scale, render_filter, self.indexed)
+        self.postfx = PostFX(quality)
+        # Sprites are baked onto the world's palette too (back to the display format otherwise)
+        assets.set_converter(palette.to_indexed if self.indexed else None)
+
+    def configure(self, renderer):
+        renderer.set_scale(self.world.scale, self.world.filter == SMOOTH)
+        # Adding light to 8-bit pixels maps every sum back onto the palette,
+        # which is slower than the whole frame: palette mode keeps flat glows
+        renderer.set_bloom(self.postfx.enabled(BLOOM) and not self.indexed)
+
+    def draw_world(self, renderer, layers, background, glows=(), shake=None, viewport=None):
+        """Background (a colour, a Gradient or a painter called with the target),
+        the world's layers, then bloom and screen shake; all of the window or
+        just the viewport rect (split screen)"""
+        target = self.world.surface
+        if viewport is not None:
+            target = target.subsurface(self.world.area(viewport))
+        postfx = self.postfx
+        postfx.background(target, background)
+        renderer.submit(layers, target)
+        if glows:
+            postfx.bloom(target, glows, self.world.scale)
+        if shake is not None and postfx.enabled(SHAKE):
+            postfx.shake(target, shake, self.world.scale)
+        self.world.present(viewport)
+
+    def dim(self, alpha):
+        """Darken everything drawn so far, like a black overlay of this alpha"""
+        self.postfx.dim(self.screen, alpha)
+
+    def text(self, font, text, antialias, color, background=None):
+        return font.render(text, antialias, color, background)
+
+    def rect(self, color, rect, width=0):
+        pygame.draw.rect(self.screen, color, rect, width)
+
+    def read_frame(self, into):
+        """Copy the frame drawn so far into a Surface of the window's size"""
+        into.blit(self.screen, (0, 0))
+
+    def present(self):
+        pygame.display.flip()
+
+
+class TextureImage:
+    """A Texture with the Surface methods draw code calls on images"""
+    __slots__ = ("texture", "width", "height")
+
+    def __init__(self, texture):
+        self.texture = texture
+        self.width = texture.width
+        self.height = texture.height
+
+    def get_width(self):
+        return self.width
+
+    def get_height(self):
+        return self.height
+
+    def get_size(self):
+        return (self.width, self.height)
+
+    def get_rect(self, **kwargs):
+        rect = pygame.Rect(0, 0, self.width, self.height)
+        for name, value in kwargs.items():
+            setattr(rect, name, value)
+        return rect
+
+
+class TextureScreen:
+    """Stands in for the display Surface: blits become texture draws"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.size = backend.size
+
+    def blit(self, source, dest, area=None, special_flags=0):
+        image = source if isinstance(source, TextureImage) else self.backend.image(source)
+        image.texture.draw(area, (dest[0], dest[1], image.width, image.height))
+
+    def fill(self, color, rect=None):
+        sdl = self.backend.sdl
+        sdl.draw_color = pygame.Color(color)
+        if rect is None:
+            sdl.clear()
+        else:
+            sdl.fill_rect(rect)
+
+    def copy(self):
+        """The frame drawn so far, as an image (read back from the renderer)"""
+        return self.backend.upload(self.backend.sdl.to_surface())
+
+    def get_size(self):
+        return self.size
+
+    def get_width(self):
+        return self.size[0]
+
+    def get_height(self):
+        return self.size[1]
+
+
+class TextureBackend:
+    name = TEXTURE
+
+    def __init__(self, size, caption, render_scale=None, render_filter=None, driver=None, quality=None):
+        from pygame._sdl2.video import Window, Renderer, Texture
+
+        self.scale, self.filter = settings(render_scale, render_filter)
+        if driver is None:
+            driver = os.environ.get(DRIVER_ENV)
+        # Read by SDL whenever a texture is created
+        os.environ["SDL_RENDER_SCALE_QUALITY"] = "linear" if self.filter == SMOOTH else "nearest"
+        pygame.display.init()
+        self.size = tuple(size)
+        self.window = Window(caption, size=self.size)
+        self.sdl = Renderer(self.window, accelerated=0 if driver == "software" else -1)
+        self.world_size = scaled_size(self.size, self.scale)
+        self.world_target = None
+        if self.world_size != self.size:
+            self.world_target = Texture(self.sdl, self.world_size, target=True)
+        self.Texture = Texture
+        self.textures = {}          # id(surface) -> (surface, image, fill)
+        self.text_cache = OrderedDict()
+        self.backgrounds = {}       # (painter, size) -> image of the sky etc.
+        self.screen = TextureScreen(self)
+        self.stats = {"uploads": 0, "text_uploads": 0}
+        self.postfx = PostFX(quality)
+        self.glow = None
+
+    def configure(self, renderer):
+        # Destinations are scaled here, on the GPU; the Renderer only records
+        renderer.set_scale(1.0)
+        renderer.set_bloom(self.postfx.enabled(BLOOM))
+
+    def upload(self, surface):
+        self.stats["uploads"] += 1
+        return TextureImage(self.Texture.from_surface(self.sdl, surface))
+
+    def image(self, surface):
+        """Texture for a Surface, uploaded once (scratch surfaces again when refilled)"""
+        entry = self.textures.get(id(surface))
+        if scratch.owns(surface):
+            fill = scratch.fill_of(surface)
+            if entry is not None and entry[0] is surface and fill is not None and entry[2] == fill:
+                return entry[1]
+            image = self.upload(surface)
+            self.textures[id(surface)] = (surface, image, fill)
+            return image
+        if entry is not None and entry[0] is surface:
+            return entry[1]
+        image = self.upload(surface)
+        self.textures[id(surface)] = (surface, image, None)
+        return image
+
+    def draw_world(self, renderer, layers, background, glows=(), shake=None, viewport=None):
+        sdl = self.sdl
+        postfx = self.postfx
+        scale = self.scale
+        if self.world_target is not None:
+            sdl.target = self.world_target
+        # Coordinates below are relative to the viewport, which also clips
+        size = self.world_size
+        if viewport is not None:
+            view_area = pygame.Rect(round(viewport[0] * scale), round(viewport[1] * scale),
+                                    round(viewport[2] * scale), round(viewport[3] * scale))
+            sdl.set_viewport(view_area)
+            size = view_area.size
+        if callable(background):
+            key = (background, size)
+            sky = self.backgrounds.get(key)
+            if sky is None:
+                surface = pygame.Surface(size)
+                postfx.background(surface, background)
+                sky = self.backgrounds[key] = self.upload(surface)
+            sky.texture.draw(None, (0, 0) + size)
+        else:
+            sdl.draw_color = pygame.Color(background)
+            sdl.fill_rect((0, 0) + size)
+
+        # Shake moves every sprite rather than the finished frame
+        shake_x = shake_y = 0
+        if shake is not None and postfx.enabled(SHAKE):
+            shake_x, shake_y = shake
+        image = self.image
+        commands = 0
+        for layer_commands in layers:
+            for command in layer_commands:
+                sprite = image(command[0])
+                dest = command[1]
+                area = command[2] if len(command) > 2 else None
+                width, height = (area[2], area[3]) if area is not None else (sprite.width, sprite.height)
+                x = dest[0] + shake_x
+                y = dest[1] + shake_y
+                if scale == 1.0:
+                    sprite.texture.draw(area, (x, y, width, height))
+                else:
+                    sprite.texture.draw(area, (x * scale, y * scale, width * scale, height * scale))
+            commands += len(layer_commands)
+        renderer.draw_calls = commands
+        renderer.commands = commands
+        if glows:
+            self.draw_glows(glows, shake_x, shake_y)
+
+        if viewport is not None:
+            sdl.set_viewport(None)
+        if self.world_target is not None:
+            sdl.target = None
+            if viewport is None:
+                self.world_target.draw(None, (0, 0) + self.size)
+            else:
+                self.world_target.draw(view_area, viewport)
+
+    def draw_glows(self, glows, shake_x=0, shake_y=0):
+        """Bloom: a soft light sprite stretched over each glow, added to the frame"""
+        start = time.perf_counter()
+        if self.glow is None:
+            self.glow = self.Texture.from_surface(self.sdl, glow_sprite())
+            self.glow.blend_mode = 2      # SDL_BLENDMODE_ADD
+        texture = self.glow
+        scale = self.scale
+        margin = BLOOM_MARGIN
+        for x, y, width, height, color, alpha in glows:
+            texture.color = pygame.Color(color)
+            texture.alpha = min(255, alpha * 2)
+            texture.draw(None, ((x + shake_x - margin) * scale, (y + shake_y - margin) * scale,
+                                (width + 2 * margin) * scale, (height + 2 * margin) * scale))
+        self.postfx.times.add(BLOOM, time.perf_counter() - start)
+
+    def dim(self, alpha):
+        start = time.perf_counter()
+        sdl = self.sdl
+        sdl.draw_blend_mode = 1     # SDL_BLENDMODE_BLEND
+        sdl.draw_color = pygame.Color(0, 0, 0, alpha)
+        sdl.fill_rect((0, 0) + self.size)
+        sdl.draw_blend_mode = 0
+        self.postfx.times.add(DIM, time.perf_counter() - start)
+
+    def text(self, font, text, antialias, color, background=None):
+        key = (id(font), text, antialias, tuple(color), background and tuple(background))
+        image = self.text_cache.get(key)
+        if image is not None:
+            self.text_cache.move_to_end(key)
+            return image
+        self.stats["text_uploads"] += 1
+        image = self.upload(font.render(text, antialias, color, background))
+        self.text_cache[key] = image
+        if len(self.text_cache) > TEXT_CACHE_SIZE:
+            self.text_cache.popitem(last=False)
+        return image
+
+    def rect(self, color, rect, width=0):
+        sdl = self.sdl
+        sdl.draw_color = pygame.Color(color)
+        rect = pygame.Rect(rect)
+        if width == 0:
+            sdl.fill_rect(rect)
+            return
+        for _ in range(width):
+            sdl.draw_rect(rect)
+            rect.inflate_ip(-2, -2)
+
+    def read_frame(self, into):
+        """Copy the frame drawn so far into a Surface of the window's size"""
+        self.sdl.to_surface(into)
+
+    def present(self):
+        self.sdl.present()
+
+
+def create(size, caption, backend=None, render_scale=None, render_filter=None, quality=None, indexed=None):
+    """The backend named by backend, else $GAME_RENDER_BACKEND, else surface"""
+    if backend is None:
+        backend = os.environ.get(BACKEND_ENV, SURFACE)
+    if backend == SURFACE:
+        return SurfaceBackend(size, caption, render_scale, render_filter, quality, indexed)
+    if backend == TEXTURE:
+        if palette.enabled(indexed):
+            raise ValueError("palette mode needs the surface backend")
+        return TextureBackend(size, caption, render_scale, render_filter, quality=quality)
+    raise ValueError(f"render backend must be one of {BACKENDS}, got {backend!r}")
@@ -0,0 +1,59 @@
+"""
+Activity region benchmark - update cost versus level size, with sleeping objects
+
+Builds platformer levels of increasing width and times Game.update() with
+the player running right from the middle of the world, first with every
+object awake (active radius 0), then with objects outside the default
+radius asleep (activity.py). Also reports how many objects were updated per
+frame. Without sleeping that count, and the update time, grow with the
+level; with it they stay flat apart from the per-frame state hash, which
+still packs the whole level.
+
+Run: python benchmarks/activity_bench.py [--screens 1 10 100 1000] [--frames 300]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import activity
+from constants import *
+from controls import Controls
+from main import Game
+
+
+def measure(screens, radius, frames):
+    """(ms per update, objects updated per frame, objects in the level)"""
+    game = Game(level_screens=screens, seed=1, headless=True, active_radius=radius)
+    game.reset_game()
+    game.state = PLAYING
+    game.player.rect.x = game.level.width // 2
+    game.player.immortal = True
+    updated = 0
+    start = time.perf_counter()
+    for frame in range(frames):
+        game.update([Controls(right=True, jump=frame % 45 == 0)])
+        updated += sum(len(group.active) for group in game.activity.groups)
+    elapsed = time.perf_counter() - start
+    objects = sum(len(group.objects) for group in game.activity.groups)
+    return elapsed / frames * 1000, updated / frames, objects
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--screens", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args()
+
+    print(f"{'screens':>8} {'objects':>8} {'awake ms':>9} {'updated':>8} {'sleeping ms':>12} {'updated':>8}")
+    for screens in args.screens:
+        all_ms, all_updated, objects = measure(screens, 0, args.frames)
+        sleep_ms, sleep_updated, _ = measure(screens, activity.DEFAULT_RADIUS, args.frames)
+        print(f"{screens:8d} {objects:8d} {all_ms:9.3f} {all_updated:8.0f} {sleep_ms:12.3f} {sleep_updated:8.0f}")
+
+
+if __name__ == "__main__":
+    main()
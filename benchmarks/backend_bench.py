@@ -0,0 +1,78 @@
+"""
+Render backend benchmark - frame time of the Surface and SDL2 Texture backends
+
+Draws the same platformer and runner scenes through each render backend
+(backend.py) and reports the milliseconds per full frame, draw() plus
+present, and how many textures the texture backend had to upload. The
+texture backend runs on SDL's software renderer unless --driver is given,
+so the numbers compare like with like on a box without a GPU.
+
+Run: python benchmarks/backend_bench.py [--frames 200] [--driver software|auto]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import backend
+from constants import *
+from main import Game
+from endless_runner import EndlessRunnerGame
+
+
+def time_frames(game, frames):
+    """ms per frame (draw and present)"""
+    for _ in range(3):  # warm the texture and text caches
+        game.draw()
+        game.backend.present()
+    start = time.perf_counter()
+    for _ in range(frames):
+        game.draw()
+        game.backend.present()
+    return (time.perf_counter() - start) / frames * 1000
+
+
+def platformer(name):
+    game = Game(seed=1, render_backend=name)
+    game.reset_game()
+    game.player.immortal = True
+    game.state = PLAYING
+    for _ in range(60):
+        game.update()
+    return game
+
+
+def runner(name):
+    game = EndlessRunnerGame(seed=1, render_backend=name)
+    game.reset()
+    for _ in range(600):
+        game.update(1.0 / 60)
+    game.state = 'playing'  # a crash would leave a cached game-over frame
+    return game
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--driver", default="software", help="texture renderer: software or auto")
+    args = parser.parse_args()
+    os.environ[backend.DRIVER_ENV] = args.driver
+
+    print(f"{'game':>10} {'backend':>8} {'frame ms':>9} {'uploads':>8}")
+    for game_name, make in (("platformer", platformer), ("runner", runner)):
+        for name in backend.BACKENDS:
+            game = make(name)
+            frame_ms = time_frames(game, args.frames)
+            stats = getattr(game.backend, "stats", None)
+            uploads = str(stats["uploads"]) if stats else "-"
+            print(f"{game_name:>10} {name:>8} {frame_ms:9.2f} {uploads:>8}")
+            del game
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
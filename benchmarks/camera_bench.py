@@ -0,0 +1,47 @@
+"""
+Camera culling benchmark - draw cost versus level size
+
+Builds platformer levels of increasing width and times draw_game() with
+the camera in the middle of the world. With culling, frame time should
+stay flat as the level grows.
+
+Run: python benchmarks/camera_bench.py [--screens 1 10 100 1000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import main
+from constants import *
+
+FRAMES = 120
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--screens", type=int, nargs="+", default=[1, 10, 100, 1000])
+    args = parser.parse_args()
+
+    for screens in args.screens:
+        game = main.Game(level_screens=screens)
+        game.reset_game()
+        game.state = PLAYING
+        game.player.rect.x = game.level.width // 2
+        game.camera.follow(game.player.rect)
+        game.draw_game()  # warm sprite caches
+
+        start = time.perf_counter()
+        for _ in range(FRAMES):
+            game.draw_game()
+        frame_ms = (time.perf_counter() - start) / FRAMES * 1000
+        objects = len(game.platforms) + len(game.coins) + len(game.enemies) + len(game.powerups)
+        print(f"{screens:>5} screens ({objects:>6} objects): draw_game {frame_ms:6.2f} ms, "
+              f"{game.renderer.commands} blits submitted")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,106 @@
+"""
+Course benchmark - opening and spawning from a memory-mapped course file
+
+Writes a synthetic course of a few million entries, then compares opening
+it through course.py (a memory map) against reading every entry into a
+list: time and Python heap for each. Then times a binary-search seek (what
+a restore does) and plays the runner on the course for a number of frames
+to show what the spawn cursor costs per frame.
+
+Run: python benchmarks/course_bench.py [--entries 2000000] [--frames 3000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import course
+from endless_runner import EndlessRunnerGame
+
+SPACING = 90.0      # average pixels between entries
+SEEKS = 10000
+
+
+def synthetic(count, seed=1):
+    rng = random.Random(seed)
+    distance = 1000.0
+    for _ in range(count):
+        distance += rng.uniform(0.2, 1.8) * SPACING
+        kind = rng.randrange(len(course.KINDS))
+        yield distance, rng.randrange(3), kind, -40 if kind == course.COIN else 0
+
+
+def measured(fn):
+    """(result, seconds, peak Python heap bytes) of fn()"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def read_all(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    count = course.COURSE_HEADER.unpack_from(data)[3]
+    return list(course.ENTRY.iter_unpack(data[course.COURSE_HEADER.size:
+                                              course.COURSE_HEADER.size + count * course.ENTRY.size]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=2000000)
+    parser.add_argument("--frames", type=int, default=3000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.course")
+    course.write_course(path, list(synthetic(args.entries)))
+    print(f"{args.entries} entries, {os.path.getsize(path) / 2 ** 20:.1f} MiB on disk")
+
+    mapped, seconds, peak = measured(lambda: course.Course(path))
+    print(f"memory map : open {seconds * 1000:8.2f} ms, heap {peak / 1024:10.1f} KiB")
+    loaded, seconds, peak = measured(lambda: read_all(path))
+    print(f"read all   : load {seconds * 1000:8.2f} ms, heap {peak / 1024:10.1f} KiB")
+    del loaded
+
+    rng = random.Random(2)
+    targets = [rng.uniform(0, mapped.length) for _ in range(SEEKS)]
+    cursor = course.CourseCursor(mapped)
+    start = time.perf_counter()
+    for distance in targets:
+        cursor.seek(distance)
+    print(f"seek       : {(time.perf_counter() - start) / SEEKS * 1e6:.1f} us (binary search)")
+
+    game = EndlessRunnerGame(seed=1, course_path=path)
+    game.reset()
+    spawned = 0
+    start = time.perf_counter()
+    for _ in range(args.frames):
+        before = game.course_cursor.index
+        game.update(1 / 60)
+        spawned += game.course_cursor.index - before
+        if game.state != 'playing':
+            game.state = 'playing'
+    total = time.perf_counter() - start
+    cursor = course.CourseCursor(mapped)
+    start = time.perf_counter()
+    for frame in range(args.frames):
+        cursor.take(frame * 60.0)
+    spawn_time = time.perf_counter() - start
+    print(f"play       : {args.frames} frames, {spawned} spawned, update {total / args.frames * 1000:.3f} ms/frame, "
+          f"cursor {spawn_time / args.frames * 1e6:.1f} us/frame")
+    game.course.close()
+    mapped.close()
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Idle benchmark - CPU used by each game while it sits on its menu screen
+
+Launches each game in a fresh process (dummy video driver), leaves it on
+the menu for a few seconds without input, then stops it and reports the CPU
+share it used after startup (read from /proc, so Linux only). Idle screens
+are drawn once and the loop blocks in pygame.event.wait, so this should be
+close to zero.
+
+Run: python benchmarks/idle_bench.py [--seconds 5]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GAMES = {"platformer": "main.py", "endless": "endless_runner.py"}
+STARTUP_SECONDS = 2.0
+
+
+def process_cpu(pid):
+    """User + system CPU seconds of a running process"""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def idle_cpu(script, seconds):
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy")
+    proc = subprocess.Popen([sys.executable, script], cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        time.sleep(STARTUP_SECONDS)
+        before = process_cpu(proc.pid)
+        time.sleep(seconds)
+        return process_cpu(proc.pid) - before
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+    for name, script in GAMES.items():
+        cpu = idle_cpu(script, args.seconds)
+        print(f"{name:>10}: {cpu * 1000:.0f} ms CPU in {args.seconds:.0f} s on the menu "
+              f"({cpu / args.seconds * 100:.1f}% of a core)")
+
+
+if __name__ == "__main__":
+    main()
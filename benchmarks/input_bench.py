@@ -0,0 +1,75 @@
+"""
+Input benchmark - lost taps and input latency through inputbuffer.InputBuffer
+
+Runs the platformer loop headless while a second thread posts jump taps
+(KEYDOWN immediately followed by KEYUP, far shorter than a frame) at random
+times. Reports how many taps reached the game as a pressed() edge and the
+apply/present latency percentiles the buffer measured.
+
+Run: python benchmarks/input_bench.py [--frames 600] [--taps-per-second 8]
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+from constants import *
+from controls import JUMP
+from main import Game
+
+
+def post_taps(stop, rate, counter, rng):
+    while not stop.is_set():
+        time.sleep(rng.expovariate(rate))
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE, mod=0))
+        pygame.event.post(pygame.event.Event(pygame.KEYUP, key=pygame.K_SPACE, mod=0))
+        counter[0] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--taps-per-second", type=float, default=8.0)
+    args = parser.parse_args()
+
+    game = Game()
+    game.reset_game()
+    game.state = PLAYING
+    # Each tap is a press event; every frame with at least one press consumes them all
+    posted = [0]
+    frames_with_press = 0
+    stop = threading.Event()
+    injector = threading.Thread(target=post_taps, args=(stop, args.taps_per_second, posted, random.Random(1)))
+    injector.start()
+    try:
+        for _ in range(args.frames):
+            game.pacer.wait()
+            game.input.poll()
+            game.input.begin_frame()
+            if game.input.pressed(JUMP):
+                frames_with_press += 1
+            game.update([game.input.controls()])
+            game.draw()
+            pygame.display.flip()
+            game.input.presented()
+    finally:
+        stop.set()
+        injector.join()
+
+    game.input.poll()
+    game.input.begin_frame()
+    summary = game.input.latency.summary()
+    seen = summary["samples"] + len(game.input.unpresented)
+    print(f"{posted[0]} taps posted, {seen} seen by the game ({posted[0] - seen} lost), "
+          f"{frames_with_press} frames with a jump edge, {game.input.overflows} ring overflows")
+    print(game.input.latency.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Leaderboard benchmark - cost of submit() on the game thread and delivery under failures
+
+Simulates a 60 FPS loop that submits a score every few frames against the
+stand-in server in three conditions: healthy, flaky (a share of POSTs
+answered 503 after a delay) and down (nothing listening, so everything is
+spooled). After the down run a server is started and a fresh client sends
+the spool. Reports the slowest submit() call and the client's delivery
+statistics for each.
+
+Run: python benchmarks/leaderboard_bench.py [--frames 600] [--every 5] [--fail-rate 0.3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import leaderboard
+import leaderboard_server
+
+FRAME = 1.0 / 60
+
+
+def free_port():
+    server = leaderboard_server.make_server(0)
+    port = server.server_address[1]
+    server.server_close()
+    return port
+
+
+def start_server(port, fail_rate=0.0, delay=0.0):
+    server = leaderboard_server.make_server(port, fail_rate, delay)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def play(client, frames, every):
+    """Fake game loop; returns the slowest submit() in microseconds"""
+    worst = 0.0
+    for frame in range(frames):
+        if frame % every == 0:
+            start = time.perf_counter()
+            client.submit("runner", frame, name="bench")
+            worst = max(worst, time.perf_counter() - start)
+        time.sleep(FRAME)
+    return worst * 1e6
+
+
+def run(label, port, spool, args, server=None):
+    client = leaderboard.LeaderboardClient(f"http://127.0.0.1:{port}", spool)
+    worst = play(client, args.frames, args.every)
+    start = time.perf_counter()
+    client.close(timeout=args.close_timeout)
+    closing = time.perf_counter() - start
+    stored = len(server.board.entries) if server else 0
+    print(f"{label:>8}: slowest submit {worst:.0f} us, close {closing * 1000:.0f} ms, "
+          f"server holds {stored}" + (f" ({server.board.duplicates} duplicates ignored)" if server else ""))
+    print(f"          {client.report()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--every", type=int, default=5, help="frames between submissions")
+    parser.add_argument("--fail-rate", type=float, default=0.3)
+    parser.add_argument("--delay", type=float, default=0.05, help="server delay in the flaky run")
+    parser.add_argument("--close-timeout", type=float, default=2.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        spool = os.path.join(tmp, "spool.jsonl")
+        port = free_port()
+        server = start_server(port)
+        run("healthy", port, spool, args, server)
+        server.shutdown()
+        server.server_close()
+
+        port = free_port()
+        server = start_server(port, args.fail_rate, args.delay)
+        run("flaky", port, spool, args, server)
+        server.shutdown()
+        server.server_close()
+
+        port = free_port()
+        run("down", port, spool, args)
+        with open(spool) as f:
+            spooled = sum(1 for _ in f)
+        server = start_server(port)
+        client = leaderboard.LeaderboardClient(f"http://127.0.0.1:{port}", spool)
+        client.close(timeout=args.close_timeout)
+        print(f"restart: {spooled} spooled entries, {len(server.board.entries)} delivered, "
+              f"spool {'left behind' if os.path.exists(spool) else 'removed'}")
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Lockstep benchmark - headless peers racing on localhost
+
+Starts several lockstep.py peers as separate processes on local UDP ports
+and checks that every one of them ends the race on the same tick with the
+same race hash. Runs the race three ways: clean, with a share of every
+peer's outgoing packets dropped (redundant inputs should hide it, at the
+cost of some stalls), and with one peer's world changed mid-race, which
+every peer should report as a desync within one hash interval.
+
+Per peer it reports stalls, bytes and packets sent per tick and how many
+times each input went out.
+
+Run: python benchmarks/lockstep_bench.py [--peers 3] [--ticks 1800] [--loss 0.2] [--tick-rate 0]
+"""
+import argparse
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from pacing import STATS_ENV
+
+RESULT = re.compile(r"race over at tick (\d+), race hash ([0-9a-f]{8})")
+DESYNC = re.compile(r"desync at tick (\d+)")
+STATS = re.compile(r"(\d+) stalled \((\d+) ms\), ([\d.]+) packets and ([\d.]+) bytes out per tick, "
+                   r"each input sent ([\d.]+) times")
+
+
+def free_ports(count):
+    sockets = [socket.socket(socket.AF_INET, socket.SOCK_DGRAM) for _ in range(count)]
+    for sock in sockets:
+        sock.bind(("127.0.0.1", 0))
+    ports = [sock.getsockname()[1] for sock in sockets]
+    for sock in sockets:
+        sock.close()
+    return ports
+
+
+def race(peers, args, loss=0.0, corrupt_at=None):
+    """Run one race; returns ([(peer output line, result match, desync match, stats match)], seconds)"""
+    peer_list = ",".join(f"127.0.0.1:{port}" for port in free_ports(peers))
+    env = dict(os.environ, **{STATS_ENV: "1"})
+    processes = []
+    start = time.perf_counter()
+    for index in range(peers):
+        command = [sys.executable, os.path.join(ROOT, "lockstep.py"), "--peers", peer_list, "--index", str(index),
+                   "--headless", "--seed", str(args.seed), "--ticks", str(args.ticks),
+                   "--tick-rate", str(args.tick_rate), "--loss", str(loss)]
+        if args.delay is not None:
+            command += ["--delay", str(args.delay)]
+        if args.redundancy is not None:
+            command += ["--redundancy", str(args.redundancy)]
+        if corrupt_at is not None and index == peers - 1:
+            command += ["--corrupt-at", str(corrupt_at)]
+        processes.append(subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                          text=True, env=env))
+    outcomes = []
+    for process in processes:
+        output = process.communicate(timeout=300)[0]
+        lines = [line for line in output.splitlines() if line.startswith("P")]
+        outcomes.append((lines[0] if lines else output.strip().splitlines()[-1],
+                         RESULT.search(output), DESYNC.search(output), STATS.search(output)))
+    return outcomes, time.perf_counter() - start
+
+
+def report(name, outcomes, seconds):
+    results = {(m.group(1), m.group(2)) for _, m, _, _ in outcomes if m}
+    desyncs = [int(d.group(1)) for _, _, d, _ in outcomes if d]
+    if len(results) == 1 and all(m for _, m, _, _ in outcomes):
+        tick, race_hash = results.pop()
+        verdict = f"all {len(outcomes)} peers agree: tick {tick}, race hash {race_hash}"
+    elif desyncs:
+        verdict = f"{len(desyncs)} of {len(outcomes)} peers report a desync (ticks {sorted(set(desyncs))})"
+    else:
+        verdict = "peers disagree"
+    print(f"{name:<8}: {verdict} in {seconds:.1f} s")
+    for index, (line, _, _, stats) in enumerate(outcomes):
+        if stats:
+            stalls, stall_ms, packets, bytes_out, sends = stats.groups()
+            print(f"  P{index + 1}: {stalls:>4} stalls ({stall_ms:>5} ms), {float(packets):.1f} packets, "
+                  f"{float(bytes_out):5.1f} bytes out per tick, each input sent {float(sends):.1f} times")
+        else:
+            print(f"  P{index + 1}: {line}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--peers", type=int, default=3)
+    parser.add_argument("--ticks", type=int, default=1800, help="race length, if nobody is out before")
+    parser.add_argument("--seed", type=int, default=2)
+    parser.add_argument("--loss", type=float, default=0.2)
+    parser.add_argument("--delay", type=int, default=None)
+    parser.add_argument("--redundancy", type=int, default=None)
+    parser.add_argument("--tick-rate", type=int, default=0, help="0: as fast as inputs arrive")
+    args = parser.parse_args()
+
+    report("clean", *race(args.peers, args))
+    report(f"loss {args.loss:.0%}", *race(args.peers, args, loss=args.loss))
+    report("desync", *race(args.peers, args, corrupt_at=args.ticks // 3))
+
+
+if __name__ == "__main__":
+    main()
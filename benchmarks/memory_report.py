@@ -0,0 +1,103 @@
+"""
+Memory report - bytes per entity type and resident bytes for a whole scene
+
+Each entity type is measured by creating N instances under tracemalloc and
+dividing the growth by N. tracemalloc only sees Python allocations; pixel
+buffers of pygame Surfaces come from SDL, so the report also shows how much
+the process's resident set grew, which is what big levels actually cost.
+
+Run: python benchmarks/memory_report.py [--count 10000] [--screens 500] [--particles 20000]
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import endless_runner
+from constants import *
+from coin import Coin
+from enemy import Enemy
+from level import create_level
+from particle import Particle, ParticleSystem
+from platforms import Platform
+from player import Player
+from powerup import PowerUp, PowerUpEffect
+
+ENTITY_TYPES = (
+    ("Particle", lambda i: Particle(i, i, WHITE, 1.0, -2.0, 30, 4)),
+    ("Coin", lambda i: Coin(i, 100)),
+    ("Enemy", lambda i: Enemy(i, 100, i, i + 150)),
+    ("Platform", lambda i: Platform(i, 100, 150, PLATFORM_HEIGHT)),
+    ("PowerUp", lambda i: PowerUp(i, 100, i % 3)),
+    ("PowerUpEffect", lambda i: PowerUpEffect(i % 3)),
+    ("Player", lambda i: Player(i, 100)),
+    ("runner Obstacle", lambda i: endless_runner.Obstacle(i % 3, i, ('low', 'high')[i % 2])),
+    ("runner Coin", lambda i: endless_runner.Coin(i % 3, i)),
+)
+
+
+def resident_bytes():
+    """Current resident set size (Linux), or 0 where /proc is not available"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def measure(factory, count):
+    """(traced bytes per instance, resident bytes per instance)"""
+    gc.collect()
+    rss_before = resident_bytes()
+    before = tracemalloc.take_snapshot()
+    keep = [factory(i) for i in range(count)]
+    after = tracemalloc.take_snapshot()
+    rss_after = resident_bytes()
+    traced = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    # The list holding the instances is not part of the entities
+    traced -= sys.getsizeof(keep)
+    del keep
+    return traced / count, (rss_after - rss_before) / count
+
+
+def measure_scene(screens, particles):
+    gc.collect()
+    rss_before = resident_bytes()
+    traced_before = tracemalloc.get_traced_memory()[0]
+    level = create_level(screens)
+    system = ParticleSystem()
+    system.particles = [Particle(i % SCREEN_WIDTH, i % SCREEN_HEIGHT, WHITE, 1.0, -2.0, 30, 4)
+                        for i in range(particles)]
+    traced = tracemalloc.get_traced_memory()[0] - traced_before
+    rss = resident_bytes() - rss_before
+    entities = (len(level.platforms) + len(level.enemies) + len(level.coins) +
+                len(level.powerups) + len(system.particles))
+    return entities, traced, rss, (level, system)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=10000, help="instances per entity type")
+    parser.add_argument("--screens", type=int, default=500, help="level width for the scene")
+    parser.add_argument("--particles", type=int, default=20000, help="particles in the scene")
+    args = parser.parse_args()
+
+    pygame.display.init()
+    tracemalloc.start()
+    print(f"{'entity':>16} {'traced B':>10} {'resident B':>11}   ({args.count} instances each)")
+    for name, factory in ENTITY_TYPES:
+        traced, resident = measure(factory, args.count)
+        print(f"{name:>16} {traced:10.0f} {resident:11.0f}")
+
+    entities, traced, rss, scene = measure_scene(args.screens, args.particles)
+    print(f"scene: {args.screens} screens + {args.particles} particles = {entities} entities, "
+          f"{traced / 1024 / 1024:.1f} MiB traced, {rss / 1024 / 1024:.1f} MiB resident")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Network benchmark - server tick time and snapshot bandwidth with N clients
+
+Starts a GameServer on localhost in a background thread and connects N
+headless NetClients from a separate process, so client work does not
+compete with the server for the GIL. Every client sends random controls
+each tick and decodes every snapshot, which also checks that the delta
+chain stays decodable end to end.
+
+Run: python benchmarks/net_bench.py [--clients 32] [--seconds 5]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import netcode
+from client import NetClient
+from controls import Controls
+from server import GameServer
+
+
+def run_clients(address, count, seconds, tick_rate, joined, results):
+    """Client process: join, play random inputs, report decode counts"""
+    rng = random.Random(1)
+    clients = [NetClient(*address) for _ in range(count)]
+    for client in clients:
+        client.join()
+    joined.set()
+
+    end = time.perf_counter() + seconds
+    interval = 1.0 / tick_rate
+    while time.perf_counter() < end:
+        for client in clients:
+            client.send_controls(Controls.from_bits(rng.randrange(16)))
+            client.poll()
+        time.sleep(interval)
+    time.sleep(0.1)
+    for client in clients:
+        client.poll()
+    results.put((sum(c.snapshots_received for c in clients),
+                 sum(c.snapshots_undecodable for c in clients)))
+    for client in clients:
+        client.leave()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--tick-rate", type=int, default=60)
+    parser.add_argument("--screens", type=int, default=4)
+    args = parser.parse_args()
+
+    server = GameServer("127.0.0.1", 0, args.tick_rate, args.screens)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    joined = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=run_clients, args=(
+        server.address, args.clients, args.seconds, args.tick_rate, joined, results))
+    process.start()
+    joined.wait()
+    # Measure the steady state, not the join phase
+    time.sleep(0.5)
+    server.stats.reset()
+    received, undecodable = results.get()
+    process.join()
+
+    server.stop()
+    thread.join()
+
+    summary = server.stats.summary(len(server.clients) or args.clients, server.tick_rate)
+    slot = next(iter(server.clients.values()), None)
+    print(f"clients:            {args.clients}")
+    print(f"ticks:              {summary['ticks']}")
+    print(f"tick time:          mean {summary['tick_ms_mean']:.3f} ms, p99 {summary['tick_ms_p99']:.3f} ms "
+          f"(budget {1000 / args.tick_rate:.1f} ms)")
+    print(f"bandwidth/client:   {summary['bytes_per_client_per_tick']:.0f} B/tick, "
+          f"{summary['kbit_per_client']:.1f} kbit/s")
+    if slot is not None:
+        records = {**server.shared_records(), **server.enemy_records(slot)}
+        full_size = len(netcode.encode_snapshot(server.tick, 0, slot.client_id, records))
+        print(f"full snapshot size: {full_size} B")
+    print(f"full snapshots:     {summary['full_snapshots']}")
+    print(f"undecodable:        {undecodable} of {received} received")
+    server.close()
+
+
+if __name__ == "__main__":
+    main()
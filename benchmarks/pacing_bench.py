@@ -0,0 +1,64 @@
+"""
+Frame pacing benchmark - frame-time distribution and CPU cost per pacing mode
+
+Runs the platformer headless for a number of frames in each pacing.FramePacer
+mode and prints the frame-time percentiles, jitter, missed deadlines and how
+much CPU the process burned per wall-clock second. The uncapped run shows
+the headroom left in the frame budget.
+
+Run: python benchmarks/pacing_bench.py [--frames 600] [--modes sleep hybrid uncapped]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+from constants import *
+from controls import NO_CONTROLS
+from main import Game
+from pacing import MODES
+
+
+def run_mode(mode, frames, screens):
+    game = Game(level_screens=screens, pacing=mode)
+    game.reset_game()
+    game.state = PLAYING
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    for _ in range(frames + 1):
+        game.pacer.wait()
+        game.input.poll()
+        game.input.begin_frame()
+        game.update([NO_CONTROLS])
+        game.draw()
+        pygame.display.flip()
+    wall = time.perf_counter() - wall
+    cpu = time.process_time() - cpu
+    return game.pacer.stats, cpu / wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--screens", type=int, default=4)
+    parser.add_argument("--histogram", action="store_true", help="print each mode's histogram")
+    args = parser.parse_args()
+
+    print(f"target {1000 / FPS:.2f} ms per frame")
+    for mode in args.modes:
+        stats, cpu_share = run_mode(mode, args.frames, args.screens)
+        print(f"{mode:>8}: {stats.report()}, cpu {cpu_share * 100:.0f}%")
+        if mode == "uncapped":
+            headroom = 1 - stats.summary()["mean_ms"] * FPS / 1000
+            print(f"{'':>8}  headroom {headroom * 100:.0f}% of the {1000 / FPS:.2f} ms budget")
+        if args.histogram:
+            print(stats.histogram())
+
+
+if __name__ == "__main__":
+    main()
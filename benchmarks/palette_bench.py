@@ -0,0 +1,96 @@
+"""
+Palette benchmark - memory and fill rate of 32-bit against 8-bit palette mode
+
+Draws the platformer and runner scenes with the surface backend in its
+default 32-bit mode and in palette mode (palette.py) and reports the pixel
+memory of the baked sprites and of the world surface, the milliseconds per
+frame (draw and present, which in palette mode includes converting the world
+to the window's format), and the fill rate of plain sprite blits onto the
+world surface in megapixels per second.
+
+Run: python benchmarks/palette_bench.py [--frames 200] [--blits 2000] [--render-scale 1]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import assets
+import palette
+from constants import *
+from main import Game
+from endless_runner import EndlessRunnerGame
+
+
+def platformer(args, indexed):
+    game = Game(seed=1, render_backend="surface", render_scale=args.render_scale, indexed=indexed)
+    game.reset_game()
+    game.player.immortal = True
+    game.state = PLAYING
+    for _ in range(60):
+        game.update()
+    return game
+
+
+def runner(args, indexed):
+    game = EndlessRunnerGame(seed=1, render_backend="surface", render_scale=args.render_scale,
+                             indexed=indexed)
+    game.reset()
+    for _ in range(600):
+        game.update(1.0 / 60)
+    game.state = 'playing'  # a crash would leave a cached game-over frame
+    return game
+
+
+def time_frames(game, frames):
+    """ms per frame (draw and present)"""
+    for _ in range(3):  # bake sprites, fill caches
+        game.draw()
+        game.backend.present()
+    start = time.perf_counter()
+    for _ in range(frames):
+        game.draw()
+        game.backend.present()
+    return (time.perf_counter() - start) / frames * 1000
+
+
+def fill_rate(target, sprites, blits):
+    """Megapixels per second of sprites blitted over target"""
+    width, height = target.get_size()
+    pixels = 0
+    start = time.perf_counter()
+    for i in range(blits):
+        sprite = sprites[i % len(sprites)]
+        target.blit(sprite, ((i * 37) % width, (i * 53) % height))
+        pixels += sprite.get_width() * sprite.get_height()
+    return pixels / (time.perf_counter() - start) / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--blits", type=int, default=2000)
+    parser.add_argument("--render-scale", type=float, default=1.0)
+    args = parser.parse_args()
+    if palette.numpy is None:
+        print("NumPy is not installed: palette sprites are mapped by SDL")
+
+    print(f"{'game':>10} {'mode':>8} {'sprite KiB':>11} {'world KiB':>10} {'frame ms':>9} {'fill Mpx/s':>11}")
+    for game_name, make in (("platformer", platformer), ("runner", runner)):
+        for mode, indexed in (("32-bit", False), ("palette", True)):
+            game = make(args, indexed)
+            frame_ms = time_frames(game, args.frames)
+            world = game.backend.world.surface
+            rate = fill_rate(world, assets.sprites(), args.blits)
+            print(f"{game_name:>10} {mode:>8} {assets.sprite_bytes() / 1024:11.0f} "
+                  f"{palette.surface_bytes(world) / 1024:10.0f} {frame_ms:9.2f} {rate:11.0f}")
+            del game
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
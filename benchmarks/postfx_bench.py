@@ -0,0 +1,97 @@
+"""
+Post-processing benchmark - vectorised stages against the per-object drawing they replace
+
+Times each stage of postfx.py on the display surface next to the way the
+same effect is drawn without it: the sky one draw.line per row, dimming a
+translucent overlay blit, glows flat translucent rectangles. Then times a
+whole platformer frame (playing with glowing objects, and paused, which
+dims) at every quality level.
+
+Run: python benchmarks/postfx_bench.py [--repeat 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import postfx
+import scratch
+from constants import *
+from main import Game, SKY
+
+
+def time_ms(action, repeat):
+    action()    # warm caches
+    start = time.perf_counter()
+    for _ in range(repeat):
+        action()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def stage_rows(screen, repeat):
+    fx = postfx.PostFX("high")
+    glows = [(60 + 90 * i, 80 + 50 * (i % 5), 50, 50, (255, 215, 0), 100) for i in range(8)]
+
+    def flat_glows():
+        scratch.begin_frame()
+        for x, y, width, height, color, alpha in glows:
+            screen.blit(scratch.acquire((width, height), alpha=alpha, fill=color), (x, y))
+
+    def overlay(alpha):
+        def draw():
+            scratch.begin_frame()
+            screen.blit(scratch.acquire(screen.get_size(), alpha=alpha, fill=BLACK), (0, 0))
+        return draw
+
+    def dim(alpha):
+        def draw():
+            scratch.begin_frame()   # the overlay fallback acquires from the pool
+            fx.dim(screen, alpha)
+        return draw
+
+    return [
+        ("gradient", lambda: SKY(screen), lambda: fx.background(screen, SKY)),
+        ("dim 128", overlay(128), dim(128)),
+        ("dim 180", overlay(180), dim(180)),
+        ("bloom x8", flat_glows, lambda: fx.bloom(screen, glows)),
+        ("shake", None, lambda: fx.shake(screen, (3, -2))),
+    ]
+
+
+def frame_ms(quality, state, repeat):
+    game = Game(seed=1, render_backend="surface", quality=quality)
+    game.reset_game()
+    game.player.immortal = True     # glows
+    game.state = PLAYING
+    for _ in range(60):
+        game.update()
+    game.shake.kick(4)
+    game.state = state
+    return time_ms(game.draw, repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    screen = Game(seed=1, render_backend="surface").screen
+    print(f"{'stage':>10} {'per-object ms':>14} {'vectorised ms':>14}")
+    for name, before, after in stage_rows(screen, args.repeat):
+        before_ms = f"{time_ms(before, args.repeat):14.3f}" if before else f"{'-':>14}"
+        print(f"{name:>10} {before_ms} {time_ms(after, args.repeat):14.3f}")
+
+    print(f"\n{'quality':>10} {'playing ms':>11} {'paused ms':>10}")
+    for quality in postfx.QUALITY_STAGES:
+        playing = frame_ms(quality, PLAYING, args.repeat)
+        paused = frame_ms(quality, PAUSED, args.repeat)
+        print(f"{quality:>10} {playing:11.2f} {paused:10.2f}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
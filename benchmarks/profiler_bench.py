@@ -0,0 +1,62 @@
+"""
+Profiler benchmark - frame time with and without a sampling capture running
+
+Plays the platformer uncapped (update, draw and present back to back, the
+worst case for a sampler competing for the GIL) for a number of frames,
+first without a capture and then with profiler.py sampling it, and
+reports the milliseconds per frame, the overhead and how many samples the
+capture took.
+
+Run: python benchmarks/profiler_bench.py [--frames 2000] [--screens 10]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import profiler
+from constants import *
+from controls import Controls
+from main import Game
+
+
+def play(game, frames):
+    """ms per frame, with the phases marked as the real loop marks them"""
+    start = time.perf_counter()
+    for frame in range(frames):
+        game.profiler.phase = profiler.UPDATE
+        game.update([Controls(right=True, jump=frame % 45 == 0)])
+        game.present()
+    return (time.perf_counter() - start) / frames * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=2000)
+    parser.add_argument("--screens", type=int, default=10, help="level width in screens")
+    args = parser.parse_args()
+    os.environ[profiler.PROFILE_DIR_ENV] = tempfile.mkdtemp()
+
+    game = Game(level_screens=args.screens, seed=1)
+    game.reset_game()
+    game.player.immortal = True
+    game.state = PLAYING
+    play(game, 50)  # bake sprites, fill caches
+
+    plain_ms = play(game, args.frames)
+    game.profiler.start(seconds=3600)
+    sampled_ms = play(game, args.frames)
+    game.profiler.stop()
+    overhead = (sampled_ms / plain_ms - 1) * 100
+    print(f"no capture   {plain_ms:.3f} ms/frame")
+    print(f"capturing    {sampled_ms:.3f} ms/frame ({overhead:+.1f}%)")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Reachability benchmark - graph build time versus level size
+
+Run: python benchmarks/reachability_bench.py [--screens 1 100 500]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from level import create_level
+from reachability import JumpTable, ReachabilityGraph
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--screens", type=int, nargs="+", default=[1, 100, 500])
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = JumpTable()
+    print(f"jump table: {(time.perf_counter() - start) * 1000:.1f} ms "
+          f"(max rise {table.max_rise} px, max reach {table.max_reach():.0f} px)")
+    for screens in args.screens:
+        level = create_level(screens)
+        start = time.perf_counter()
+        graph = ReachabilityGraph(level, table)
+        build_ms = (time.perf_counter() - start) * 1000
+        spawn = 0
+        missing = graph.unreachable_coins(spawn)
+        print(f"{screens:>5} screens: {len(level.platforms):>6} platforms, {graph.edge_count():>7} edges, "
+              f"built in {build_ms:7.1f} ms, {len(missing)} unreachable coins")
+
+
+if __name__ == "__main__":
+    main()
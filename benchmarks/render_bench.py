@@ -0,0 +1,90 @@
+"""
+Renderer benchmark - per-entity blits vs one Surface.blits() batch per layer
+
+Builds a platformer scene with N coins, enemies and particles and times
+drawing it straight onto the screen versus through renderer.Renderer.
+
+Run: python benchmarks/render_bench.py [--entities 200 1000 5000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+from constants import *
+from coin import Coin
+from enemy import Enemy
+from particle import Particle
+from renderer import Renderer, LAYER_ITEMS, LAYER_ENEMIES, LAYER_PARTICLES
+
+FRAMES = 60
+
+
+def build_scene(count, rng):
+    coins = [Coin(rng.randrange(SCREEN_WIDTH), rng.randrange(SCREEN_HEIGHT)) for _ in range(count)]
+    enemies = [Enemy(rng.randrange(SCREEN_WIDTH), rng.randrange(SCREEN_HEIGHT), 0, SCREEN_WIDTH)
+               for _ in range(count // 4)]
+    particles = [Particle(rng.randrange(SCREEN_WIDTH), rng.randrange(SCREEN_HEIGHT), YELLOW,
+                          lifetime=rng.randint(1, 30), size=3) for _ in range(count)]
+    return coins, enemies, particles
+
+
+def draw_direct(screen, scene):
+    coins, enemies, particles = scene
+    for coin in coins:
+        coin.draw(screen)
+    for enemy in enemies:
+        enemy.draw(screen)
+    for particle in particles:
+        particle.draw(screen)
+
+
+def draw_batched(screen, renderer, scene):
+    coins, enemies, particles = scene
+    layer = renderer.layer(LAYER_ITEMS)
+    for coin in coins:
+        coin.draw(layer)
+    layer = renderer.layer(LAYER_ENEMIES)
+    for enemy in enemies:
+        enemy.draw(layer)
+    layer = renderer.layer(LAYER_PARTICLES)
+    for particle in particles:
+        particle.draw(layer)
+    renderer.flush(screen)
+
+
+def time_frames(draw):
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        draw()
+    return (time.perf_counter() - start) / FRAMES * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entities", type=int, nargs="+", default=[200, 1000, 5000])
+    args = parser.parse_args()
+
+    pygame.display.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    renderer = Renderer()
+    rng = random.Random(1)
+
+    for count in args.entities:
+        scene = build_scene(count, rng)
+        draw_direct(screen, scene)  # warm sprite caches
+        direct_ms = time_frames(lambda: draw_direct(screen, scene))
+        batched_ms = time_frames(lambda: draw_batched(screen, renderer, scene))
+        blit_count = sum(len(group) for group in scene)
+        print(f"{count:>6} entities: direct {direct_ms:7.2f} ms ({blit_count} blit calls) | "
+              f"batched {batched_ms:7.2f} ms ({renderer.draw_calls} blits calls, "
+              f"{renderer.commands} commands)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Render scale benchmark - frame draw time against internal world resolution
+
+Draws the same platformer and runner scenes with the world rendered at
+several scales of the window and both scaling filters, and reports the
+world surface size, the milliseconds per draw() and how much of that the
+final scale to the window costs.
+
+Run: python benchmarks/render_scale_bench.py [--frames 200] [--scales 0.5,0.75,1,1.5]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+from constants import *
+from main import Game
+from endless_runner import EndlessRunnerGame
+from resolution import FILTERS
+
+
+def time_frames(game, frames):
+    """(ms per draw(), ms per present())"""
+    present = game.backend.world.present
+    spent = [0.0]
+
+    def timed_present(*args):
+        start = time.perf_counter()
+        present(*args)
+        spent[0] += time.perf_counter() - start
+
+    game.backend.world.present = timed_present
+    game.draw()     # warm the scaled sprite cache
+    spent[0] = 0.0
+    start = time.perf_counter()
+    for _ in range(frames):
+        game.draw()
+    elapsed = time.perf_counter() - start
+    return elapsed / frames * 1000, spent[0] / frames * 1000
+
+
+def platformer(scale, filter):
+    game = Game(seed=1, render_scale=scale, render_filter=filter, render_backend="surface")
+    game.reset_game()
+    game.state = PLAYING
+    for _ in range(60):
+        game.update()
+    return game
+
+
+def runner(scale, filter):
+    game = EndlessRunnerGame(seed=1, render_scale=scale, render_filter=filter, render_backend="surface")
+    game.reset()
+    for _ in range(600):
+        game.update(1.0 / 60)
+    game.state = 'playing'  # a crash would leave a cached game-over frame
+    return game
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--scales", default="0.5,0.75,1,1.5")
+    args = parser.parse_args()
+    scales = [float(s) for s in args.scales.split(",")]
+
+    print(f"{'game':>10} {'scale':>6} {'filter':>8} {'world':>10} {'draw ms':>8} {'present ms':>11}")
+    for name, make in (("platformer", platformer), ("runner", runner)):
+        for scale in scales:
+            for filter in FILTERS:
+                if scale == 1 and filter != FILTERS[0]:
+                    continue    # native resolution is never scaled
+                game = make(scale, filter)
+                draw_ms, present_ms = time_frames(game, args.frames)
+                size = "x".join(map(str, game.backend.world.size))
+                print(f"{name:>10} {scale:6.2f} {filter:>8} {size:>10} {draw_ms:8.2f} {present_ms:11.2f}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Save-state benchmark - snapshot()/restore() cost for both games
+
+Plays a few seconds of each game with scripted input so the scene has
+particles, active power-ups, obstacles and coins, then times snapshot()
+and restore() and checks that a restored world snapshots back to the same
+bytes.
+
+Run: python benchmarks/savestate_bench.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import main
+import endless_runner
+from constants import *
+from controls import Controls
+
+REPEATS = 2000
+
+
+def time_call(fn, *args):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        fn(*args)
+    return (time.perf_counter() - start) / REPEATS * 1e6
+
+
+def report(name, game):
+    blob = game.snapshot()
+    snapshot_us = time_call(game.snapshot)
+    restore_us = time_call(game.restore, blob)
+    game.restore(blob)
+    round_trip = game.snapshot() == blob
+    print(f"{name:<11} {len(blob):>6} bytes | snapshot {snapshot_us:6.1f} us | "
+          f"restore {restore_us:6.1f} us | round trip {'ok' if round_trip else 'MISMATCH'}")
+
+
+def main_():
+    game = main.Game()
+    game.reset_game()
+    game.state = PLAYING
+    for frame in range(240):
+        game.update([Controls(right=frame % 120 < 60, left=frame % 120 >= 60,
+                              jump=frame % 40 == 0, dash=frame % 50 == 0)])
+    print(f"platformer scene: {len(game.particles.particles)} particles, "
+          f"{len(game.player.active_powerups)} active power-ups")
+    report("platformer", game)
+
+    runner = endless_runner.EndlessRunnerGame()
+    runner.reset()
+    for frame in range(600):
+        runner.update(1 / 60)
+        if runner.state != 'playing':
+            break
+    print(f"runner scene: {len(runner.obstacles)} obstacles, {len(runner.coins)} coins")
+    report("runner", runner)
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,69 @@
+"""
+Scratch surface benchmark - surface allocations per frame with scratch.py
+
+Draws platformer frames that hit every transient-surface path (dash trail,
+immortal glow, HUD panel, game-over and win overlays, runner game over)
+and reports how many surfaces were allocated while warming up versus in
+steady state, which should be zero.
+
+Run: python benchmarks/scratch_bench.py [--frames 300]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import scratch
+from constants import *
+from main import Game
+from endless_runner import EndlessRunnerGame
+
+WARMUP_FRAMES = 5
+
+
+def platformer_frame(game, state):
+    game.state = state
+    game.player.is_dashing = True
+    game.player.immortal = True
+    game.draw()
+
+
+def runner_frame(runner, state):
+    runner.state = state
+    runner.draw()
+
+
+def measure(name, draw_frame, frames):
+    for _ in range(WARMUP_FRAMES):
+        draw_frame()
+    before = scratch.stats["allocations"]
+    start = time.perf_counter()
+    for _ in range(frames):
+        draw_frame()
+    elapsed = (time.perf_counter() - start) / frames * 1000
+    steady = scratch.stats["allocations"] - before
+    print(f"{name:>20}: {steady} allocations in {frames} steady frames, {elapsed:.2f} ms per frame")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args()
+
+    game = Game()
+    game.reset_game()
+    for state, name in ((PLAYING, "platformer playing"), (GAME_OVER, "platformer game over"), (WIN, "platformer win")):
+        measure(name, lambda: platformer_frame(game, state), args.frames)
+    runner = EndlessRunnerGame()
+    runner.reset()
+    measure("runner game over", lambda: runner_frame(runner, 'gameover'), args.frames)
+    print(f"pool: {scratch.pooled_count()} surfaces, {scratch.pooled_bytes() / 1024:.0f} KiB, "
+          f"{scratch.stats['allocations']} allocations, {scratch.stats['reuses']} reuses, "
+          f"{scratch.stats['fills']} fills over {scratch.stats['frames']} frames")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Simulation thread benchmark - tick steadiness under render spikes, one thread vs two
+
+Plays the platformer for a number of frames while every Nth draw stalls for
+a while (as a slow GPU upload or a GC pause would). In the classic loop the
+next update waits for the stalled draw; in threaded mode (simthread.py) the
+simulation keeps its own schedule. Reports update interval statistics for
+both, plus the threaded mode's duplicated and dropped frame counters.
+
+Run: python benchmarks/simthread_bench.py [--frames 600] [--spike-every 30] [--spike-ms 50]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+from constants import *
+from main import Game
+from pacing import FrameStats
+from simthread import SimulationThread
+
+
+def new_game():
+    game = Game(seed=1)
+    game.reset_game()
+    game.player.immortal = True     # keep playing for the whole run
+    game.state = PLAYING
+    return game
+
+
+def spike(frame, args):
+    if args.spike_every and frame % args.spike_every == args.spike_every - 1:
+        time.sleep(args.spike_ms / 1000)
+
+
+def single_thread(args):
+    game = new_game()
+    stats = FrameStats(FPS)
+    last = None
+    for frame in range(args.frames):
+        game.pacer.wait()
+        now = time.perf_counter()
+        if last is not None:
+            stats.add(now - last)
+        last = now
+        game.update([game.input.controls()])
+        game.present()
+        spike(frame, args)
+    return stats
+
+
+def threaded(args):
+    game = new_game()
+    sim = SimulationThread(game.sim_step, game.sim_capture, FPS)
+    sim.start(True)
+    for frame in range(args.frames):
+        game.pacer.wait()
+        with sim.lock:
+            snapshot = sim.latest()
+        sim.presented(snapshot)
+        game.present(snapshot)
+        spike(frame, args)
+    sim.stop()
+    return sim
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--spike-every", type=int, default=30, help="frames between stalled draws (0: none)")
+    parser.add_argument("--spike-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    stats = single_thread(args)
+    print(f"single thread: updates {stats.report()}")
+    sim = threaded(args)
+    print(f"     threaded: updates {sim.tick_stats.report()}")
+    print(f"               {sim.counters.report()}, {sim.late_ticks} resyncs")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Spectator streaming benchmark - dirty-tile bandwidth and encode time
+
+Plays the platformer (one screen, and a wider level whose camera scrolls)
+and the runner, encodes every presented frame with spectator.TileEncoder
+and reports the tiles sent per frame, the bytes per frame against raw RGB
+frames, the time the spectator thread spends encoding a frame, and the
+time the game thread spends handing one over (read_frame into the spare
+Surface).
+
+Run: python benchmarks/spectator_bench.py [--frames 300]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import spectator
+from constants import *
+from controls import Controls
+from main import Game
+from endless_runner import EndlessRunnerGame
+
+
+def platformer(screens):
+    game = Game(level_screens=screens, seed=1, render_backend="surface")
+    game.reset_game()
+    game.player.immortal = True
+    game.state = PLAYING
+
+    def frame(number):
+        game.update([Controls(right=True, jump=number % 45 == 0)])
+        game.draw()
+    return game, frame
+
+
+def runner():
+    game = EndlessRunnerGame(seed=1, render_backend="surface")
+    game.reset()
+
+    def frame(number):
+        game.update(1.0 / 60)
+        game.draw_scene()
+    return game, frame
+
+
+def measure(game, frame, frames):
+    size = game.screen.get_size()
+    encoder = spectator.TileEncoder(size)
+    tiles = 0
+    sent = 0
+    encode = 0.0
+    handover = 0.0
+    frame(0)
+    game.backend.read_frame(encoder.target)
+    encoder.encode()    # the key frame a viewer gets on joining
+    for number in range(1, frames + 1):
+        frame(number)
+        start = time.perf_counter()
+        game.backend.read_frame(encoder.target)
+        handover += time.perf_counter() - start
+        start = time.perf_counter()
+        message, count = encoder.encode()
+        encode += time.perf_counter() - start
+        tiles += count
+        sent += len(message)
+    raw = size[0] * size[1] * 3
+    return (tiles / frames, encoder.columns * encoder.rows, sent / frames, sent / frames / raw,
+            encode / frames * 1000, handover / frames * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args()
+    if spectator.numpy is None:
+        print("NumPy is not installed: tiles are compared one by one")
+
+    print(f"{'scene':>22} {'tiles':>11} {'KiB/frame':>10} {'of raw':>7} {'encode ms':>10} {'handover ms':>12}")
+    for name, make in (("platformer, 1 screen", lambda: platformer(1)),
+                       ("platformer, scrolling", lambda: platformer(10)),
+                       ("runner", runner)):
+        game, frame = make()
+        tiles, total, size, ratio, encode_ms, handover_ms = measure(game, frame, args.frames)
+        print(f"{name:>22} {tiles:5.0f}/{total:<5d} {size / 1024:10.1f} {ratio * 100:6.2f}% "
+              f"{encode_ms:10.2f} {handover_ms:12.3f}")
+        del game
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Split-screen benchmark - two players in one world against two copies of the game
+
+Plays the platformer for a number of frames, updating and drawing each
+frame, three ways: one player; two players in split screen (one world, two
+viewports); and two separate single-player games, which is what running a
+copy per player would cost. Reports milliseconds per frame and the memory
+each setup allocated once the shared sprite and font caches were warm
+(tracemalloc: Python objects, not Surface pixels).
+
+Run: python benchmarks/splitscreen_bench.py [--frames 300] [--screens 3]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+from constants import *
+from controls import Controls
+from main import Game
+
+
+def new_game(args, split_screen):
+    game = Game(level_screens=args.screens, seed=1, render_backend="surface", split_screen=split_screen)
+    game.reset_game()
+    game.state = PLAYING
+    return game
+
+
+def controls(frame, count):
+    # Both players run right and jump now and then, the second one a little later
+    return [Controls(right=True, jump=(frame + 20 * i) % 45 == 0) for i in range(count)]
+
+
+def play(games, frames):
+    """ms per frame, every game updated and drawn once a frame"""
+    start = time.perf_counter()
+    for frame in range(frames):
+        for game in games:
+            game.update(controls(frame, game.local_players))
+            game.draw()
+    return (time.perf_counter() - start) / frames * 1000
+
+
+def setup(args, split_screen, copies):
+    tracemalloc.start()
+    games = [new_game(args, split_screen) for _ in range(copies)]
+    play(games, 5)   # bake sprites, fill caches
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return games, allocated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--screens", type=int, default=3, help="level width in screens")
+    args = parser.parse_args()
+
+    play([new_game(args, True)], 5)     # warm the caches every setup shares
+
+    print(f"{'setup':>24} {'frame ms':>9} {'memory KiB':>11}")
+    for name, split_screen, copies in (("one player", False, 1),
+                                       ("split screen, 2 players", True, 1),
+                                       ("two copies", False, 2)):
+        games, allocated = setup(args, split_screen, copies)
+        frame_ms = play(games, args.frames)
+        print(f"{name:>24} {frame_ms:9.2f} {allocated / 1024:11.0f}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Startup benchmark - time-to-first-frame for both games
+
+Each run launches a fresh interpreter so imports, SDL init and asset loading
+are all included. The game prints its own first-frame time (measured from
+when the entry point started executing) and exits; we also time the whole
+process from spawn to that line.
+
+Run: python benchmarks/startup_bench.py [--runs 10] [--cold]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GAMES = {"platformer": "main.py", "endless": "endless_runner.py"}
+
+
+def time_first_frame(script, env):
+    """Return (wall_ms, in_process_ms) for one launch"""
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, script], cwd=ROOT, env=env,
+                          capture_output=True, text=True, timeout=60)
+    wall_ms = (time.perf_counter() - start) * 1000
+    for line in proc.stdout.splitlines():
+        if line.startswith("first_frame_ms="):
+            return wall_ms, float(line.split("=", 1)[1])
+    raise RuntimeError(f"{script} did not report a first frame:\n{proc.stdout}{proc.stderr}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--cold", action="store_true",
+                        help="use an empty asset cache for every run")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("SDL_VIDEODRIVER", "dummy")
+    env["GAME_EXIT_AFTER_FIRST_FRAME"] = "1"
+    env["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
+
+    for name, script in GAMES.items():
+        walls, inners = [], []
+        for _ in range(args.runs):
+            with tempfile.TemporaryDirectory() as cache_dir:
+                if args.cold:
+                    env["GAME_ASSET_CACHE"] = cache_dir
+                wall_ms, inner_ms = time_first_frame(script, env)
+            walls.append(wall_ms)
+            inners.append(inner_ms)
+        print(f"{name:<11} process->first frame: median {statistics.median(walls):7.1f} ms  "
+              f"min {min(walls):7.1f} ms | in-process: median {statistics.median(inners):6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
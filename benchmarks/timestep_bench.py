@@ -0,0 +1,81 @@
+"""
+Timestep benchmark - the same run simulated at different update rates
+
+Plays a scripted platformer run (walk, jump, double jump, dash, turn back)
+for a few seconds at several update rates, with and without substeps, and
+reports how far the player and the first enemy end up from the 60 Hz run
+at each quarter second, the jump apex, and what one simulated second of
+updates costs. Differences of a few pixels come from collisions resolving
+on whole pixels; a broken rate shows up as hundreds.
+
+Run: python benchmarks/timestep_bench.py [--seconds 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from constants import *
+from controls import Controls
+from main import Game
+
+RATES = ((60, None), (60, 0), (144, None), (30, None), (30, 0), (20, None), (15, None), (15, 0))
+SAMPLE = 0.25       # seconds
+
+
+def script(t, dt):
+    """Controls for the update covering [t, t + dt): every press lands on exactly one update
+
+    Presses fall on times every rate in RATES has an update at (near enough
+    for 144 Hz), so the runs differ by the rate and not by when they saw them.
+    """
+    pressed = lambda at: t - 1e-9 <= at < t + dt - 1e-9
+    return Controls(right=t < 2.5 or t > 3.5, left=2.5 <= t <= 3.5,
+                    jump=pressed(1.0) or pressed(1.2) or pressed(3.0), dash=pressed(2.0))
+
+
+def play(rate, substep_rate, seconds):
+    """({sample time: (player x, player y, enemy x)}, apex y, seconds per simulated second)"""
+    game = Game(headless=True, seed=1, substep_rate=substep_rate, active_radius=0)
+    game.reset_game()
+    game.state = PLAYING
+    dt = 1.0 / rate
+    marks = [SAMPLE * k for k in range(1, int(seconds / SAMPLE) + 1)]
+    samples = {}
+    apex = SCREEN_HEIGHT
+    elapsed = 0.0
+    for tick in range(round(seconds * rate)):
+        t = tick * dt
+        controls = [script(t, dt)]
+        start = time.perf_counter()
+        game.update(controls, dt)
+        elapsed += time.perf_counter() - start
+        apex = min(apex, game.player.rect.y)
+        while marks and t + dt >= marks[0] - 1e-9:
+            samples[marks.pop(0)] = (game.player.rect.x, game.player.rect.y, game.enemies[0].rect.x)
+    return samples, apex, elapsed / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    base, base_apex, _ = play(60, None, args.seconds)
+    print(f"{'rate':>6} {'substeps':>9} | {'player dx':>9} {'dy':>4} {'enemy dx':>8} | "
+          f"{'apex':>5} | ms per simulated s")
+    for rate, substep_rate in RATES:
+        samples, apex, cost = play(rate, substep_rate, args.seconds)
+        dx = max(abs(samples[k][0] - base[k][0]) for k in base)
+        dy = max(abs(samples[k][1] - base[k][1]) for k in base)
+        enemy = max(abs(samples[k][2] - base[k][2]) for k in base)
+        substeps = "off" if substep_rate == 0 else "60 Hz"
+        print(f"{rate:>4} Hz {substeps:>9} | {dx:>9} {dy:>4} {enemy:>8} | {apex:>5} | {cost * 1000:.2f}")
+    print(f"(60 Hz apex {base_apex})")
+
+
+if __name__ == "__main__":
+    main()
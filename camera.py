@@ -0,0 +1,101 @@
+"""
+Scrolling camera and spatial index for view culling
+
+The camera follows the player through a world that can be many screens
+wide; in split screen each viewport has a camera of its own. Level objects are bucketed into a uniform grid once, so finding what
+is on screen only touches the cells under the view instead of scanning the
+whole level.
+"""
+import pygame
+from constants import *
+
+# Extra pixels around the view that still count as visible
+CULL_MARGIN = 64
+GRID_CELL_SIZE = 256
+
+
+class Camera:
+    def __init__(self, view_width, view_height, world_width, world_height):
+        self.view_width = view_width
+        self.view_height = view_height
+        self.world_width = max(world_width, view_width)
+        self.world_height = max(world_height, view_height)
+        self.x = 0
+        self.y = 0
+
+    def follow(self, rect):
+        """Center the view on rect, clamped to the world edges"""
+        self.x = min(max(rect.centerx - self.view_width // 2, 0), self.world_width - self.view_width)
+        self.y = min(max(rect.centery - self.view_height // 2, 0), self.world_height - self.view_height)
+
+    @property
+    def offset(self):
+        return (self.x, self.y)
+
+    @property
+    def view_rect(self):
+        return pygame.Rect(self.x, self.y, self.view_width, self.view_height)
+
+    def cull_rect(self, margin=CULL_MARGIN):
+        """World-space rect of everything worth drawing this frame"""
+        return self.view_rect.inflate(margin * 2, margin * 2)
+
+    def to_screen(self, pos):
+        return (pos[0] - self.x, pos[1] - self.y)
+
+
+def viewports(count, width=SCREEN_WIDTH, height=SCREEN_HEIGHT):
+    """Screen rects for count players side by side, full height each"""
+    view_width = width // count
+    return [pygame.Rect(i * view_width, 0, view_width, height) for i in range(count)]
+
+
+class SpatialGrid:
+    """Uniform grid of objects keyed by the cells their bounds overlap
+
+    Objects are stored with their insertion order so query() returns them
+    in the same order they would be drawn or collided with in a full scan.
+    """
+
+    def __init__(self, cell_size=GRID_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.objects = []
+
+    def _cell_range(self, rect):
+        size = self.cell_size
+        return (range(rect.left // size, (rect.right - 1) // size + 1),
+                range(rect.top // size, (rect.bottom - 1) // size + 1))
+
+    def insert(self, obj, bounds):
+        """Add obj covering bounds (a Rect large enough for all its motion)"""
+        index = len(self.objects)
+        self.objects.append(obj)
+        cols, rows = self._cell_range(bounds)
+        for cx in cols:
+            for cy in rows:
+                self.cells.setdefault((cx, cy), []).append(index)
+
+    def query_indices(self, rect):
+        """Return the insertion indices of objects whose bounds may overlap rect"""
+        found = set()
+        cells = self.cells
+        cols, rows = self._cell_range(rect)
+        for cx in cols:
+            for cy in rows:
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    found.update(bucket)
+        return sorted(found)
+
+    def query(self, rect):
+        """Return the objects whose bounds may overlap rect, in insertion order"""
+        objects = self.objects
+        return [objects[i] for i in self.query_indices(rect)]
+
+    @classmethod
+    def build(cls, objects, bounds_of, cell_size=GRID_CELL_SIZE):
+        grid = cls(cell_size)
+        for obj in objects:
+            grid.insert(obj, bounds_of(obj))
+        return grid
@@ -0,0 +1,176 @@
+"""
+Network client for the platformer server
+
+NetClient handles the protocol only (join, send controls, decode snapshots)
+so it can be driven headless by benchmarks. RemoteGame wraps a local
+main.Game that is never simulated: it holds the static level and is updated
+from server snapshots purely to be drawn.
+
+Run: python client.py [--host 127.0.0.1] [--port 50007]
+"""
+import argparse
+import socket
+import time
+
+import netcode
+
+HISTORY_TICKS = 64
+JOIN_TIMEOUT = 5.0
+
+
+class NetClient:
+    def __init__(self, host="127.0.0.1", port=50007):
+        self.server = (host, port)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self.client_id = None
+        self.tick_rate = None
+        self.level_screens = 1
+        self.input_seq = 0
+        self.acked_tick = 0
+        self.snapshots = {}     # tick -> decoded records (baselines for deltas)
+        self.records = None     # newest decoded records
+        self.bytes_received = 0
+        self.snapshots_received = 0
+        self.snapshots_undecodable = 0
+
+    def join(self, timeout=JOIN_TIMEOUT):
+        """Say hello until the server welcomes us"""
+        deadline = time.monotonic() + timeout
+        hello = netcode.pack_header(netcode.HELLO)
+        while time.monotonic() < deadline:
+            self.sock.sendto(hello, self.server)
+            wait_until = time.monotonic() + 0.2
+            while time.monotonic() < wait_until:
+                self.poll()
+                if self.client_id is not None:
+                    return self.client_id
+                time.sleep(0.005)
+        raise TimeoutError(f"no answer from server at {self.server[0]}:{self.server[1]}")
+
+    def send_controls(self, controls):
+        """Send this frame's controls together with the newest snapshot we have"""
+        self.input_seq += 1
+        body = netcode.INPUT_BODY.pack(self.input_seq, controls.to_bits(), self.acked_tick)
+        self.sock.sendto(netcode.pack_header(netcode.INPUT) + body, self.server)
+
+    def poll(self):
+        """Process every waiting packet; returns True if a new snapshot arrived"""
+        updated = False
+        while True:
+            try:
+                data, _ = self.sock.recvfrom(65535)
+            except (BlockingIOError, ConnectionResetError):
+                return updated
+            self.bytes_received += len(data)
+            try:
+                packet_type = netcode.unpack_header(data)
+            except netcode.ProtocolError:
+                continue
+            if packet_type == netcode.WELCOME:
+                self.client_id, self.tick_rate, self.level_screens = \
+                    netcode.WELCOME_BODY.unpack_from(data, netcode.HEADER.size)
+            elif packet_type == netcode.SNAPSHOT:
+                updated = self.handle_snapshot(data) or updated
+
+    def handle_snapshot(self, data):
+        self.snapshots_received += 1
+        decoded = netcode.decode_snapshot(data, self.snapshots)
+        if decoded is None:
+            self.snapshots_undecodable += 1
+            return False
+        tick, _, records = decoded
+        if tick <= self.acked_tick:
+            return False  # late duplicate of something we already have
+        self.snapshots[tick] = records
+        self.snapshots.pop(tick - HISTORY_TICKS, None)
+        self.acked_tick = tick
+        self.records = records
+        return True
+
+    def leave(self):
+        try:
+            self.sock.sendto(netcode.pack_header(netcode.BYE), self.server)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class RemoteGame:
+    """Draws server snapshots using a local, never-simulated main.Game"""
+
+    def __init__(self, client):
+        from main import Game
+        self.client = client
+        self.game = Game(level_screens=client.level_screens)
+        self.game.reset_game(player_count=0)
+        self.players = {}   # client id -> Player
+
+    def apply(self, records):
+        game = self.game
+        seen = set()
+        for (kind, record_id), payload in records.items():
+            if kind == netcode.RECORD_WORLD:
+                netcode.apply_world_record(game, payload)
+            elif kind == netcode.RECORD_PLAYER:
+                player = self.players.get(record_id)
+                if player is None:
+                    player = self.players[record_id] = game.add_player()
+                netcode.apply_player_record(player, payload)
+                seen.add(record_id)
+            elif kind == netcode.RECORD_ENEMY:
+                netcode.apply_enemy_record(game.enemies[record_id], payload)
+        for record_id in list(self.players):
+            if record_id not in seen:
+                game.remove_player(self.players.pop(record_id))
+        # Our own player is the one the camera follows and the HUD shows
+        own = self.players.get(self.client.client_id)
+        if own is not None:
+            game.player = own
+            game.camera.follow(own.rect)
+
+    def animate(self, dt):
+        """Purely cosmetic local animation (coin bob, power-up float)"""
+        for coin in self.game.coins:
+            coin.update(dt)
+        for powerup in self.game.powerups:
+            powerup.update(dt)
+
+    def draw(self):
+        if self.game.player is not None:
+            self.game.draw()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Platformer network client")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=50007)
+    args = parser.parse_args()
+
+    import pygame
+    import startup
+    from controls import Controls
+
+    client = NetClient(args.host, args.port)
+    client.join()
+    remote = RemoteGame(client)
+    clock = pygame.time.Clock()
+    running = True
+    while running:
+        milliseconds = clock.tick(client.tick_rate)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                running = False
+        client.send_controls(Controls.from_keys(pygame.key.get_pressed()))
+        if client.poll():
+            remote.apply(client.records)
+        remote.animate(milliseconds / 1000.0)
+        remote.draw()
+        pygame.display.flip()
+        startup.frame_presented()
+    client.leave()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,44 +3,61 @@ Collectible coins
 """
 import pygame
 from constants import *
+from timestep import STEP
+from assets import get_font, get_sprite
 
 
-class Coin(pygame.sprite.Sprite):
+class Coin:
+    __slots__ = ("rect", "collected", "animation_offset", "original_y")
+    animation_speed = 6.0  # bob phase per second
+    
     def __init__(self, x, y):
-        super().__init__()
-        self.image = pygame.Surface((COIN_SIZE, COIN_SIZE))
-        self.image.fill(COIN_COLOR)
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
+        self.rect = pygame.Rect(x, y, COIN_SIZE, COIN_SIZE)
         self.collected = False
         self.animation_offset = 0  # For floating animation
         self.original_y = y
         
-    def update(self):
+    def update(self, dt=STEP):
         """Animate coin floating"""
         if not self.collected:
-            self.animation_offset += 0.1
-            self.rect.y = self.original_y + int(pygame.math.Vector2(0, 3).rotate(self.animation_offset * 10).y)
+            self.animation_offset += self.animation_speed * dt
+            self.bob()
+            
+    def advance(self, seconds):
+        """Where seconds of update() would leave the coin: the bob phase
+        is linear in time (equal up to float rounding of the phase)"""
+        self.update(seconds)
+            
+    def bob(self):
+        self.rect.y = self.original_y + int(pygame.math.Vector2(0, 3).rotate(self.animation_offset * 10).y)
+        
+    def world_bounds(self):
+        """Area covered by the floating animation"""
+        return pygame.Rect(self.rect.x, self.original_y - 4, self.rect.width, self.rect.height + 8)
         
     def draw(self, screen):
         if not self.collected:
-            # Outer golden circle with shine effect
-            pygame.draw.circle(screen, COIN_COLOR, self.rect.center, COIN_SIZE // 2)
-            pygame.draw.circle(screen, (255, 215, 0), self.rect.center, COIN_SIZE // 2, 2)  # Gold border
-            
-            # Inner darker circle for depth
-            pygame.draw.circle(screen, (200, 180, 0), self.rect.center, COIN_SIZE // 2 - 4)
-            
-            # Shine spot
-            shine_pos = (self.rect.centerx - 3, self.rect.centery - 3)
-            pygame.draw.circle(screen, (255, 255, 200), shine_pos, 3)
-            
-            # Dollar sign
-            font = pygame.font.Font(None, 20)
-            text = font.render("$", True, (100, 80, 0))
-            text_rect = text.get_rect(center=self.rect.center)
-            screen.blit(text, text_rect)
+            screen.blit(get_sprite("coin", (COIN_SIZE, COIN_SIZE), paint_coin), self.rect)
+
+
+def paint_coin(surf):
+    """Paint the coin sprite (baked once by the asset cache)"""
+    rect = surf.get_rect()
+    # Outer golden circle with shine effect
+    pygame.draw.circle(surf, COIN_COLOR, rect.center, COIN_SIZE // 2)
+    pygame.draw.circle(surf, (255, 215, 0), rect.center, COIN_SIZE // 2, 2)  # Gold border
+
+    # Inner darker circle for depth
+    pygame.draw.circle(surf, (200, 180, 0), rect.center, COIN_SIZE // 2 - 4)
+
+    # Shine spot
+    shine_pos = (rect.centerx - 3, rect.centery - 3)
+    pygame.draw.circle(surf, (255, 255, 200), shine_pos, 3)
+
+    # Dollar sign
+    text = get_font(20).render("$", True, (100, 80, 0))
+    text_rect = text.get_rect(center=rect.center)
+    surf.blit(text, text_rect)
 
 
 def create_coins_level_1():
@@ -16,18 +16,22 @@ BLUE = (0, 100, 255)
 YELLOW = (255, 255, 0)
 BROWN = (139, 69, 19)
 SKY_BLUE = (135, 206, 235)
+SKY_BOTTOM = (185, 206, 235)  # the platformer's sky fades to this
 
-# Physics
-GRAVITY = 0.6  # Even gentler gravity for more air control
-JUMP_STRENGTH = -18  # Much higher jump for excitement!
-PLAYER_SPEED = 8  # Faster movement for better control
-ENEMY_SPEED = 1.5  # Slower enemies
+# Physics, per second (tuned at 60 updates a second: timestep.py)
+GRAVITY = 2160  # px/s² - even gentler gravity for more air control
+JUMP_STRENGTH = -1080  # px/s - much higher jump for excitement!
+TERMINAL_VELOCITY = 1200  # px/s
+PLAYER_SPEED = 480  # px/s - faster movement for better control
+ENEMY_SPEED = 90  # px/s - slower enemies
 
 # Player settings
 PLAYER_WIDTH = 45
 PLAYER_HEIGHT = 45
 PLAYER_COLOR = RED
-INVINCIBILITY_TIME = 120  # 2 seconds at 60 FPS
+PLAYER_COLORS = (PLAYER_COLOR, BLUE)  # by player number, in the order players join
+INVINCIBILITY_TIME = 2.0  # seconds
+HIT_INVINCIBILITY_TIME = 0.5  # seconds, after bumping an enemy in immortal mode
 
 # Platform settings
 PLATFORM_HEIGHT = 20
@@ -47,3 +51,4 @@ MENU = 0
 PLAYING = 1
 GAME_OVER = 2
 WIN = 3
+PAUSED = 4
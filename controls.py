@@ -0,0 +1,51 @@
+"""
+Per-frame player controls, independent of where they came from
+
+The platformer player is driven by a Controls value instead of reading the
+keyboard itself, so the same simulation can be fed from the local keyboard,
+a network client or an automated player.
+"""
+import pygame
+
+LEFT = 1
+RIGHT = 2
+JUMP = 4
+DASH = 8
+
+
+class Controls:
+    """Which actions are held during one frame"""
+    __slots__ = ("left", "right", "jump", "dash")
+
+    def __init__(self, left=False, right=False, jump=False, dash=False):
+        self.left = left
+        self.right = right
+        self.jump = jump
+        self.dash = dash
+
+    @classmethod
+    def from_keys(cls, keys):
+        """Build controls from a pygame.key.get_pressed() result"""
+        return cls(
+            left=bool(keys[pygame.K_LEFT] or keys[pygame.K_a]),
+            right=bool(keys[pygame.K_RIGHT] or keys[pygame.K_d]),
+            jump=bool(keys[pygame.K_SPACE] or keys[pygame.K_UP] or keys[pygame.K_w]),
+            dash=bool(keys[pygame.K_LSHIFT] or keys[pygame.K_RSHIFT]),
+        )
+
+    @classmethod
+    def from_bits(cls, bits):
+        return cls(bool(bits & LEFT), bool(bits & RIGHT), bool(bits & JUMP), bool(bits & DASH))
+
+    def to_bits(self):
+        return ((LEFT if self.left else 0) | (RIGHT if self.right else 0) |
+                (JUMP if self.jump else 0) | (DASH if self.dash else 0))
+
+    def __eq__(self, other):
+        return isinstance(other, Controls) and self.to_bits() == other.to_bits()
+
+    def __repr__(self):
+        return f"Controls(left={self.left}, right={self.right}, jump={self.jump}, dash={self.dash})"
+
+
+NO_CONTROLS = Controls()
@@ -0,0 +1,212 @@
+"""
+Fixed runner courses: spawn tables read through a memory map
+
+A course file lists every obstacle and coin of an endless runner run in
+distance order, so every player of a tournament meets the same course
+whatever their frame rate. An entry's distance is where the object enters
+the track, in the same pixels of scroll as EndlessRunnerGame.distance: the
+object spawns once the run is within COURSE_SPAWN_AHEAD of it.
+
+The file is mapped, not read: opening a course of millions of entries costs
+the header check, entries are unpacked one at a time as the run reaches
+them (CourseCursor keeps the position; seeking after a restore is a binary
+search on distance), and the pages stay in the OS file cache instead of
+the heap.
+
+Format (little-endian): COURSE_HEADER, then entry count ENTRY records of
+distance (float64), lane, kind (index into KINDS) and y offset (coins).
+
+Play one with GAME_COURSE=<file>. GAME_COURSE_RECORD=<file> writes the
+course of the last run played, as the random spawner made it, on exit.
+
+Run: python course.py generate tournament.course --seed 7 --distance 1000000
+     python course.py info tournament.course
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+from bisect import bisect_right
+
+COURSE_ENV = "GAME_COURSE"
+RECORD_ENV = "GAME_COURSE_RECORD"
+
+COURSE_MAGIC = b"RCRS"
+COURSE_VERSION = 1
+COURSE_HEADER = struct.Struct("<4sIIQ")     # magic, version, seed it came from, entry count
+ENTRY = struct.Struct("<dBBh")              # distance, lane, kind, y offset
+DISTANCE = struct.Struct("<d")              # the first field of an entry
+KINDS = ("low", "high", "coin")
+COIN = KINDS.index("coin")
+
+
+class _Distances:
+    """The distance column of a Course, as a sequence bisect can search"""
+    __slots__ = ("map", "count")
+
+    def __init__(self, course):
+        self.map = course.map
+        self.count = len(course)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        return DISTANCE.unpack_from(self.map, COURSE_HEADER.size + i * ENTRY.size)[0]
+
+
+class Course:
+    """A memory-mapped course file; entries are (distance, lane, kind, y offset)"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < COURSE_HEADER.size:
+                raise ValueError(f"{path} is not a runner course")
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.seed, self.count = COURSE_HEADER.unpack_from(self.map)
+        if magic != COURSE_MAGIC or version != COURSE_VERSION:
+            self.map.close()
+            raise ValueError(f"{path} is not a runner course (version {version})")
+        if size < COURSE_HEADER.size + self.count * ENTRY.size:
+            self.map.close()
+            raise ValueError(f"{path} is truncated: {self.count} entries declared")
+        self.distances = _Distances(self)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        return ENTRY.unpack_from(self.map, COURSE_HEADER.size + i * ENTRY.size)
+
+    def index_after(self, distance):
+        """Index of the first entry beyond distance"""
+        return bisect_right(self.distances, distance)
+
+    @property
+    def length(self):
+        """Distance of the last entry"""
+        return self.distances[self.count - 1] if self.count else 0.0
+
+    def close(self):
+        self.map.close()
+
+
+class CourseCursor:
+    """How far into a Course a run has spawned"""
+    __slots__ = ("course", "index")
+
+    def __init__(self, course, distance=None):
+        self.course = course
+        self.index = 0
+        if distance is not None:
+            self.seek(distance)
+
+    def seek(self, distance):
+        """Everything up to distance counts as spawned already"""
+        self.index = self.course.index_after(distance)
+
+    def take(self, distance):
+        """The entries up to distance not taken yet, in order"""
+        course = self.course
+        i = self.index
+        count = course.count
+        entries = []
+        while i < count:
+            entry = course[i]
+            if entry[0] > distance:
+                break
+            entries.append(entry)
+            i += 1
+        self.index = i
+        return entries
+
+    @property
+    def finished(self):
+        return self.index >= self.course.count
+
+
+def write_course(path, entries, seed=0):
+    """Write (distance, lane, kind, y offset) entries, in any order, as a course file"""
+    entries = sorted(entries, key=lambda entry: entry[0])
+    pack = ENTRY.pack
+    with open(path, "wb") as f:
+        f.write(COURSE_HEADER.pack(COURSE_MAGIC, COURSE_VERSION, seed & 0xFFFFFFFF, len(entries)))
+        for start in range(0, len(entries), 65536):
+            f.write(b"".join([pack(*entry) for entry in entries[start:start + 65536]]))
+    return len(entries)
+
+
+def from_env(path=None):
+    """The Course at path, else $GAME_COURSE; None when neither is set"""
+    if path is None:
+        path = os.environ.get(COURSE_ENV)
+    if not path:
+        return None
+    return Course(path)
+
+
+def record_path():
+    """Where to write the course of the last run, or None"""
+    return os.environ.get(RECORD_ENV) or None
+
+
+def generate(seed, distance, fps=None):
+    """Entries of the course a seeded random run meets in its first distance pixels
+
+    Runs only the runner's spawner (speed-up, spawn timer and its random
+    stream) at a fixed tick, so it matches a live run at that rate however
+    the player does.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from endless_runner import EndlessRunnerGame, SPEED_INCREASE_RATE, FPS
+
+    dt = 1.0 / (fps or FPS)
+    game = EndlessRunnerGame(seed=seed)
+    game.reset()
+    game.course_log = log = []
+    obstacles = game.obstacles
+    coins = game.coins
+    while game.distance < distance:
+        game.scroll_speed += SPEED_INCREASE_RATE * dt
+        game.spawn_random(dt)
+        del obstacles[:], coins[:]
+        game.distance += game.scroll_speed * dt
+    return log
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate and inspect endless runner course files")
+    commands = parser.add_subparsers(dest="command", required=True)
+    make = commands.add_parser("generate", help="write the course of a seeded random run")
+    make.add_argument("output")
+    make.add_argument("--seed", type=int, default=1)
+    make.add_argument("--distance", type=float, default=1e6, help="course length in pixels of scroll")
+    make.add_argument("--fps", type=int, default=None, help="tick rate of the run (default the game's)")
+    info = commands.add_parser("info", help="summarise a course file")
+    info.add_argument("course")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        start = time.perf_counter()
+        count = write_course(args.output, generate(args.seed, args.distance, args.fps), args.seed)
+        print(f"{count} entries over {args.distance:.0f} px from seed {args.seed} "
+              f"in {time.perf_counter() - start:.1f} s -> {args.output}")
+        return 0
+    course = Course(args.course)
+    kinds = [0] * len(KINDS)
+    for i in range(len(course)):
+        kinds[course[i][2]] += 1
+    print(f"{args.course}: {len(course)} entries to {course.length:.0f} px, seed {course.seed}, "
+          + ", ".join(f"{count} {kind}" for kind, count in zip(KINDS, kinds)))
+    course.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""
+Reproducible runs: seeded random streams and per-frame state hash traces
+
+Each game owns two random.Random streams derived from one seed: a gameplay
+stream (spawns) and a cosmetic stream (particles), so effects can never
+shift gameplay. After every update the game folds its gameplay state
+(savestate.platformer_state / endless_runner.runner_state) into a running
+CRC32, game.state_hash. The platformer folds in its players and the coins
+and power-ups picked up that frame, so the hash costs the same on any level
+and does not depend on which objects activity.py has awake.
+
+A trace is that hash recorded for every frame of a scripted run: the
+platformer is driven by the autoplayer, the runner by inputs drawn from
+their own seeded stream. Record a trace on one build, record or check on
+another, and the first frame whose hash differs is where behaviour changed.
+
+Run: python determinism.py record platformer base.trace [--frames 20000] [--seed 1]
+     python determinism.py compare base.trace new.trace
+     python determinism.py check base.trace    (re-record here and compare)
+"""
+import argparse
+import os
+import random
+import struct
+import sys
+import zlib
+
+SEED_ENV = "GAME_SEED"
+# Mixed into the seed so the cosmetic stream is unrelated to the gameplay one
+COSMETIC_SALT = 0x9E3779B9
+INPUT_SALT = 0x85EBCA6B
+
+TRACE_MAGIC = b"HTR1"
+TRACE_HEADER = struct.Struct("<4s12sIII")   # magic, game, seed, level screens, frame count
+GAMES = ("platformer", "runner")
+
+
+def choose_seed(seed=None):
+    """seed, else $GAME_SEED, else a fresh random one"""
+    if seed is None:
+        seed = os.environ.get(SEED_ENV)
+    if seed is None:
+        return random.SystemRandom().randrange(1 << 32)
+    return int(seed) & 0xFFFFFFFF
+
+
+def make_streams(seed):
+    """(gameplay, cosmetic) random streams for a seed"""
+    return random.Random(seed), random.Random(seed ^ COSMETIC_SALT)
+
+
+def chain(data, previous):
+    """Fold one frame's state bytes into the running hash"""
+    return zlib.crc32(data, previous)
+
+
+# ------------- Traces -------------
+def write_trace(path, game, seed, screens, hashes):
+    with open(path, "wb") as f:
+        f.write(TRACE_HEADER.pack(TRACE_MAGIC, game.encode(), seed, screens, len(hashes)))
+        f.write(struct.pack(f"<{len(hashes)}I", *hashes))
+
+
+def read_trace(path):
+    """Returns (game, seed, screens, hashes)"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < TRACE_HEADER.size or data[:4] != TRACE_MAGIC:
+        raise ValueError(f"{path} is not a state hash trace")
+    _, game, seed, screens, count = TRACE_HEADER.unpack_from(data)
+    hashes = struct.unpack_from(f"<{count}I", data, TRACE_HEADER.size)
+    return game.rstrip(b"\0").decode(), seed, screens, list(hashes)
+
+
+def first_difference(a, b):
+    """Index of the first frame where two hash lists differ, or None"""
+    for frame, (x, y) in enumerate(zip(a, b)):
+        if x != y:
+            return frame
+    if len(a) != len(b):
+        return min(len(a), len(b))
+    return None
+
+
+# ------------- Scripted runs -------------
+def record_platformer(frames, seed, screens=1):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from constants import PLAYING
+    from main import Game
+    from autoplayer import AutoPlayer
+    from reachability import ReachabilityGraph
+
+    # Not headless: particles (and so the cosmetic stream) stay active
+    game = Game(level_screens=screens, seed=seed)
+    game.reset_game()
+    game.state = PLAYING
+    graph = ReachabilityGraph(game.level)
+    bot = AutoPlayer(game, graph)
+    hashes = []
+    for _ in range(frames):
+        game.update([bot.controls()])
+        hashes.append(game.state_hash)
+        if game.state != PLAYING:
+            game.reset_game()
+            game.state = PLAYING
+            bot = AutoPlayer(game, ReachabilityGraph(game.level, graph.table))
+    return hashes
+
+
+def record_runner(frames, seed, screens=1):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from endless_runner import EndlessRunnerGame, FPS
+
+    game = EndlessRunnerGame(seed=seed)
+    game.reset()
+    inputs = random.Random(seed ^ INPUT_SALT)
+    dt = 1.0 / FPS
+    hashes = []
+    for _ in range(frames):
+        if game.state == 'gameover':
+            game.reset()
+        r = inputs.random()
+        if r < 0.02:
+            game.player.move_left()
+        elif r < 0.04:
+            game.player.move_right()
+        elif r < 0.07:
+            game.player.jump()
+        elif r < 0.09:
+            game.player.start_slide()
+        elif game.player.sliding and r > 0.95:
+            game.player.stop_slide()
+        game.update(dt)
+        hashes.append(game.state_hash)
+    return hashes
+
+
+RECORDERS = {"platformer": record_platformer, "runner": record_runner}
+
+
+def report(a, b, label_a, label_b):
+    frame = first_difference(a, b)
+    if frame is None:
+        print(f"identical: {len(a)} frames")
+        return 0
+    if frame >= min(len(a), len(b)):
+        print(f"identical for {frame} frames, then {label_a} has {len(a)} and {label_b} has {len(b)}")
+    else:
+        print(f"first difference at frame {frame}: {label_a} {a[frame]:08x}, {label_b} {b[frame]:08x}")
+    return 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and compare per-frame state hash traces")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="run a scripted game and save its hash trace")
+    record.add_argument("game", choices=GAMES)
+    record.add_argument("output")
+    record.add_argument("--frames", type=int, default=20000)
+    record.add_argument("--seed", type=int, default=1)
+    record.add_argument("--screens", type=int, default=1, help="platformer level width")
+    compare = commands.add_parser("compare", help="report the first frame where two traces differ")
+    compare.add_argument("a")
+    compare.add_argument("b")
+    check = commands.add_parser("check", help="re-record a trace with this build and compare")
+    check.add_argument("trace")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        hashes = RECORDERS[args.game](args.frames, args.seed, args.screens)
+        write_trace(args.output, args.game, args.seed, args.screens, hashes)
+        print(f"{args.game}: {len(hashes)} frames, final hash {hashes[-1]:08x} -> {args.output}")
+        return 0
+    if args.command == "compare":
+        game_a, seed_a, screens_a, a = read_trace(args.a)
+        game_b, seed_b, screens_b, b = read_trace(args.b)
+        if (game_a, seed_a, screens_a) != (game_b, seed_b, screens_b):
+            print(f"traces are of different runs: {game_a} seed {seed_a} screens {screens_a} "
+                  f"vs {game_b} seed {seed_b} screens {screens_b}")
+            return 2
+        return report(a, b, args.a, args.b)
+    game, seed, screens, expected = read_trace(args.trace)
+    actual = RECORDERS[game](len(expected), seed, screens)
+    return report(expected, actual, args.trace, "this build")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,10 +10,25 @@ Run: python3 endless_runner.py
 Requires: pygame
 """
 
+import startup
 import sys
-import random
 import math
+import struct
 import pygame
+import savestate
+import determinism
+import leaderboard
+import simthread
+import scratch
+import profiler
+import spectator
+import course
+from inputbuffer import InputBuffer, RUNNER_KEYS, LEFT, RIGHT, JUMP, DOWN, CONFIRM, RETRY, STATS, PAUSE, PROFILE
+from pacing import FramePacer
+from simthread import SimulationThread, Snapshot
+from assets import get_font, get_sprite
+import backend
+from renderer import Renderer, LAYER_BACKGROUND, LAYER_ITEMS, LAYER_ENEMIES, LAYER_PLAYER
 
 # ------------- Settings -------------
 SCREEN_WIDTH = 800
@@ -23,6 +38,7 @@ FPS = 60
 LANE_COUNT = 3
 LANE_X = [SCREEN_WIDTH * 0.25, SCREEN_WIDTH * 0.5, SCREEN_WIDTH * 0.75]
 GROUND_Y = SCREEN_HEIGHT - 120  # y coordinate of the ground surface
+LANE_LINE_HEIGHT = 220  # lane separators reach this far above the ground
 
 PLAYER_WIDTH = 40
 PLAYER_HEIGHT = 70
@@ -37,12 +53,16 @@ COIN_COLOR = (255, 200, 40)
 BASE_SCROLL_SPEED = 300.0  # pixels per second that world moves toward player
 SPEED_INCREASE_RATE = 5.0  # pixels/sec per second (gradual accel)
 SPAWN_INTERVAL = 0.9  # seconds between obstacle spawns (will randomize a bit)
+COURSE_SPAWN_AHEAD = SCREEN_WIDTH + 60  # course objects spawn this far ahead of the run
 COIN_SCORE = 5
 DISTANCE_SCORE_RATE = 0.1  # points per pixel of scroll
 
 FONT_COLOR = (20, 20, 20)
 BG_COLOR = (135, 206, 235)
 
+# screens that stay still until a key is pressed: drawn once, then the loop sleeps
+IDLE_STATES = ('menu', 'paused', 'gameover')
+
 # ------------- Helper functions -------------
 
 def clamp(v, lo, hi):
@@ -138,59 +158,52 @@ class Player(pygame.sprite.Sprite):
         self.rect.centerx = int(self.x)
 
     def draw(self, surf):
-        pygame.draw.rect(surf, self.color, self.rect)
-        # simple eyes to hint direction/animation
-        eye_radius = 3
-        left_eye = (self.rect.centerx - 8, self.rect.centery - 10)
-        right_eye = (self.rect.centerx + 8, self.rect.centery - 10)
-        pygame.draw.circle(surf, (255, 255, 255), left_eye, eye_radius)
-        pygame.draw.circle(surf, (255, 255, 255), right_eye, eye_radius)
+        # standing and sliding each get their own baked sprite
+        surf.blit(get_sprite('runner_player', self.rect.size, paint_runner_player, self.color), self.rect)
 
 
-class Obstacle(pygame.sprite.Sprite):
+class Obstacle:
     """Obstacles appear in lanes and move left toward player.
     type='low' -> on ground, must jump over
     type='high' -> hanging, must slide under
     """
+    __slots__ = ('lane', 'x', 'kind', 'rect')
 
     def __init__(self, lane, x, kind='low'):
-        super().__init__()
         self.lane = lane
         self.x = x
         self.kind = kind
-        self.width = OBSTACLE_WIDTH
 
         if kind == 'low':
-            self.height = 64
-            self.color = OBSTACLE_COLOR
             # bottom aligned to ground
-            self.rect = pygame.Rect(0, 0, self.width, self.height)
+            self.rect = pygame.Rect(0, 0, OBSTACLE_WIDTH, 64)
             self.rect.midbottom = (LANE_X[lane], GROUND_Y)
         else:  # 'high' hanging obstacle
-            self.height = 32
-            self.color = HANGING_COLOR
-            self.rect = pygame.Rect(0, 0, self.width, self.height)
+            self.rect = pygame.Rect(0, 0, OBSTACLE_WIDTH, 32)
             # place hanging obstacle above ground so player must duck
             self.rect.midbottom = (LANE_X[lane], GROUND_Y - 60)
 
         self.rect.x = x
 
+    @property
+    def color(self):
+        return OBSTACLE_COLOR if self.kind == 'low' else HANGING_COLOR
+
     def update(self, dt, scroll_speed):
         # Move toward left as world scrolls
         self.rect.x -= int(scroll_speed * dt)
 
     def draw(self, surf):
-        pygame.draw.rect(surf, self.color, self.rect)
-        # simple highlight
-        pygame.draw.rect(surf, (0, 0, 0), self.rect, 2)
+        surf.blit(get_sprite('obstacle', self.rect.size, paint_obstacle, self.color), self.rect)
 
 
-class Coin(pygame.sprite.Sprite):
+class Coin:
+    __slots__ = ('lane', 'x', 'rect', 'collected', 'pulse')
+    size = 18
+
     def __init__(self, lane, x, y_offset= -40):
-        super().__init__()
         self.lane = lane
         self.x = x
-        self.size = 18
         # position is relative to lane center
         cx = LANE_X[lane]
         cy = GROUND_Y - 10 + y_offset
@@ -204,24 +217,184 @@ class Coin(pygame.sprite.Sprite):
         self.pulse += dt * 8.0
 
     def draw(self, surf):
-        # simple pulsing circle
+        # simple pulsing circle (one baked sprite per radius)
         r = int(self.size / 2 + math.sin(self.pulse) * 3)
-        pygame.draw.circle(surf, COIN_COLOR, self.rect.center, r)
-        pygame.draw.circle(surf, (0,0,0), self.rect.center, r, 2)
+        sprite = get_sprite('runner_coin', (2 * r + 2, 2 * r + 2), paint_runner_coin, r)
+        surf.blit(sprite, (self.rect.centerx - r - 1, self.rect.centery - r - 1))
+
+
+# ------------- Sprite painters (baked once by the asset cache) -------------
+def paint_runner_player(surf, color):
+    rect = surf.get_rect()
+    pygame.draw.rect(surf, color, rect)
+    # simple eyes to hint direction/animation
+    eye_radius = 3
+    left_eye = (rect.centerx - 8, rect.centery - 10)
+    right_eye = (rect.centerx + 8, rect.centery - 10)
+    pygame.draw.circle(surf, (255, 255, 255), left_eye, eye_radius)
+    pygame.draw.circle(surf, (255, 255, 255), right_eye, eye_radius)
+
+
+def paint_obstacle(surf, color):
+    rect = surf.get_rect()
+    pygame.draw.rect(surf, color, rect)
+    # simple highlight
+    pygame.draw.rect(surf, (0, 0, 0), rect, 2)
+
+
+def paint_runner_coin(surf, r):
+    center = (r + 1, r + 1)
+    pygame.draw.circle(surf, COIN_COLOR, center, r)
+    pygame.draw.circle(surf, (0,0,0), center, r, 2)
+
+
+def paint_ground_and_lanes(surf):
+    # simple ground
+    pygame.draw.rect(surf, (80, 50, 20), (0, LANE_LINE_HEIGHT, SCREEN_WIDTH, SCREEN_HEIGHT - GROUND_Y))
+    # lane separators for visual guidance
+    for i in range(LANE_COUNT):
+        x = int(LANE_X[i])
+        pygame.draw.line(surf, (220, 220, 220), (x, 0), (x, LANE_LINE_HEIGHT), 2)
+
+
+# ------------- Save states (fixed-layout records, see savestate.py) -------------
+RUNNER_MAGIC = b'RSV2'
+GAME_STATES = ('menu', 'playing', 'gameover', 'paused')
+OBSTACLE_KINDS = ('low', 'high')
+
+RUNNER_HEADER = struct.Struct('<4sBdddiIII')
+# magic, state, scroll speed, spawn timer, distance, best score, obstacle count, coin count, state hash
+RUNNER_STATE = struct.Struct('<Bddd')        # state, scroll speed, spawn timer, distance
+RUNNER_PLAYER = struct.Struct('<BdiiiidBBdi')
+# lane, x, rect x, rect y, rect w, rect h, vel_y, on_ground, sliding, slide_time, score
+RUNNER_OBSTACLE = struct.Struct('<BiBii')    # lane, spawn x, kind, rect x, rect y
+RUNNER_COIN = struct.Struct('<BiiiBd')       # lane, spawn x, rect x, rect y, collected, pulse
+
+
+def _pack_runner_world(game, parts):
+    p = game.player
+    parts.append(RUNNER_PLAYER.pack(p.lane, p.x, p.rect.x, p.rect.y, p.rect.width, p.rect.height,
+                                    p.vel_y, p.on_ground, p.sliding, p.slide_time, p.score))
+    pack = RUNNER_OBSTACLE.pack
+    parts.extend([pack(o.lane, o.x, OBSTACLE_KINDS.index(o.kind), o.rect.x, o.rect.y)
+                  for o in game.obstacles])
+    pack = RUNNER_COIN.pack
+    parts.extend([pack(c.lane, c.x, c.rect.x, c.rect.y, c.collected, c.pulse) for c in game.coins])
+    return parts
+
+
+def runner_state(game):
+    # gameplay state only (what determinism.py hashes every frame)
+    head = RUNNER_STATE.pack(GAME_STATES.index(game.state), game.scroll_speed, game.spawn_timer, game.distance)
+    return b''.join(_pack_runner_world(game, [head]))
+
+
+def snapshot_runner(game):
+    parts = [
+        RUNNER_HEADER.pack(RUNNER_MAGIC, GAME_STATES.index(game.state), game.scroll_speed,
+                           game.spawn_timer, game.distance, game.best_score,
+                           len(game.obstacles), len(game.coins), game.state_hash),
+    ]
+    _pack_runner_world(game, parts)
+    parts.append(savestate.pack_rng(game.rng))
+    return b''.join(parts)
+
+
+def restore_runner(game, data):
+    if len(data) < RUNNER_HEADER.size or data[:4] != RUNNER_MAGIC:
+        raise savestate.SnapshotError('not an endless runner snapshot')
+    obstacle_count, coin_count = RUNNER_HEADER.unpack_from(data)[6:8]
+    # Every record must be there before anything in the game is overwritten
+    savestate.check_size(data, RUNNER_HEADER.size + RUNNER_PLAYER.size + RUNNER_OBSTACLE.size * obstacle_count
+                         + RUNNER_COIN.size * coin_count + savestate.RNG_SIZE, 'runner')
+    (_, state, game.scroll_speed, game.spawn_timer, game.distance, game.best_score,
+     obstacle_count, coin_count, game.state_hash) = RUNNER_HEADER.unpack_from(data)
+    game.state = GAME_STATES[state]
+    offset = RUNNER_HEADER.size
+
+    p = Player()
+    (p.lane, p.x, p.rect.x, p.rect.y, p.rect.width, p.rect.height, p.vel_y, on_ground,
+     sliding, p.slide_time, p.score) = RUNNER_PLAYER.unpack_from(data, offset)
+    p.on_ground = bool(on_ground)
+    p.sliding = bool(sliding)
+    game.player = p
+    offset += RUNNER_PLAYER.size
+
+    end = offset + RUNNER_OBSTACLE.size * obstacle_count
+    obstacles = []
+    for lane, x, kind, rect_x, rect_y in RUNNER_OBSTACLE.iter_unpack(data[offset:end]):
+        obs = Obstacle(lane, x, OBSTACLE_KINDS[kind])
+        obs.rect.y = rect_y
+        obs.rect.x = rect_x
+        obstacles.append(obs)
+    game.obstacles = obstacles
+    offset = end
+
+    end = offset + RUNNER_COIN.size * coin_count
+    coins = []
+    for lane, x, rect_x, rect_y, collected, pulse in RUNNER_COIN.iter_unpack(data[offset:end]):
+        coin = Coin(lane, x)
+        coin.rect.x = rect_x
+        coin.rect.y = rect_y
+        coin.collected = bool(collected)
+        coin.pulse = pulse
+        coins.append(coin)
+    game.coins = coins
+    offset = end
+
+    savestate.unpack_rng(data, offset, game.rng)
 
 
 # ------------- Game class -------------
 class EndlessRunnerGame:
-    def __init__(self):
-        pygame.init()
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption('2D Endless Runner (Subway Surfers - style)')
-        self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font(None, 28)
-        self.big_font = pygame.font.Font(None, 56)
-
-        # Player
+    def __init__(self, seed=None, render_scale=None, render_filter=None, threaded=None, render_backend=None,
+                 quality=None, indexed=None, spectator_port=None, course_path=None, headless=False):
+        # a headless game (e.g. a rival's runner in a lockstep race) simulates without a window
+        self.headless = headless
+        self.renderer = Renderer()
+        if headless:
+            self.backend = None
+            self.screen = None
+        else:
+            # Surfaces or SDL textures (GAME_RENDER_BACKEND), world resolution relative
+            # to the window (GAME_RENDER_SCALE / GAME_RENDER_FILTER), post-processing (GAME_QUALITY),
+            # 8-bit palette mode (GAME_PALETTE)
+            self.backend = backend.create((SCREEN_WIDTH, SCREEN_HEIGHT), '2D Endless Runner (Subway Surfers - style)',
+                                          render_backend, render_scale, render_filter, quality, indexed)
+            self.screen = self.backend.screen
+            self.backend.configure(self.renderer)
+        # spectator screens get the presented frames over TCP (GAME_SPECTATOR_PORT)
+        self.spectator = None if headless else spectator.from_env((SCREEN_WIDTH, SCREEN_HEIGHT), spectator_port)
+        self.input = InputBuffer(RUNNER_KEYS)
+        self.pacer = FramePacer(FPS, idle=self.input.poll)  # mode from GAME_PACING
+        self.clock = self.pacer.clock
+        self.show_frame_stats = False
+        self.profiler = profiler.Profiler('runner')  # F9 or GAME_PROFILE captures a profile
+        self.idle_frame = None  # cached last frame of an idle screen
+        # update can run on its own thread at a fixed rate (GAME_SIM_THREAD)
+        self.threaded = simthread.enabled(threaded)
+        self.sim = None
+        self.sim_renderer = Renderer()
+        if self.backend is not None:
+            self.backend.configure(self.sim_renderer)
+
+        # spawns come from a seeded stream so a run can be replayed (GAME_SEED)
+        self.seed = determinism.choose_seed(seed)
+        self.rng = determinism.make_streams(self.seed)[0]
+        self.state_hash = 0
+        # a fixed course file replaces the random spawner (GAME_COURSE); the
+        # spawns of the last run can be written out as one (GAME_COURSE_RECORD)
+        self.course = course.from_env(course_path)
+        self.course_cursor = None
+        self.course_record = course.record_path()
+        self.course_log = None
+        # Scores go to $GAME_LEADERBOARD_URL, if set, without blocking the loop
+        self.leaderboard = None if headless else leaderboard.from_env()
+
+        # Player, and the other racers' players drawn behind it (lockstep.py)
         self.player = Player()
+        self.rivals = []
+        self.gameover_prompt = 'Press ENTER or R to retry'
 
         # Groups
         self.obstacles = []
@@ -236,6 +409,14 @@ class EndlessRunnerGame:
         self.state = 'menu'  # 'menu', 'playing', 'gameover'
         self.best_score = 0
 
+    @property
+    def font(self):
+        return get_font(28)
+
+    @property
+    def big_font(self):
+        return get_font(56)
+
     def reset(self):
         self.player = Player()
         self.obstacles = []
@@ -244,57 +425,124 @@ class EndlessRunnerGame:
         self.spawn_timer = 0.0
         self.distance = 0.0
         self.state = 'playing'
+        if self.course is not None:
+            self.course_cursor = course.CourseCursor(self.course)
+        if self.course_record:
+            self.course_log = []
+
+    def snapshot(self):
+        """Binary save state of the whole run, including the RNG"""
+        return snapshot_runner(self)
+
+    def restore(self, data):
+        """Load a snapshot() blob"""
+        restore_runner(self, data)
+        if self.course_cursor is not None:
+            # the last update spawned everything within reach of this distance
+            self.course_cursor.seek(self.distance + COURSE_SPAWN_AHEAD)
+        self.idle_frame = None
 
     def spawn_obstacle_or_coin(self):
         # Randomly spawn either an obstacle or a sequence of coins
-        lane = random.randint(0, LANE_COUNT - 1)
-        spawn_x = SCREEN_WIDTH + 60 + random.randint(0, 200)
+        rng = self.rng
+        lane = rng.randint(0, LANE_COUNT - 1)
+        spawn_x = SCREEN_WIDTH + 60 + rng.randint(0, 200)
 
-        r = random.random()
+        r = rng.random()
         if r < 0.55:
             # obstacle
-            kind = 'low' if random.random() < 0.6 else 'high'
+            kind = 'low' if rng.random() < 0.6 else 'high'
             obs = Obstacle(lane, spawn_x, kind)
             self.obstacles.append(obs)
+            self.log_spawn(spawn_x, lane, kind)
             # sometimes place a coin above a low obstacle
-            if kind == 'low' and random.random() < 0.4:
+            if kind == 'low' and rng.random() < 0.4:
                 c = Coin(lane, spawn_x, y_offset=-60)
                 self.coins.append(c)
+                self.log_spawn(spawn_x, lane, 'coin', -60)
         else:
             # coin line or arc - spawn 1-4 coins in this lane
-            count = random.randint(1, 4)
+            count = rng.randint(1, 4)
             for i in range(count):
                 cx = spawn_x + i * 50
                 # half the time put in air
-                y_off = -40 if random.random() < 0.6 else -10
+                y_off = -40 if rng.random() < 0.6 else -10
                 c = Coin(lane, cx, y_offset=y_off)
                 self.coins.append(c)
+                self.log_spawn(cx, lane, 'coin', y_off)
+
+    def log_spawn(self, x, lane, kind, y_offset=0):
+        # course entry for a random spawn, when recording one
+        if self.course_log is not None:
+            self.course_log.append((self.distance + x, lane, course.KINDS.index(kind), y_offset))
+
+    def spawn_random(self, dt):
+        self.spawn_timer += dt
+        if self.spawn_timer >= SPAWN_INTERVAL:
+            self.spawn_timer = 0.0
+            # small random offset to spacing
+            if self.rng.random() < 0.9:
+                self.spawn_obstacle_or_coin()
+
+    def spawn_from_course(self):
+        # everything on the course within reach of the run, placed relative to it
+        for distance, lane, kind, y_offset in self.course_cursor.take(self.distance + COURSE_SPAWN_AHEAD):
+            x = int(distance - self.distance)
+            if kind == course.COIN:
+                self.coins.append(Coin(lane, x, y_offset=y_offset))
+            else:
+                self.obstacles.append(Obstacle(lane, x, course.KINDS[kind]))
 
     def handle_input(self):
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            elif event.type == pygame.KEYDOWN:
-                if self.state == 'menu':
-                    if event.key == pygame.K_RETURN:
-                        self.reset()
-                elif self.state == 'playing':
-                    if event.key in (pygame.K_LEFT, pygame.K_a):
-                        self.player.move_left()
-                    elif event.key in (pygame.K_RIGHT, pygame.K_d):
-                        self.player.move_right()
-                    elif event.key in (pygame.K_UP, pygame.K_w, pygame.K_SPACE):
-                        self.player.jump()
-                    elif event.key in (pygame.K_DOWN, pygame.K_s):
-                        self.player.start_slide()
-                elif self.state == 'gameover':
-                    if event.key == pygame.K_RETURN or event.key == pygame.K_r:
-                        self.reset()
-            elif event.type == pygame.KEYUP:
-                if self.state == 'playing':
-                    if event.key in (pygame.K_DOWN, pygame.K_s):
+        self.input.poll()
+        self.input.begin_frame()
+        if self.input.quit_requested:
+            self.profiler.stop()
+            self.input.report_if_requested()
+            self.pacer.report_if_requested()
+            if self.sim is not None:
+                self.sim.report_if_requested()
+            self.backend.postfx.report_if_requested()
+            if self.spectator is not None:
+                self.spectator.close()
+                self.spectator.report_if_requested()
+            if self.course_log:
+                count = course.write_course(self.course_record, self.course_log, self.seed)
+                print(f'course: {count} entries -> {self.course_record}')
+            if self.leaderboard is not None:
+                self.leaderboard.close()
+                self.leaderboard.report_if_requested()
+            pygame.quit()
+            sys.exit()
+        state = self.state
+        # Every press since the last frame, in order: two quick taps move two lanes
+        for action, down in self.input.events():
+            if down and action == STATS:
+                self.show_frame_stats = not self.show_frame_stats
+            elif down and action == PROFILE:
+                self.profiler.start()
+            elif down and action == PAUSE and self.state in ('playing', 'paused'):
+                self.state = 'paused' if self.state == 'playing' else 'playing'
+            elif self.state == 'menu':
+                if down and action == CONFIRM:
+                    self.reset()
+            elif self.state == 'playing':
+                if not down:
+                    if action == DOWN:
                         self.player.stop_slide()
+                elif action == LEFT:
+                    self.player.move_left()
+                elif action == RIGHT:
+                    self.player.move_right()
+                elif action == JUMP:
+                    self.player.jump()
+                elif action == DOWN:
+                    self.player.start_slide()
+            elif self.state == 'gameover':
+                if down and (action == CONFIRM or action == RETRY):
+                    self.reset()
+        if self.state != state:
+            self.idle_frame = None
 
     def update(self, dt):
         if self.state != 'playing':
@@ -304,12 +552,8 @@ class EndlessRunnerGame:
         self.scroll_speed += SPEED_INCREASE_RATE * dt
 
         # spawn logic
-        self.spawn_timer += dt
-        if self.spawn_timer >= SPAWN_INTERVAL:
-            self.spawn_timer = 0.0
-            # small random offset to spacing
-            if random.random() < 0.9:
-                self.spawn_obstacle_or_coin()
+        if self.course is None:
+            self.spawn_random(dt)
 
         # update player
         self.player.update(dt)
@@ -355,82 +599,182 @@ class EndlessRunnerGame:
         # distance and score accrual
         self.distance += self.scroll_speed * dt
         self.player.score += int(self.scroll_speed * dt * DISTANCE_SCORE_RATE)
+        if self.course is not None:
+            # after moving, so a restored snapshot knows what has spawned from distance alone
+            self.spawn_from_course()
 
-    def draw_ground_and_lanes(self, surf):
-        # simple ground
-        pygame.draw.rect(surf, (80, 50, 20), (0, GROUND_Y, SCREEN_WIDTH, SCREEN_HEIGHT - GROUND_Y))
-        # lane separators for visual guidance
-        for i in range(LANE_COUNT):
-            x = int(LANE_X[i])
-            pygame.draw.line(surf, (220, 220, 220), (x, GROUND_Y - 220), (x, GROUND_Y), 2)
+        # running hash of the gameplay state, compared across builds by determinism.py
+        self.state_hash = determinism.chain(runner_state(self), self.state_hash)
 
-    def draw(self):
-        self.screen.fill(BG_COLOR)
+    def draw_ground_and_lanes(self, surf):
+        size = (SCREEN_WIDTH, SCREEN_HEIGHT - GROUND_Y + LANE_LINE_HEIGHT)
+        surf.blit(get_sprite('runner_ground', size, paint_ground_and_lanes), (0, GROUND_Y - LANE_LINE_HEIGHT))
 
+    def capture(self, renderer, tick=0, freeze=False):
+        # world draw commands plus HUD values: everything draw_scene needs from this tick
         if self.state == 'menu':
-            title = self.big_font.render('ENDLESS RUNNER', True, (30, 30, 30))
-            sub = self.font.render('Three lanes • Left/Right to change • Jump and Slide', True, FONT_COLOR)
-            inst = self.font.render('Press ENTER to start', True, FONT_COLOR)
+            return Snapshot(tick, self.state, (), None)
+        self.draw_ground_and_lanes(renderer.layer(LAYER_BACKGROUND))
+
+        # draw coins
+        layer = renderer.layer(LAYER_ITEMS)
+        for coin in self.coins:
+            coin.draw(layer)
+
+        # draw obstacles
+        layer = renderer.layer(LAYER_ENEMIES)
+        for obs in self.obstacles:
+            obs.draw(layer)
+
+        # draw rivals, then the player on top
+        layer = renderer.layer(LAYER_PLAYER)
+        for rival in self.rivals:
+            rival.draw(layer)
+        self.player.draw(layer)
+        hud = (self.player.score, int(self.distance), int(self.scroll_speed))
+        return Snapshot(tick, self.state, renderer.take(freeze), hud)
+
+    def draw(self, snapshot=None):
+        state = self.state if snapshot is None else snapshot.state
+        if self.idle_frame is not None:
+            self.screen.blit(self.idle_frame, (0, 0))
+        else:
+            self.draw_scene(snapshot)
+            if state in IDLE_STATES:
+                self.idle_frame = self.screen.copy()
+        self.draw_frame_stats()
+        if self.spectator is not None:
+            self.spectator.publish(self.backend)
+        self.profiler.phase = profiler.FLIP
+        self.backend.present()
+
+    def draw_scene(self, snapshot=None):
+        scratch.begin_frame()
+        if snapshot is None:
+            snapshot = self.capture(self.renderer)
+
+        if snapshot.state == 'menu':
+            self.screen.fill(BG_COLOR)
+            title = self.backend.text(self.big_font, 'ENDLESS RUNNER', True, (30, 30, 30))
+            sub = self.backend.text(self.font, 'Three lanes • Left/Right to change • Jump and Slide', True, FONT_COLOR)
+            inst = self.backend.text(self.font, 'Press ENTER to start', True, FONT_COLOR)
             self.screen.blit(title, title.get_rect(center=(SCREEN_WIDTH//2, 200)))
             self.screen.blit(sub, sub.get_rect(center=(SCREEN_WIDTH//2, 260)))
             self.screen.blit(inst, inst.get_rect(center=(SCREEN_WIDTH//2, 320)))
             # quick control hint
-            hint = self.font.render('Arrows / WASD • Jump: up/space • Slide: down', True, FONT_COLOR)
+            hint = self.backend.text(self.font, 'Arrows / WASD • Jump: up/space • Slide: down • Pause: P', True, FONT_COLOR)
             self.screen.blit(hint, hint.get_rect(center=(SCREEN_WIDTH//2, 360)))
             if self.best_score > 0:
-                best = self.font.render(f'Best: {self.best_score}', True, FONT_COLOR)
+                best = self.backend.text(self.font, f'Best: {self.best_score}', True, FONT_COLOR)
                 self.screen.blit(best, best.get_rect(center=(SCREEN_WIDTH//2, 400)))
-            pygame.display.flip()
             return
 
-        # playing or gameover: draw world
-        self.draw_ground_and_lanes(self.screen)
-
-        # draw coins
-        for coin in self.coins:
-            coin.draw(self.screen)
-
-        # draw obstacles
-        for obs in self.obstacles:
-            obs.draw(self.screen)
-
-        # draw player
-        self.player.draw(self.screen)
+        # playing, paused or gameover: draw world (batched per layer by the renderer)
+        self.backend.draw_world(self.renderer, snapshot.layers, BG_COLOR)
 
-        # HUD
-        score_surf = self.font.render(f'Score: {self.player.score}', True, FONT_COLOR)
-        dist_surf = self.font.render(f'Distance: {int(self.distance)}', True, FONT_COLOR)
-        speed_surf = self.font.render(f'Speed: {int(self.scroll_speed)}', True, FONT_COLOR)
+        # HUD (native resolution)
+        score, distance, speed = snapshot.hud
+        score_surf = self.backend.text(self.font, f'Score: {score}', True, FONT_COLOR)
+        dist_surf = self.backend.text(self.font, f'Distance: {distance}', True, FONT_COLOR)
+        speed_surf = self.backend.text(self.font, f'Speed: {speed}', True, FONT_COLOR)
         self.screen.blit(score_surf, (12, 12))
         self.screen.blit(dist_surf, (12, 36))
         self.screen.blit(speed_surf, (12, 60))
 
-        if self.state == 'gameover':
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-            overlay.set_alpha(180)
-            overlay.fill((0,0,0))
-            self.screen.blit(overlay, (0,0))
-            go = self.big_font.render('GAME OVER', True, (255, 80, 80))
-            score = self.font.render(f'Score: {self.player.score}', True, (255,255,255))
-            retry = self.font.render('Press ENTER or R to retry', True, (255,255,255))
+        if snapshot.state == 'gameover':
+            self.backend.dim(180)
+            go = self.backend.text(self.big_font, 'GAME OVER', True, (255, 80, 80))
+            score = self.backend.text(self.font, f'Score: {score}', True, (255,255,255))
+            retry = self.backend.text(self.font, self.gameover_prompt, True, (255,255,255))
             self.screen.blit(go, go.get_rect(center=(SCREEN_WIDTH//2, 220)))
             self.screen.blit(score, score.get_rect(center=(SCREEN_WIDTH//2, 300)))
             self.screen.blit(retry, retry.get_rect(center=(SCREEN_WIDTH//2, 360)))
-
-        pygame.display.flip()
+        elif snapshot.state == 'paused':
+            self.backend.dim(180)
+            paused = self.backend.text(self.big_font, 'PAUSED', True, (255, 255, 255))
+            resume = self.backend.text(self.font, 'Press P to resume', True, (255,255,255))
+            self.screen.blit(paused, paused.get_rect(center=(SCREEN_WIDTH//2, 260)))
+            self.screen.blit(resume, resume.get_rect(center=(SCREEN_WIDTH//2, 330)))
+
+    def draw_frame_stats(self):
+        # frame pacing overlay, toggled with F3
+        if not self.show_frame_stats:
+            return
+        text = self.backend.text(self.font, self.pacer.overlay_text(), True, (255, 255, 255), (0, 0, 0))
+        self.screen.blit(text, (SCREEN_WIDTH - text.get_width() - 5, SCREEN_HEIGHT - text.get_height() - 5))
 
     def run(self):
+        self.profiler.start_if_requested()
+        if self.threaded:
+            return self.run_threaded()
         # Main loop
         while True:
-            dt = self.clock.tick(FPS) / 1000.0
+            self.profiler.phase = profiler.WAIT
+            if self.idle_frame is not None:
+                # idle screen already on display: sleep until a key arrives
+                self.input.wait()
+                self.pacer.resume()
+            dt = self.pacer.wait() / 1000.0
+            self.profiler.phase = profiler.INPUT
             self.handle_input()
+            was_playing = self.state == 'playing'
+            self.profiler.phase = profiler.UPDATE
             self.update(dt)
+            if was_playing and self.state == 'gameover' and self.leaderboard is not None:
+                self.leaderboard.submit('runner', self.player.score, seed=self.seed)
+            self.profiler.phase = profiler.DRAW
             self.draw()
+            self.input.presented()
+            startup.frame_presented()
 
             # When switching to gameover, capture best score
             if self.state == 'gameover':
                 self.best_score = max(self.best_score, self.player.score)
 
+    def run_threaded(self):
+        # update runs at a fixed FPS on the simulation thread (simthread.py);
+        # this thread handles input and draws the newest snapshot
+        self.sim = sim = SimulationThread(self.sim_step, self.sim_capture, FPS)
+        sim.start(self.state == 'playing')
+        self.profiler.watch(sim.thread)
+        while True:
+            self.profiler.phase = profiler.WAIT
+            if self.idle_frame is not None:
+                self.input.wait()
+                self.pacer.resume()
+            self.pacer.wait()
+            # input moves the player, so it waits for the current tick to finish
+            self.profiler.phase = profiler.INPUT
+            with sim.lock:
+                state = self.state
+                self.handle_input()
+                if self.state != state:
+                    sim.republish()
+                    if self.state == 'playing':
+                        sim.resume()
+                snapshot = sim.latest()
+            if snapshot.state == 'playing':
+                sim.presented(snapshot)
+            self.profiler.phase = profiler.DRAW
+            self.draw(snapshot)
+            self.input.presented()
+            startup.frame_presented()
+
+    def sim_step(self):
+        # one fixed tick on the simulation thread (lock held)
+        if self.state != 'playing':
+            return False
+        self.update(1.0 / FPS)
+        if self.state == 'gameover':
+            self.best_score = max(self.best_score, self.player.score)
+            if self.leaderboard is not None:
+                self.leaderboard.submit('runner', self.player.score, seed=self.seed)
+        return self.state == 'playing'
+
+    def sim_capture(self, tick):
+        scratch.begin_frame()
+        return self.capture(self.sim_renderer, tick, freeze=True)
+
 
 # ------------- Explanations (in-code for learners) -------------
 # Why lanes? -> Subway Surfers uses three lanes to give the player discrete left/right choices.
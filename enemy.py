@@ -3,62 +3,96 @@ Enemy class - moves back and forth on platforms
 """
 import pygame
 from constants import *
+from timestep import STEP
+from assets import get_sprite
 
 
-class Enemy(pygame.sprite.Sprite):
+class Enemy:
+    __slots__ = ("rect", "sub_x", "platform_left", "platform_right", "vel_x")
+    
     def __init__(self, x, y, platform_left, platform_right):
-        super().__init__()
-        self.image = pygame.Surface((ENEMY_WIDTH, ENEMY_HEIGHT))
-        self.image.fill(ENEMY_COLOR)
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
+        self.rect = pygame.Rect(x, y, ENEMY_WIDTH, ENEMY_HEIGHT)
+        self.sub_x = 0.0  # Position past the whole pixels in rect
         
         # Movement boundaries (patrol area)
         self.platform_left = platform_left
         self.platform_right = platform_right
         self.vel_x = ENEMY_SPEED
         
-    def update(self):
-        # Move enemy
-        self.rect.x += self.vel_x
+    def update(self, dt=STEP):
+        # Move enemy, turning back at the boundaries
+        self.advance(dt)
+            
+    def advance(self, seconds):
+        """Patrol for seconds, in closed form
         
-        # Reverse direction at boundaries
-        if self.rect.right >= self.platform_right or self.rect.left <= self.platform_left:
-            self.vel_x = -self.vel_x
+        Bouncing between the boundaries is a straight run folded back on
+        itself at each end, so any stretch of time is one step and the
+        patrol is the same however it is sliced into updates.
+        """
+        left = self.platform_left
+        span = self.platform_right - self.rect.width - left
+        if span <= 0:
+            return
+        speed = abs(self.vel_x)
+        x = self.rect.x + self.sub_x - left
+        # Distance along the unfolded run: out along [0, span], back along [span, 2 * span]
+        run = x if self.vel_x > 0 else 2 * span - x
+        run = (run + speed * seconds) % (2 * span)
+        if run <= span:
+            x = run
+            self.vel_x = speed
+        else:
+            x = 2 * span - run
+            self.vel_x = -speed
+        # To a millionth of a pixel: float noise never decides which way a half rounds
+        x = round(x + left, 6)
+        self.rect.x = x
+        self.sub_x = x - self.rect.x
+            
+    def world_bounds(self):
+        """Whole patrol area, so the spatial index never needs updating"""
+        return pygame.Rect(self.platform_left, self.rect.y,
+                           self.platform_right - self.platform_left, self.rect.height)
             
     def draw(self, screen):
         """Draw enemy with enhanced visuals"""
-        # Main body with border
-        pygame.draw.rect(screen, ENEMY_COLOR, self.rect)
-        pygame.draw.rect(screen, (0, 150, 0), self.rect, 3)  # Darker border
-        
-        # Draw angry eyes
-        eye_size = 5
-        eye_white_size = 7
-        # Left eye
-        pygame.draw.circle(screen, WHITE, (self.rect.left + 12, self.rect.top + 12), eye_white_size)
-        pygame.draw.circle(screen, BLACK, (self.rect.left + 12, self.rect.top + 12), eye_size)
-        # Right eye  
-        pygame.draw.circle(screen, WHITE, (self.rect.right - 12, self.rect.top + 12), eye_white_size)
-        pygame.draw.circle(screen, BLACK, (self.rect.right - 12, self.rect.top + 12), eye_size)
-        
-        # Draw angry eyebrows
-        pygame.draw.line(screen, BLACK, (self.rect.left + 6, self.rect.top + 6),
-                        (self.rect.left + 18, self.rect.top + 8), 3)
-        pygame.draw.line(screen, BLACK, (self.rect.right - 18, self.rect.top + 8),
-                        (self.rect.right - 6, self.rect.top + 6), 3)
-        
-        # Draw zigzag mouth
-        mouth_y = self.rect.bottom - 12
-        points = [
-            (self.rect.left + 8, mouth_y),
-            (self.rect.centerx - 6, mouth_y + 5),
-            (self.rect.centerx, mouth_y),
-            (self.rect.centerx + 6, mouth_y + 5),
-            (self.rect.right - 8, mouth_y)
-        ]
-        pygame.draw.lines(screen, BLACK, False, points, 3)
+        screen.blit(get_sprite("enemy", (ENEMY_WIDTH, ENEMY_HEIGHT), paint_enemy), self.rect)
+
+
+def paint_enemy(surf):
+    """Paint the enemy sprite (baked once by the asset cache)"""
+    rect = surf.get_rect()
+    # Main body with border
+    pygame.draw.rect(surf, ENEMY_COLOR, rect)
+    pygame.draw.rect(surf, (0, 150, 0), rect, 3)  # Darker border
+
+    # Draw angry eyes
+    eye_size = 5
+    eye_white_size = 7
+    # Left eye
+    pygame.draw.circle(surf, WHITE, (rect.left + 12, rect.top + 12), eye_white_size)
+    pygame.draw.circle(surf, BLACK, (rect.left + 12, rect.top + 12), eye_size)
+    # Right eye
+    pygame.draw.circle(surf, WHITE, (rect.right - 12, rect.top + 12), eye_white_size)
+    pygame.draw.circle(surf, BLACK, (rect.right - 12, rect.top + 12), eye_size)
+
+    # Draw angry eyebrows
+    pygame.draw.line(surf, BLACK, (rect.left + 6, rect.top + 6),
+                     (rect.left + 18, rect.top + 8), 3)
+    pygame.draw.line(surf, BLACK, (rect.right - 18, rect.top + 8),
+                     (rect.right - 6, rect.top + 6), 3)
+
+    # Draw zigzag mouth
+    mouth_y = rect.bottom - 12
+    points = [
+        (rect.left + 8, mouth_y),
+        (rect.centerx - 6, mouth_y + 5),
+        (rect.centerx, mouth_y),
+        (rect.centerx + 6, mouth_y + 5),
+        (rect.right - 8, mouth_y)
+    ]
+    pygame.draw.lines(surf, BLACK, False, points, 3)
 
 
 def create_enemies_level_1():
@@ -0,0 +1,246 @@
+"""
+Buffered input shared by both games
+
+Key events are read from SDL once (or more) per frame, mapped to actions,
+timestamped and stored in a fixed-size ring. Each frame then sees every
+press and release that arrived since the previous frame, in order, so a
+tap shorter than a frame is never lost: pressed() stays true for the frame
+even if the key is already up again.
+
+The timestamps also give input latency. When a frame starts consuming an
+event the time since it was read is recorded as "apply" latency, and once
+the frame showing its effect has been flipped, as "present" latency. SDL
+does not expose when the OS delivered an event, so the clock starts when
+poll() reads it; calling poll() more often (e.g. while waiting for the next
+frame) makes the numbers tighter.
+
+Set GAME_INPUT_LATENCY=1 to print the percentiles when a game quits.
+"""
+import os
+import time
+from collections import deque
+
+import pygame
+
+from controls import LEFT, RIGHT, JUMP, DASH, Controls
+
+# Actions beyond the four Controls bits
+DOWN = 16
+CONFIRM = 32
+BACK = 64
+RETRY = 128
+STATS = 256
+PAUSE = 512
+
+# Split screen: the second player's Controls bits sit this far up
+PLAYER_SHIFT = 10
+CONTROL_BITS = LEFT | RIGHT | JUMP | DASH
+
+PROFILE = 1 << 14   # above the second player's Controls bits
+
+RING_SIZE = 256
+LATENCY_WINDOW = 4096
+LATENCY_ENV = "GAME_INPUT_LATENCY"
+
+PLATFORMER_KEYS = {
+    pygame.K_LEFT: LEFT, pygame.K_a: LEFT,
+    pygame.K_RIGHT: RIGHT, pygame.K_d: RIGHT,
+    pygame.K_SPACE: JUMP, pygame.K_UP: JUMP, pygame.K_w: JUMP,
+    pygame.K_LSHIFT: DASH, pygame.K_RSHIFT: DASH,
+    pygame.K_RETURN: CONFIRM,
+    pygame.K_ESCAPE: BACK,
+    pygame.K_F3: STATS,
+    pygame.K_F9: PROFILE,
+    pygame.K_p: PAUSE,
+}
+
+# Two players on one keyboard: WASD and left shift, arrows and right shift
+SPLIT_SCREEN_KEYS = {
+    pygame.K_a: LEFT, pygame.K_d: RIGHT, pygame.K_w: JUMP, pygame.K_LSHIFT: DASH,
+    pygame.K_LEFT: LEFT << PLAYER_SHIFT, pygame.K_RIGHT: RIGHT << PLAYER_SHIFT,
+    pygame.K_UP: JUMP << PLAYER_SHIFT, pygame.K_RSHIFT: DASH << PLAYER_SHIFT,
+    pygame.K_RETURN: CONFIRM,
+    pygame.K_ESCAPE: BACK,
+    pygame.K_F3: STATS,
+    pygame.K_F9: PROFILE,
+    pygame.K_p: PAUSE,
+}
+
+RUNNER_KEYS = {
+    pygame.K_LEFT: LEFT, pygame.K_a: LEFT,
+    pygame.K_RIGHT: RIGHT, pygame.K_d: RIGHT,
+    pygame.K_UP: JUMP, pygame.K_w: JUMP, pygame.K_SPACE: JUMP,
+    pygame.K_DOWN: DOWN, pygame.K_s: DOWN,
+    pygame.K_RETURN: CONFIRM,
+    pygame.K_r: RETRY,
+    pygame.K_F3: STATS,
+    pygame.K_F9: PROFILE,
+    pygame.K_p: PAUSE,
+}
+
+
+class InputEvent:
+    """One slot of the ring; slots are reused, never reallocated"""
+    __slots__ = ("time", "action", "down")
+
+    def __init__(self):
+        self.time = 0.0
+        self.action = 0
+        self.down = False
+
+
+class LatencyStats:
+    """Rolling apply/present latency samples in seconds"""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.apply = deque(maxlen=window)
+        self.present = deque(maxlen=window)
+
+    @staticmethod
+    def percentiles(samples, points=(50, 95, 99)):
+        ordered = sorted(samples)
+        if not ordered:
+            return {p: 0.0 for p in points}
+        last = len(ordered) - 1
+        return {p: ordered[min(last, len(ordered) * p // 100)] * 1000 for p in points}
+
+    def summary(self):
+        apply = self.percentiles(self.apply)
+        present = self.percentiles(self.present)
+        return {
+            "samples": len(self.present),
+            "apply_ms_p50": apply[50], "apply_ms_p95": apply[95], "apply_ms_p99": apply[99],
+            "present_ms_p50": present[50], "present_ms_p95": present[95], "present_ms_p99": present[99],
+        }
+
+    def report(self):
+        s = self.summary()
+        return (f"input latency over {s['samples']} presses: "
+                f"apply p50 {s['apply_ms_p50']:.1f} / p95 {s['apply_ms_p95']:.1f} / p99 {s['apply_ms_p99']:.1f} ms, "
+                f"present p50 {s['present_ms_p50']:.1f} / p95 {s['present_ms_p95']:.1f} / p99 {s['present_ms_p99']:.1f} ms")
+
+
+class InputBuffer:
+    def __init__(self, keymap, size=RING_SIZE):
+        self.keymap = keymap
+        self.ring = [InputEvent() for _ in range(size)]
+        self.size = size
+        self.written = 0          # total events ever written
+        self.frame_start = 0      # first event of the current frame
+        self.frame_end = 0
+        self.overflows = 0
+        self.keys_down = {}       # key -> action, to tell which actions are held
+        self.held_bits = 0
+        self.pressed_bits = 0
+        self.released_bits = 0
+        self.quit_requested = False
+        self.latency = LatencyStats()
+        self.unpresented = []     # press times applied but not yet on screen
+
+    # ------------- Reading SDL -------------
+    def poll(self):
+        """Move waiting key events from SDL into the ring"""
+        now = time.perf_counter()
+        for event in pygame.event.get():
+            self.handle(event, now)
+
+    def wait(self, timeout=0):
+        """Sleep until SDL has an event (or timeout ms pass), then poll
+
+        Used by screens that do not change on their own, so an idle game
+        costs no CPU. Returns False if the wait timed out.
+        """
+        event = pygame.event.wait(timeout) if timeout else pygame.event.wait()
+        if event.type == pygame.NOEVENT:
+            return False
+        self.handle(event, time.perf_counter())
+        self.poll()
+        return True
+
+    def handle(self, event, now):
+        if event.type == pygame.KEYDOWN or event.type == pygame.KEYUP:
+            action = self.keymap.get(event.key)
+            if action is not None:
+                self.push(now, action, event.type == pygame.KEYDOWN, event.key)
+        elif event.type == pygame.QUIT:
+            self.quit_requested = True
+        elif event.type == pygame.WINDOWFOCUSLOST:
+            # Key-ups go to whichever window has focus now; don't leave keys stuck
+            for key, action in list(self.keys_down.items()):
+                self.push(now, action, False, key)
+
+    def push(self, now, action, down, key=None):
+        if down:
+            if key in self.keys_down:
+                return  # key repeat
+            self.keys_down[key] = action
+        elif self.keys_down.pop(key, None) is None:
+            return  # released a key pressed before we started listening
+        if self.written - self.frame_end >= self.size:
+            self.overflows += 1
+        slot = self.ring[self.written % self.size]
+        slot.time = now
+        slot.action = action
+        slot.down = down
+        self.written += 1
+
+    # ------------- Per frame -------------
+    def begin_frame(self):
+        """Hand everything read since the last frame to this frame"""
+        now = time.perf_counter()
+        start = max(self.frame_end, self.written - self.size)
+        self.frame_start = start
+        self.frame_end = self.written
+        pressed = released = 0
+        apply = self.latency.apply
+        for i in range(start, self.written):
+            slot = self.ring[i % self.size]
+            if slot.down:
+                pressed |= slot.action
+                apply.append(now - slot.time)
+                self.unpresented.append(slot.time)
+            else:
+                released |= slot.action
+        self.pressed_bits = pressed
+        self.released_bits = released
+        held = 0
+        for action in self.keys_down.values():
+            held |= action
+        self.held_bits = held
+
+    def presented(self):
+        """Call right after the flip that shows this frame"""
+        if self.unpresented:
+            now = time.perf_counter()
+            present = self.latency.present
+            for pressed_at in self.unpresented:
+                present.append(now - pressed_at)
+            self.unpresented.clear()
+
+    def events(self):
+        """(action, down) for this frame's events in the order they happened"""
+        ring = self.ring
+        size = self.size
+        return [(ring[i % size].action, ring[i % size].down) for i in range(self.frame_start, self.frame_end)]
+
+    def pressed(self, action):
+        """Edge-triggered: the action went down during the last frame"""
+        return bool(self.pressed_bits & action)
+
+    def released(self, action):
+        return bool(self.released_bits & action)
+
+    def held(self, action):
+        return bool(self.held_bits & action)
+
+    def control_bits(self):
+        """Held or tapped action bits; player n's Controls bits are shifted up n * PLAYER_SHIFT"""
+        return self.held_bits | self.pressed_bits
+
+    def controls(self, player=0):
+        """Platformer Controls; a tap counts as held for the frame it happened in"""
+        return Controls.from_bits(self.control_bits() >> (player * PLAYER_SHIFT) & CONTROL_BITS)
+
+    def report_if_requested(self):
+        if os.environ.get(LATENCY_ENV):
+            print(self.latency.report(), flush=True)
@@ -0,0 +1,277 @@
+"""
+Leaderboard client that never blocks the game loop
+
+submit() only hands the entry to an asyncio loop running on a worker
+thread (call_soon_threadsafe) and returns. The worker batches entries,
+POSTs them as JSON over one kept-alive HTTP/1.1 connection, and retries
+with exponential backoff when the server is slow, down or erroring.
+Every entry is appended to a small JSON-lines spool file as soon as the
+worker queues it, and the spool is rewritten to what is still unacknowledged
+after each batch, so a crash, a kill or a network outage at exit loses
+nothing; the next session sends them first.
+
+Each entry carries a unique id, so a batch resent after a lost response
+is not counted twice by the server.
+
+Set GAME_LEADERBOARD_URL (e.g. http://127.0.0.1:8765) to enable it in the
+games; leaderboard_server.py is a local stand-in server for testing.
+GAME_FRAME_STATS=1 prints what was sent, retried and left spooled on exit.
+"""
+import asyncio
+import getpass
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from urllib.parse import urlsplit
+
+from pacing import STATS_ENV
+
+URL_ENV = "GAME_LEADERBOARD_URL"
+SPOOL_ENV = "GAME_LEADERBOARD_SPOOL"
+NAME_ENV = "GAME_PLAYER_NAME"
+DEFAULT_SPOOL = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".leaderboard_spool.jsonl")
+
+BATCH_SIZE = 32
+BATCH_WINDOW = 0.25         # seconds to wait for more entries before sending
+MAX_PENDING = 500           # beyond this the oldest unsent entries are dropped
+REQUEST_TIMEOUT = 5.0
+BACKOFF_MIN = 0.5
+BACKOFF_MAX = 30.0
+DELAYED_AFTER = 5.0         # an entry acknowledged later than this counts as delayed
+CLOSE_TIMEOUT = 2.0
+
+
+class LeaderboardError(Exception):
+    pass
+
+
+class LeaderboardClient:
+    def __init__(self, url, spool_path=DEFAULT_SPOOL):
+        parts = urlsplit(url)
+        if parts.scheme != "http" or not parts.hostname:
+            raise ValueError(f"leaderboard URL must be http://host[:port], got {url!r}")
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.path = (parts.path.rstrip("/") or "") + "/scores"
+        self.spool_path = spool_path
+
+        self.pending = deque()      # entries not yet acknowledged (worker thread only)
+        self.submitted_at = {}      # entry id -> monotonic submit time
+        self.stats = {"submitted": 0, "sent": 0, "batches": 0, "retries": 0, "dropped": 0,
+                      "rejected": 0, "delayed": 0, "from_spool": 0, "connections": 0,
+                      "max_delay": 0.0}
+        self.delays = deque(maxlen=1024)
+        self.reader = None
+        self.writer = None
+        self.closing = False
+
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self._thread_main, name="leaderboard", daemon=True)
+        self.thread.start()
+        self.ready.wait()
+
+    # ------------- Game thread -------------
+    def submit(self, game, score, name=None, **extra):
+        """Queue a result; returns immediately"""
+        entry = {"id": uuid.uuid4().hex, "game": game, "score": int(score),
+                 "name": name or os.environ.get(NAME_ENV) or getpass.getuser(),
+                 "time": time.time()}
+        entry.update(extra)
+        self.loop.call_soon_threadsafe(self._enqueue, entry, time.monotonic())
+
+    def close(self, timeout=CLOSE_TIMEOUT):
+        """Try to send what is left for up to timeout seconds; the rest stays spooled"""
+        if self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self._begin_close)
+        self.thread.join(timeout)
+
+    def report(self):
+        s = self.stats
+        delays = sorted(self.delays)
+        p95 = delays[min(len(delays) - 1, len(delays) * 95 // 100)] if delays else 0.0
+        return (f"leaderboard: {s['sent']}/{s['submitted']} sent in {s['batches']} batches, "
+                f"{s['connections']} connections, {len(self.pending)} still spooled, {s['dropped']} dropped, {s['rejected']} rejected, "
+                f"{s['retries']} retries, {s['delayed']} delayed (p95 {p95:.2f} s, max {s['max_delay']:.2f} s)")
+
+    def report_if_requested(self):
+        if os.environ.get(STATS_ENV):
+            print(self.report(), flush=True)
+
+    # ------------- Worker thread -------------
+    def _thread_main(self):
+        asyncio.set_event_loop(self.loop)
+        self.wake = asyncio.Event()
+        self.stop = asyncio.Event()
+        self.ready.set()
+        try:
+            self.loop.run_until_complete(self._run())
+        finally:
+            self.loop.close()
+
+    def _enqueue(self, entry, submitted_at):
+        self.stats["submitted"] += 1
+        self.submitted_at[entry["id"]] = submitted_at
+        self.pending.append(entry)
+        while len(self.pending) > MAX_PENDING:
+            old = self.pending.popleft()
+            self.submitted_at.pop(old["id"], None)
+            self.stats["dropped"] += 1
+        # On disk before anything else happens to it, backoff or not
+        self._append_spool(entry)
+        self.wake.set()
+
+    def _begin_close(self):
+        self.closing = True
+        self.wake.set()
+        self.stop.set()
+
+    async def _run(self):
+        self._load_spool()
+        backoff = BACKOFF_MIN
+        while True:
+            if not self.pending:
+                if self.closing:
+                    break
+                self.wake.clear()
+                await self.wake.wait()
+                if not self.closing:
+                    # Give other results a moment to join the batch
+                    await asyncio.sleep(BATCH_WINDOW)
+                continue
+            batch = [self.pending[i] for i in range(min(BATCH_SIZE, len(self.pending)))]
+            try:
+                status = await self._post(batch)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, LeaderboardError):
+                self._disconnect()
+                status = None
+            if status is not None and status < 500:
+                self._acknowledge(batch, accepted=status < 400)
+                backoff = BACKOFF_MIN
+                self._write_spool()
+                continue
+            # Server down or erroring: keep everything on disk and wait
+            self.stats["retries"] += 1
+            self._write_spool()
+            if self.closing:
+                break
+            # New submissions just join the queue; only close() cuts the wait short
+            try:
+                await asyncio.wait_for(self.stop.wait(), backoff * random.uniform(0.8, 1.2))
+            except asyncio.TimeoutError:
+                pass
+            backoff = min(backoff * 2, BACKOFF_MAX)
+        self._write_spool()
+        self._disconnect()
+
+    def _acknowledge(self, batch, accepted):
+        now = time.monotonic()
+        for _ in batch:
+            entry = self.pending.popleft()
+            submitted_at = self.submitted_at.pop(entry["id"], None)
+            if not accepted:
+                self.stats["rejected"] += 1
+                continue
+            self.stats["sent"] += 1
+            if submitted_at is None:
+                continue  # carried over from an earlier session's spool
+            delay = now - submitted_at
+            self.delays.append(delay)
+            self.stats["max_delay"] = max(self.stats["max_delay"], delay)
+            if delay > DELAYED_AFTER:
+                self.stats["delayed"] += 1
+        self.stats["batches"] += 1
+
+    async def _post(self, batch):
+        """POST one batch on the pooled connection; returns the HTTP status"""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), REQUEST_TIMEOUT)
+            self.stats["connections"] += 1
+        body = json.dumps({"scores": batch}).encode()
+        head = (f"POST {self.path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n")
+        self.writer.write(head.encode() + body)
+        await self.writer.drain()
+        return await asyncio.wait_for(self._read_response(), REQUEST_TIMEOUT)
+
+    async def _read_response(self):
+        status_line = await self.reader.readline()
+        parts = status_line.split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith(b"HTTP/"):
+            raise LeaderboardError(f"bad status line {status_line!r}")
+        status = int(parts[1])
+        length = 0
+        keep_alive = parts[0] == b"HTTP/1.1"
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name = name.strip().lower()
+            if name == "content-length":
+                length = int(value)
+            elif name == "connection":
+                keep_alive = value.strip().lower() != "close"
+        if length:
+            await self.reader.readexactly(length)
+        if not keep_alive:
+            self._disconnect()
+        return status
+
+    def _disconnect(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    # ------------- Spool -------------
+    def _load_spool(self):
+        try:
+            with open(self.spool_path) as f:
+                lines = f.readlines()
+        except OSError:
+            return
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            self.pending.append(entry)
+            self.stats["from_spool"] += 1
+        while len(self.pending) > MAX_PENDING:
+            self.pending.popleft()
+            self.stats["dropped"] += 1
+
+    def _append_spool(self, entry):
+        try:
+            with open(self.spool_path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+        except OSError:
+            pass  # a read-only install just loses the spool
+
+    def _write_spool(self):
+        """Replace the spool with the unacknowledged entries (or remove it)"""
+        try:
+            if not self.pending:
+                if os.path.exists(self.spool_path):
+                    os.remove(self.spool_path)
+                return
+            tmp_path = self.spool_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                f.writelines(json.dumps(entry) + "\n" for entry in self.pending)
+            os.replace(tmp_path, self.spool_path)
+        except OSError:
+            pass  # a read-only install just loses the spool
+
+
+def from_env():
+    """A client if GAME_LEADERBOARD_URL is set, otherwise None"""
+    url = os.environ.get(URL_ENV)
+    if not url:
+        return None
+    return LeaderboardClient(url, os.environ.get(SPOOL_ENV, DEFAULT_SPOOL))
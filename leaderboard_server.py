@@ -0,0 +1,126 @@
+"""
+Local stand-in leaderboard server for testing leaderboard.py
+
+POST /scores takes {"scores": [entry, ...]} and stores every entry whose id
+it has not seen yet (resent batches are acknowledged but not duplicated).
+GET /scores?game=runner&limit=10 returns the best scores. Connections are
+kept alive, as the client expects. --fail-rate and --delay make it answer
+503 or respond slowly, to exercise the client's retries and backoff.
+
+Run: python leaderboard_server.py [--port 8765] [--fail-rate 0.0] [--delay 0.0]
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_PORT = 8765
+MAX_BODY = 1 << 20
+
+
+class ScoreBoard:
+    """In-memory scores, deduplicated by entry id"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = []
+        self.seen = set()
+        self.duplicates = 0
+        self.batches = 0
+
+    def add(self, entries):
+        with self.lock:
+            self.batches += 1
+            for entry in entries:
+                if entry["id"] in self.seen:
+                    self.duplicates += 1
+                    continue
+                self.seen.add(entry["id"])
+                self.entries.append(entry)
+
+    def top(self, game=None, limit=10):
+        with self.lock:
+            entries = [e for e in self.entries if game is None or e["game"] == game]
+        return sorted(entries, key=lambda e: e["score"], reverse=True)[:limit]
+
+
+class ScoreHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive
+
+    def do_POST(self):
+        if urlsplit(self.path).path != "/scores":
+            return self.reply(404, {"error": "not found"})
+        length = int(self.headers.get("Content-Length", 0))
+        if length > MAX_BODY:
+            return self.reply(413, {"error": "batch too large"})
+        body = self.rfile.read(length)
+        server = self.server
+        if server.delay:
+            time.sleep(server.delay)
+        if server.rng.random() < server.fail_rate:
+            return self.reply(503, {"error": "try again later"})
+        try:
+            entries = json.loads(body)["scores"]
+            for entry in entries:
+                entry["id"], entry["game"], int(entry["score"])
+        except (ValueError, KeyError, TypeError):
+            return self.reply(400, {"error": "bad batch"})
+        server.board.add(entries)
+        self.reply(200, {"accepted": len(entries)})
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path != "/scores":
+            return self.reply(404, {"error": "not found"})
+        query = parse_qs(url.query)
+        game = query.get("game", [None])[0]
+        limit = int(query.get("limit", ["10"])[0])
+        self.reply(200, {"scores": self.server.board.top(game, limit)})
+
+    def reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(port=DEFAULT_PORT, fail_rate=0.0, delay=0.0, verbose=False, host="127.0.0.1"):
+    server = ThreadingHTTPServer((host, port), ScoreHandler)
+    server.daemon_threads = True
+    server.board = ScoreBoard()
+    server.fail_rate = fail_rate
+    server.delay = delay
+    server.verbose = verbose
+    server.rng = random.Random()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in leaderboard server")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of POSTs answered with 503")
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before answering a POST")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    server = make_server(args.port, args.fail_rate, args.delay, args.verbose)
+    print(f"leaderboard on http://127.0.0.1:{args.port}/scores")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    board = server.board
+    print(f"{len(board.entries)} scores in {board.batches} batches, {board.duplicates} duplicates ignored")
+
+
+if __name__ == "__main__":
+    main()
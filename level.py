@@ -0,0 +1,58 @@
+"""
+Level assembly - single-screen level 1 or a world many screens wide
+"""
+from constants import *
+from platforms import create_level_1
+from enemy import create_enemies_level_1
+from coin import create_coins_level_1
+from powerup import create_powerups_level_1
+from camera import SpatialGrid
+
+
+class Level:
+    """Everything in one level plus spatial indexes for culling"""
+
+    def __init__(self, platforms, enemies, coins, powerups, width=SCREEN_WIDTH, height=SCREEN_HEIGHT):
+        self.platforms = platforms
+        self.enemies = enemies
+        self.coins = coins
+        self.powerups = powerups
+        self.width = width
+        self.height = height
+        self.build_index()
+
+    def build_index(self):
+        """Bucket every object by the area it can ever occupy"""
+        bounds = lambda obj: obj.world_bounds()
+        self.platform_grid = SpatialGrid.build(self.platforms, bounds)
+        self.enemy_grid = SpatialGrid.build(self.enemies, bounds)
+        self.coin_grid = SpatialGrid.build(self.coins, bounds)
+        self.powerup_grid = SpatialGrid.build(self.powerups, bounds)
+
+
+def create_level(screens=1):
+    """Level 1, repeated side by side for worlds wider than one screen"""
+    screens = max(screens, 1)
+    width = SCREEN_WIDTH * screens
+    platforms = []
+    enemies = []
+    coins = []
+    powerups = []
+    for screen in range(screens):
+        dx = screen * SCREEN_WIDTH
+        # Ground is tiled one screen at a time so every segment shares a sprite
+        for platform in create_level_1():
+            platform.rect.x += dx
+            platforms.append(platform)
+        for enemy in create_enemies_level_1():
+            enemy.rect.x += dx
+            enemy.platform_left += dx
+            enemy.platform_right += dx
+            enemies.append(enemy)
+        for coin in create_coins_level_1():
+            coin.rect.x += dx
+            coins.append(coin)
+        for powerup in create_powerups_level_1():
+            powerup.rect.x += dx
+            powerups.append(powerup)
+    return Level(platforms, enemies, coins, powerups, width)
@@ -0,0 +1,680 @@
+"""
+Lockstep races: endless runners kept in step over UDP
+
+Two or more players race the same EndlessRunnerGame course from separate
+machines. Only inputs cross the network: every peer simulates every
+racer's runner, one world each, from the shared seed at a fixed 1/FPS
+step, and the worlds stay identical because the inputs do. A racer's input
+for a tick is one byte of the bits below.
+
+A tick only runs once every racer's input for it has arrived. Presses are
+scheduled GAME_LOCKSTEP_DELAY ticks ahead (default 4), so normally they
+arrive before they are needed and nobody waits; a longer delay hides more
+latency at the cost of that much lag on your own presses. Each packet
+repeats every input the receiver has not acknowledged yet, up to
+GAME_LOCKSTEP_REDUNDANCY ticks of it (default 16), so a lost packet costs
+nothing as long as a later one gets through.
+
+Every GAME_LOCKSTEP_HASH_INTERVAL ticks (default 60) each peer folds the
+runners' state hashes (determinism.py) into one race hash and sends it
+with its inputs. Two peers with different hashes for the same tick have
+desynced, and the race stops with DesyncError instead of going on in two
+different worlds.
+
+Peer 0 hosts: the seed, input delay, hash interval and race length are
+taken from its HELLO, so the others need only the peer list and their
+index. A racer who quits forfeits from a tick every peer agrees on.
+GAME_FRAME_STATS=1 prints traffic and stalls when the race ends.
+
+Protocol (little-endian): HEADER, then HELLO_BODY while connecting, or
+INPUT_BODY followed by its input count bytes of input bits.
+
+Run: python lockstep.py --peers 127.0.0.1:50030,127.0.0.1:50031 --index 0 [--seed 7]
+     python lockstep.py --peers 127.0.0.1:50030,127.0.0.1:50031 --index 1
+     python benchmarks/lockstep_bench.py    (headless peers on localhost)
+"""
+import argparse
+import os
+import random
+import select
+import socket
+import struct
+import sys
+import time
+
+import pygame
+
+import determinism
+from endless_runner import EndlessRunnerGame, FPS, SCREEN_WIDTH, SCREEN_HEIGHT, FONT_COLOR, LANE_COUNT, LANE_X
+from inputbuffer import LEFT, RIGHT, JUMP, DOWN
+from pacing import STATS_ENV
+
+DELAY_ENV = "GAME_LOCKSTEP_DELAY"
+REDUNDANCY_ENV = "GAME_LOCKSTEP_REDUNDANCY"
+HASH_INTERVAL_ENV = "GAME_LOCKSTEP_HASH_INTERVAL"
+DEFAULT_DELAY = 4           # ticks
+DEFAULT_REDUNDANCY = 16     # ticks of input per packet, at most
+DEFAULT_HASH_INTERVAL = 60  # ticks
+MAX_RACERS = 8              # HELLO keeps the peers it has heard in one byte
+
+HELLO_INTERVAL = 0.25       # seconds between HELLOs while connecting
+CONNECT_TIMEOUT = 30.0
+PEER_TIMEOUT = 5.0          # a peer the race waits on this long without a packet is gone
+RESEND_INTERVAL = 1.0 / FPS # how often a stalled peer repeats its inputs
+LINGER_TIMEOUT = 2.0        # after the race, how long to keep handing over the last inputs
+WAITING_SHOWN_AFTER = 0.2   # seconds of stall before the screen says who we wait for
+HASH_HISTORY = 8            # race hashes kept for peers that are behind
+MAX_PACKET = 2048
+RIVAL_COLOR = (90, 110, 200)
+DODGE_REACTION = 0.35       # seconds of scroll ahead a headless racer reacts
+
+MAGIC = b"LS"
+VERSION = 1
+HELLO = 1      # peer -> peer while connecting: settings and whose HELLOs it has
+INPUT = 2      # peer -> peer every tick: inputs, ack, latest race hash
+
+HEADER = struct.Struct("<2sBB")          # magic, version, packet type
+HELLO_BODY = struct.Struct("<BBBIBHI")
+# sender, peer count, HELLOs received (bitmask), seed, input delay, hash interval, race length (0: until all are out)
+INPUT_BODY = struct.Struct("<BIIIIB")
+# sender, your inputs held (ticks), race hash tick, race hash, first tick, input count
+NO_HASH = 0xFFFFFFFF
+
+# Input bits of one racer for one tick, applied in this order
+SLIDE_END = 1
+MOVE_LEFT = 2
+MOVE_RIGHT = 4
+JUMP_PRESS = 8
+SLIDE = 16
+FORFEIT = 128   # the racer has left and is out from this tick
+
+
+class LockstepError(Exception):
+    pass
+
+
+class DesyncError(LockstepError):
+    def __init__(self, tick, peer, ours, theirs):
+        super().__init__(f"desync at tick {tick}: race hash {ours:08x} here, {theirs:08x} on P{peer + 1}")
+        self.tick = tick
+        self.peer = peer
+        self.ours = ours
+        self.theirs = theirs
+
+
+def setting(value, env, default, minimum=0):
+    """value, else $env, else default"""
+    if value is None:
+        value = int(os.environ.get(env, default))
+    if value < minimum:
+        raise ValueError(f"{env.lower()} must be {minimum} or more, got {value}")
+    return value
+
+
+def parse_peers(text):
+    """'host:port,host:port' -> [(host, port)]"""
+    peers = []
+    for item in text.split(","):
+        host, _, port = item.strip().rpartition(":")
+        peers.append((host or "127.0.0.1", int(port)))
+    return peers
+
+
+# ------------- Inputs -------------
+def input_bits(buffer):
+    """The presses (and slide release) InputBuffer handed to this frame, as input bits"""
+    pressed = buffer.pressed_bits
+    bits = SLIDE_END if buffer.released_bits & DOWN else 0
+    if pressed & LEFT:
+        bits |= MOVE_LEFT
+    if pressed & RIGHT:
+        bits |= MOVE_RIGHT
+    if pressed & JUMP:
+        bits |= JUMP_PRESS
+    if pressed & DOWN:
+        bits |= SLIDE
+    return bits
+
+
+def apply_input(player, bits):
+    if bits & SLIDE_END:
+        player.stop_slide()
+    if bits & MOVE_LEFT:
+        player.move_left()
+    if bits & MOVE_RIGHT:
+        player.move_right()
+    if bits & JUMP_PRESS:
+        player.jump()
+    if bits & SLIDE:
+        player.start_slide()
+
+
+class Dodger:
+    """Presses for a headless peer: jumps or slides past the next obstacle and
+    changes lane at random (seeded per racer) while none is near"""
+
+    def __init__(self, seed, index, reaction=DODGE_REACTION):
+        self.rng = random.Random(seed ^ determinism.INPUT_SALT ^ index)
+        self.reaction = reaction
+
+    def __call__(self, runner):
+        player = runner.player
+        rng = self.rng
+        # obstacles sweep across every lane: what matters is the next one to reach the player
+        ahead = [obs for obs in runner.obstacles if obs.rect.right > player.rect.left]
+        reach = runner.scroll_speed * self.reaction
+        if ahead:
+            obs = min(ahead, key=lambda obs: obs.rect.left)
+            gap = obs.rect.left - player.rect.right
+            if gap < reach:
+                if obs.kind == 'low':
+                    return SLIDE_END if player.sliding else JUMP_PRESS
+                return 0 if player.sliding else SLIDE
+            if gap < 2 * reach:
+                return 0
+        if player.sliding:
+            return SLIDE_END
+        r = rng.random()
+        if r < 0.02:
+            lane = player.lane - 1 if r < 0.01 else player.lane + 1
+            if 0 <= lane < LANE_COUNT:
+                # only where nothing is passing or about to
+                left = LANE_X[lane] - player.rect.width / 2
+                right = left + player.rect.width + 2 * reach
+                if all(obs.rect.right < left or obs.rect.left > right for obs in runner.obstacles):
+                    return MOVE_LEFT if lane < player.lane else MOVE_RIGHT
+        return 0
+
+
+# ------------- The race -------------
+class Race:
+    """Every racer's runner on one seeded course, advanced together a tick at a time"""
+
+    def __init__(self, racers, seed, display=None, length=0, course_path=None):
+        self.runners = []
+        for index in range(racers):
+            runner = EndlessRunnerGame(seed=seed, course_path=course_path, headless=index != display)
+            runner.reset()
+            if index != display:
+                runner.player.color = RIVAL_COLOR
+            self.runners.append(runner)
+        self.display = None if display is None else self.runners[display]
+        self.length = length
+        self.tick = 0
+        self.dt = 1.0 / FPS
+        self.hashes = struct.Struct(f"<{racers}I")
+
+    def step(self, inputs):
+        """Run one tick with each racer's input bits"""
+        dt = self.dt
+        for runner, bits in zip(self.runners, inputs):
+            if runner.state == 'playing':
+                if bits & FORFEIT:
+                    runner.state = 'gameover'
+                else:
+                    apply_input(runner.player, bits)
+            runner.update(dt)
+        self.tick += 1
+
+    @property
+    def state_hash(self):
+        """Every runner's running state hash, folded into one"""
+        return determinism.chain(self.hashes.pack(*[runner.state_hash for runner in self.runners]), 0)
+
+    @property
+    def finished(self):
+        if self.length and self.tick >= self.length:
+            return True
+        return all(runner.state != 'playing' for runner in self.runners)
+
+    def standings(self):
+        """Racer indices, best score first"""
+        return sorted(range(len(self.runners)), key=lambda i: -self.runners[i].player.score)
+
+    def results(self):
+        return ", ".join(f"{place}. P{i + 1} {self.runners[i].player.score}"
+                         + ("" if self.runners[i].state == 'playing' else " (out)")
+                         for place, i in enumerate(self.standings(), 1))
+
+    def draw(self, status=None):
+        """The display runner's view, rivals drawn in, standings top right"""
+        game = self.display
+        game.rivals = [runner.player for runner in self.runners
+                       if runner is not game and runner.state == 'playing']
+        game.draw_scene()
+        y = 12
+        for place, i in enumerate(self.standings(), 1):
+            runner = self.runners[i]
+            name = "You" if runner is game else f"P{i + 1}"
+            out = "" if runner.state == 'playing' else " (out)"
+            text = game.backend.text(game.font, f"{place}. {name} {runner.player.score}{out}", True, FONT_COLOR)
+            game.screen.blit(text, (SCREEN_WIDTH - text.get_width() - 12, y))
+            y += 24
+        if status:
+            text = game.backend.text(game.font, status, True, (255, 255, 255), (0, 0, 0))
+            game.screen.blit(text, text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 40)))
+        game.backend.present()
+
+
+# ------------- Peers -------------
+class RemotePeer:
+    """What this peer knows of another racer's peer"""
+
+    def __init__(self, index, address):
+        self.index = index
+        self.address = address
+        self.inputs = bytearray()   # their input bits, tick by tick, as far as they have arrived
+        self.acked = 0              # ticks of our input they hold
+        self.heard = 0.0            # when their last packet came (0: never)
+        self.settings = None        # (seed, delay, hash interval, length) from their HELLO
+        self.forfeit = None         # tick from which they are out
+        self.hash = None            # (tick, race hash) they sent that we could not check yet
+        self.checked = -1           # last tick whose hash matched theirs
+
+    def ready(self, tick):
+        return len(self.inputs) > tick or (self.forfeit is not None and tick > self.forfeit)
+
+    def input(self, tick):
+        return self.inputs[tick] if tick < len(self.inputs) else 0
+
+
+class LockstepStats:
+    """Traffic, redundancy and waiting of one peer"""
+
+    def __init__(self):
+        self.ticks = 0
+        self.stalls = 0             # ticks that had to wait for someone's input
+        self.stall_time = 0.0
+        self.packets_sent = 0
+        self.bytes_sent = 0
+        self.inputs_sent = 0        # counting repeats
+        self.repeats_received = 0
+        self.dropped = 0            # by the simulated loss
+        self.hash_checks = 0
+
+    def summary(self, own_inputs):
+        ticks = self.ticks or 1
+        return {
+            "ticks": self.ticks,
+            "stalls": self.stalls,
+            "stall_ms": self.stall_time * 1000,
+            "bytes_per_tick": self.bytes_sent / ticks,
+            "packets_per_tick": self.packets_sent / ticks,
+            "sends_per_input": self.inputs_sent / max(own_inputs, 1),
+            "dropped": self.dropped,
+            "repeats_received": self.repeats_received,
+            "hash_checks": self.hash_checks,
+        }
+
+    def report(self, own_inputs):
+        s = self.summary(own_inputs)
+        return (f"lockstep: {s['ticks']} ticks, {s['stalls']} stalled ({s['stall_ms']:.0f} ms), "
+                f"{s['packets_per_tick']:.1f} packets and {s['bytes_per_tick']:.1f} bytes out per tick, "
+                f"each input sent {s['sends_per_input']:.1f} times, {s['dropped']} dropped, "
+                f"{s['repeats_received']} repeats received, {s['hash_checks']} hash checks")
+
+
+class LockstepPeer:
+    """This machine's end of a race: its racer's inputs out, everyone's in, the race run in step"""
+
+    def __init__(self, peers, index, seed=None, delay=None, redundancy=None, hash_interval=None, length=0,
+                 tick_rate=None, course_path=None, headless=False, input_source=None, loss=0.0, corrupt_at=None):
+        if not 2 <= len(peers) <= MAX_RACERS:
+            raise ValueError(f"a race needs 2 to {MAX_RACERS} peers, got {len(peers)}")
+        if not 0 <= index < len(peers):
+            raise ValueError(f"peer index {index} is not in the list of {len(peers)}")
+        self.index = index
+        self.count = len(peers)
+        self.remotes = {i: RemotePeer(i, address) for i, address in enumerate(peers) if i != index}
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(peers[index])
+        self.sock.setblocking(False)
+        # Race settings: ours if we host, else replaced by the host's HELLO
+        self.seed = determinism.choose_seed(seed)
+        self.delay = setting(delay, DELAY_ENV, DEFAULT_DELAY)
+        self.hash_interval = setting(hash_interval, HASH_INTERVAL_ENV, DEFAULT_HASH_INTERVAL, 1)
+        self.length = length
+        self.redundancy = setting(redundancy, REDUNDANCY_ENV, DEFAULT_REDUNDANCY, 1)
+        # Wall-clock ticks a second; 0 runs as fast as the inputs come (tests)
+        self.tick_rate = FPS if tick_rate is None else tick_rate
+        self.course_path = course_path
+        self.headless = headless
+        self.input_source = input_source
+        # Testing: drop this fraction of outgoing packets; change our world at a tick
+        self.loss = loss
+        self.loss_rng = random.Random()
+        self.corrupt_at = corrupt_at
+        self.race = None
+        self.inputs = bytearray()   # our input bits, tick by tick
+        self.hashes = {}            # tick -> race hash, the last few
+        self.last_hash = (NO_HASH, 0)
+        self.desync = None          # the DesyncError that stopped the race
+        self.leaving = False
+        self.stats = LockstepStats()
+
+    @property
+    def connected(self):
+        """Every peer's HELLO is in (an INPUT alone does not carry the host's settings)"""
+        return all(remote.settings is not None for remote in self.remotes.values())
+
+    # ------------- Connecting -------------
+    def connect(self, timeout=CONNECT_TIMEOUT):
+        """Exchange HELLOs until every peer has answered, then set up the race"""
+        deadline = time.perf_counter() + timeout
+        next_hello = 0.0
+        while not self.connected:
+            now = time.perf_counter()
+            if now >= deadline:
+                missing = [f"P{remote.index + 1}" for remote in self.remotes.values() if remote.settings is None]
+                raise LockstepError(f"no answer from {', '.join(missing)}")
+            if now >= next_hello:
+                for remote in self.remotes.values():
+                    self.send_hello(remote)
+                next_hello = now + HELLO_INTERVAL
+            self.receive(next_hello - now)
+        if self.index != 0:
+            self.seed, self.delay, self.hash_interval, self.length = self.remotes[0].settings
+        display = None if self.headless else self.index
+        self.race = Race(self.count, self.seed, display, self.length, self.course_path)
+        if self.race.display is not None:
+            self.race.display.gameover_prompt = 'Out of the race: the others run on'
+        if self.input_source is None and self.headless:
+            self.input_source = Dodger(self.seed, self.index)
+        # Nobody has input for the first delay ticks: they run empty
+        self.inputs = bytearray(self.delay)
+        now = time.perf_counter()
+        for remote in self.remotes.values():
+            remote.heard = now
+
+    def send_hello(self, remote):
+        heard = 1 << self.index
+        for other in self.remotes.values():
+            if other.settings is not None:
+                heard |= 1 << other.index
+        self.send(HEADER.pack(MAGIC, VERSION, HELLO) +
+                  HELLO_BODY.pack(self.index, self.count, heard, self.seed, self.delay,
+                                  self.hash_interval, self.length), remote)
+
+    # ------------- Running -------------
+    def run(self):
+        """Connect and race to the end; returns the final race hash"""
+        self.connect()
+        race = self.race
+        period = 1.0 / self.tick_rate if self.tick_rate else 0.0
+        next_tick = time.perf_counter()
+        stalled_since = None
+        next_resend = 0.0
+        try:
+            while not race.finished:
+                self.poll_keys()
+                if self.leaving:
+                    # out from the first tick nobody has our input for yet
+                    self.inputs.append(FORFEIT)
+                    break
+                now = time.perf_counter()
+                if now < next_tick and not self.behind():
+                    self.receive(next_tick - now)
+                    continue
+                self.receive()
+                waiting = [remote for remote in self.remotes.values() if not remote.ready(race.tick)]
+                if not waiting:
+                    if stalled_since is not None:
+                        self.stats.stall_time += now - stalled_since
+                        stalled_since = None
+                    self.advance()
+                    self.send_inputs()
+                    next_resend = now + RESEND_INTERVAL
+                    # a stall is not made up for: whoever we waited on is behind, not us
+                    next_tick = max(next_tick + period, now - period)
+                    status = None
+                else:
+                    if stalled_since is None:
+                        stalled_since = now
+                        self.stats.stalls += 1
+                    for remote in waiting:
+                        if now - remote.heard > PEER_TIMEOUT:
+                            raise LockstepError(f"P{remote.index + 1} stopped answering at tick {race.tick}")
+                    if now >= next_resend:
+                        self.send_inputs()
+                        next_resend = now + RESEND_INTERVAL
+                    self.receive(RESEND_INTERVAL)
+                    status = None
+                    if now - stalled_since > WAITING_SHOWN_AFTER:
+                        status = "Waiting for " + ", ".join(f"P{remote.index + 1}" for remote in waiting)
+                if race.display is not None:
+                    race.draw(status)
+        except DesyncError as e:
+            # hand over our inputs anyway, so the others get to the tick and see it too
+            self.desync = e
+            self.linger(f"Desync at tick {e.tick}")
+            raise
+        self.linger("Race over")
+        return race.state_hash
+
+    def behind(self):
+        """Every other racer has sent input past ours: they are ticks ahead, so run now"""
+        horizon = len(self.inputs)
+        return all(len(remote.inputs) > horizon or remote.forfeit is not None
+                   for remote in self.remotes.values())
+
+    def advance(self):
+        race = self.race
+        tick = race.tick
+        # sample the input for delay ticks from now; this tick's was sampled delay ticks ago
+        self.inputs.append(self.sample())
+        inputs = [self.inputs[tick] if i == self.index else self.remotes[i].input(tick)
+                  for i in range(self.count)]
+        race.step(inputs)
+        self.stats.ticks += 1
+        if race.tick == self.corrupt_at:
+            race.runners[self.index].player.score += 1
+        if race.tick % self.hash_interval == 0:
+            value = race.state_hash
+            self.hashes[race.tick] = value
+            self.hashes.pop(race.tick - HASH_HISTORY * self.hash_interval, None)
+            self.last_hash = (race.tick, value)
+            for remote in self.remotes.values():
+                if remote.hash is not None and remote.hash[0] <= race.tick:
+                    pending, remote.hash = remote.hash, None
+                    self.check_hash(remote, *pending)
+
+    def sample(self):
+        """Our input bits for the tick delay ticks ahead"""
+        runner = self.race.runners[self.index]
+        if runner.state != 'playing':
+            return 0
+        if self.race.display is not None:
+            buffer = self.race.display.input
+            buffer.begin_frame()
+            return input_bits(buffer)
+        if self.input_source is not None:
+            return self.input_source(runner)
+        return 0
+
+    def poll_keys(self):
+        display = self.race.display
+        if display is not None:
+            display.input.poll()
+            if display.input.quit_requested:
+                self.leaving = True
+
+    def linger(self, status, timeout=LINGER_TIMEOUT):
+        """Keep sending until every peer still racing holds the inputs it needs from us,
+        or timeout; with a window, until it is closed"""
+        deadline = time.perf_counter() + timeout
+        race = self.race
+        display = race.display if race is not None else None
+        if display is not None and not self.leaving:
+            display.gameover_prompt = 'Close the window to leave'
+        # a finished race needs nobody's input past its last tick
+        needed = race.tick if race is not None and race.finished else len(self.inputs)
+        next_send = 0.0
+        while True:
+            now = time.perf_counter()
+            unacked = any(remote.acked < needed for remote in self.remotes.values() if remote.forfeit is None)
+            watching = display is not None and not self.leaving
+            if not (watching or unacked and now < deadline):
+                return
+            if now >= next_send:
+                self.send_inputs()
+                next_send = now + RESEND_INTERVAL
+            self.receive(next_send - now)
+            if watching:
+                self.poll_keys()
+                race.draw(status)
+
+    # ------------- Packets -------------
+    def send(self, data, remote):
+        if self.loss and self.loss_rng.random() < self.loss:
+            self.stats.dropped += 1
+            return
+        try:
+            self.sock.sendto(data, remote.address)
+        except OSError:
+            return      # e.g. refused: that peer is not up (yet, or any more)
+        self.stats.packets_sent += 1
+        self.stats.bytes_sent += len(data)
+
+    def send_inputs(self):
+        """Our inputs each peer has not acknowledged, plus our ack and latest race hash"""
+        hash_tick, value = self.last_hash
+        for remote in self.remotes.values():
+            if remote.forfeit is not None:
+                continue
+            first = remote.acked
+            inputs = self.inputs[first:first + self.redundancy]
+            self.send(HEADER.pack(MAGIC, VERSION, INPUT) +
+                      INPUT_BODY.pack(self.index, len(remote.inputs), hash_tick, value, first, len(inputs)) +
+                      inputs, remote)
+            self.stats.inputs_sent += len(inputs)
+
+    def receive(self, timeout=0.0):
+        """Handle every waiting packet, first waiting up to timeout seconds for one"""
+        if timeout > 0:
+            select.select([self.sock], [], [], timeout)
+        while True:
+            try:
+                data, _ = self.sock.recvfrom(MAX_PACKET)
+            except BlockingIOError:
+                return
+            except OSError:
+                continue    # an ICMP error for an earlier send
+            self.handle(data)
+
+    def handle(self, data):
+        """Dispatch one packet; anything not from a peer of this race is ignored"""
+        if len(data) < HEADER.size:
+            return
+        magic, version, packet_type = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            return
+        if packet_type == HELLO and len(data) >= HEADER.size + HELLO_BODY.size:
+            self.handle_hello(data)
+        elif packet_type == INPUT and len(data) >= HEADER.size + INPUT_BODY.size:
+            self.handle_input(data)
+
+    def handle_hello(self, data):
+        sender, count, heard, seed, delay, hash_interval, length = HELLO_BODY.unpack_from(data, HEADER.size)
+        remote = self.remotes.get(sender)
+        if remote is None:
+            return
+        if count != self.count:
+            raise LockstepError(f"P{sender + 1} has a race of {count} peers, this one {self.count}")
+        remote.heard = time.perf_counter()
+        remote.settings = (seed, delay, hash_interval, length)
+        if not heard & (1 << self.index):
+            self.send_hello(remote)
+
+    def handle_input(self, data):
+        sender, held, hash_tick, value, first, count = INPUT_BODY.unpack_from(data, HEADER.size)
+        remote = self.remotes.get(sender)
+        if remote is None:
+            return
+        remote.heard = time.perf_counter()
+        remote.acked = max(remote.acked, held)
+        known = len(remote.inputs)
+        if remote.forfeit is None and first <= known < first + count:
+            offset = HEADER.size + INPUT_BODY.size + known - first
+            new = data[offset:HEADER.size + INPUT_BODY.size + count]
+            for i, bits in enumerate(new):
+                if bits & FORFEIT:
+                    remote.forfeit = known + i
+                    new = new[:i + 1]
+                    break
+            remote.inputs += new
+            self.stats.repeats_received += count - len(new)
+        else:
+            self.stats.repeats_received += count
+        if hash_tick != NO_HASH:
+            self.check_hash(remote, hash_tick, value)
+
+    def check_hash(self, remote, tick, value):
+        ours = self.hashes.get(tick)
+        if ours is None:
+            if self.race is None or tick > self.race.tick:
+                remote.hash = (tick, value)     # we are not there yet
+            return
+        if ours != value:
+            if self.desync is None:
+                raise DesyncError(tick, remote.index, ours, value)
+            return
+        if tick > remote.checked:
+            remote.checked = tick
+            self.stats.hash_checks += 1
+
+    # ------------- Reporting -------------
+    def results(self):
+        if self.leaving and not self.race.finished:
+            return f"P{self.index + 1}: left the race at tick {self.race.tick}"
+        return (f"P{self.index + 1}: race over at tick {self.race.tick}, race hash {self.race.state_hash:08x}: "
+                + self.race.results())
+
+    def report_if_requested(self):
+        if os.environ.get(STATS_ENV):
+            print(self.stats.report(len(self.inputs)), flush=True)
+
+    def close(self):
+        self.sock.close()
+        if self.race is not None and self.race.display is not None:
+            pygame.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Race the endless runner in lockstep with other peers over UDP")
+    parser.add_argument("--peers", required=True,
+                        help="host:port of every racer, comma-separated, the same list on every peer")
+    parser.add_argument("--index", type=int, required=True, help="this peer's place in --peers (0 hosts)")
+    parser.add_argument("--seed", type=int, default=None, help="course seed (host; default $GAME_SEED or random)")
+    parser.add_argument("--delay", type=int, default=None, help=f"input delay in ticks (host; default {DEFAULT_DELAY})")
+    parser.add_argument("--redundancy", type=int, default=None,
+                        help=f"most ticks of input one packet repeats (default {DEFAULT_REDUNDANCY})")
+    parser.add_argument("--hash-interval", type=int, default=None,
+                        help=f"ticks between race hash checks (host; default {DEFAULT_HASH_INTERVAL})")
+    parser.add_argument("--ticks", type=int, default=0, help="race length (host; default: until everyone is out)")
+    parser.add_argument("--tick-rate", type=int, default=None,
+                        help=f"ticks a second of wall time (default {FPS}; 0: as fast as inputs arrive)")
+    parser.add_argument("--course", default=None, help="race a course file (course.py) instead of the seed's")
+    parser.add_argument("--headless", action="store_true", help="no window; a simple bot races")
+    parser.add_argument("--loss", type=float, default=0.0, help="drop this fraction of outgoing packets (testing)")
+    parser.add_argument("--corrupt-at", type=int, default=None,
+                        help="change this peer's world at that tick (testing desync detection)")
+    args = parser.parse_args()
+
+    peer = LockstepPeer(parse_peers(args.peers), args.index, args.seed, args.delay, args.redundancy,
+                        args.hash_interval, args.ticks, args.tick_rate, args.course, args.headless,
+                        loss=args.loss, corrupt_at=args.corrupt_at)
+    try:
+        peer.run()
+    except LockstepError as e:
+        print(f"P{args.index + 1}: {e}", flush=True)
+        peer.report_if_requested()
+        return 2 if isinstance(e, DesyncError) else 1
+    finally:
+        peer.close()
+    print(peer.results(), flush=True)
+    peer.report_if_requested()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
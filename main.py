@@ -2,239 +2,556 @@
 Super Mario-like Platformer Game
 Main game loop and logic
 """
+import startup
 import pygame
 import sys
+import savestate
+import scratch
+import determinism
+import leaderboard
+import simthread
+import profiler
+import spectator
+import timestep
 from constants import *
+from assets import get_font
 from player import Player
-from platform import Platform, create_level_1
-from enemy import Enemy, create_enemies_level_1
-from coin import Coin, create_coins_level_1
+from controls import Controls, NO_CONTROLS
+from inputbuffer import InputBuffer, PLATFORMER_KEYS, SPLIT_SCREEN_KEYS, PLAYER_SHIFT, CONFIRM, BACK, STATS, PAUSE, PROFILE
+from pacing import FramePacer
+from simthread import SimulationThread, Snapshot
+from level import create_level
+from activity import Activity
+from camera import Camera, CULL_MARGIN, viewports
 from particle import ParticleSystem
-from powerup import PowerUp, PowerUpEffect, create_powerups_level_1
+from powerup import PowerUp, PowerUpEffect
+import backend
+import postfx
+from renderer import Renderer, LAYER_PLATFORMS, LAYER_ITEMS, LAYER_ENEMIES, LAYER_PARTICLES, LAYER_PLAYER
+
+
+# How far around the player to look for platforms to collide with, plus
+# however far a player this fast (px/s) can get in one update
+COLLISION_MARGIN = 64
+COLLISION_SPEED = 2000
+
+# Width of the line between split-screen viewports
+SPLIT_DIVIDER = 4
+
+# Screens where nothing moves until the player presses something
+IDLE_STATES = (MENU, PAUSED, GAME_OVER, WIN)
+
+
+# Background gradient (sky to lighter blue), at the world surface's resolution
+SKY = postfx.Gradient(SKY_BLUE, SKY_BOTTOM)
+
+
+class HudState:
+    """Values shown by the HUD, copied out of the game state"""
+    __slots__ = ("score", "immortal", "lives", "combo", "multiplier", "dash_percent",
+                 "coins_collected", "total_coins", "powerups")
+    
+    def __init__(self, score, immortal, lives, combo, multiplier, dash_percent,
+                 coins_collected, total_coins, powerups):
+        self.score = score
+        self.immortal = immortal
+        self.lives = lives
+        self.combo = combo
+        self.multiplier = multiplier
+        self.dash_percent = dash_percent
+        self.coins_collected = coins_collected
+        self.total_coins = total_coins
+        self.powerups = powerups
 
 
 class Game:
-    def __init__(self):
-        pygame.init()
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Super Platformer Game")
-        self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font(None, 36)
-        self.small_font = pygame.font.Font(None, 24)
-        
-        # Game state
+    def __init__(self, level_screens=1, headless=False, pacing=None, seed=None,
+                 render_scale=None, render_filter=None, threaded=None, render_backend=None, quality=None,
+                 split_screen=False, indexed=None, active_radius=None, spectator_port=None,
+                 sim_rate=None, substep_rate=None):
+        self.level_screens = level_screens
+        # Fixed updates a second on the simulation thread (GAME_SIM_RATE), and
+        # the longest slice players move and collide in (GAME_SUBSTEP_RATE)
+        self.sim_rate = timestep.sim_rate(sim_rate)
+        self.substep_rate = timestep.substep_rate(substep_rate)
+        # Level objects further than this from every player sleep (GAME_ACTIVE_RADIUS)
+        self.active_radius = active_radius
+        self.headless = headless
+        # Split screen: two local players in one world, one viewport (and camera) each
+        self.split_screen = split_screen
+        self.local_players = 2 if split_screen else 1
+        self.viewports = viewports(self.local_players)
+        # A headless game (e.g. the network server) simulates without a window
+        self.renderer = Renderer()
+        if headless:
+            self.backend = None
+            self.screen = None
+        else:
+            # Surfaces or SDL textures (GAME_RENDER_BACKEND); the world may be drawn
+            # below (or above) window resolution and scaled up, post-processed
+            # (GAME_QUALITY) and drawn with a 256-colour palette (GAME_PALETTE)
+            self.backend = backend.create((SCREEN_WIDTH, SCREEN_HEIGHT), "Super Platformer Game",
+                                          render_backend, render_scale, render_filter, quality, indexed)
+            self.backend.configure(self.renderer)
+            self.screen = self.backend.screen
+        # Presented frames streamed to spectator screens (GAME_SPECTATOR_PORT)
+        self.spectator = None if headless else spectator.from_env((SCREEN_WIDTH, SCREEN_HEIGHT), spectator_port)
+        self.input = InputBuffer(SPLIT_SCREEN_KEYS if split_screen else PLATFORMER_KEYS)
+        # Input is also polled just before spinning, so presses get fresher timestamps
+        self.pacer = FramePacer(FPS, pacing, idle=self.input.poll)
+        self.clock = self.pacer.clock
+        self.show_frame_stats = False
+        # Sampling profiler captures, started by F9 or GAME_PROFILE
+        self.profiler = profiler.Profiler("platformer")
+        # Last frame of an idle screen, redisplayed instead of redrawn
+        self.idle_frame = None
+        # Optionally simulate on a thread of its own (GAME_SIM_THREAD / --threaded)
+        self.threaded = simthread.enabled(threaded)
+        self.sim_renderer = Renderer()
+        if self.backend is not None:
+            self.backend.configure(self.sim_renderer)
+        self.sim_held = 0       # control bits held now, and tapped since the last tick
+        self.sim_taps = 0
+        
+        # Seeded random streams: gameplay and cosmetic effects never share one,
+        # so particles can't change how a run plays out
+        self.seed = determinism.choose_seed(seed)
+        self.rng, self.cosmetic_rng = determinism.make_streams(self.seed)
+        self.state_hash = 0
+        self.pickups = []       # PICKUP records of this update, for the state hash
+        
+        # Results go to $GAME_LEADERBOARD_URL, if set, from a background thread
+        self.leaderboard = None if headless else leaderboard.from_env()
+        
+        # Game state (the level is built when play starts, not before the menu)
         self.state = MENU
-        self.reset_game()
+        self.player = None
         
-    def reset_game(self):
-        """Reset game to initial state"""
-        # Create player
-        self.player = Player(50, SCREEN_HEIGHT - GROUND_HEIGHT - PLAYER_HEIGHT - 10)
+    @property
+    def font(self):
+        return get_font(36)
         
+    @property
+    def small_font(self):
+        return get_font(24)
+        
+    def reset_game(self, player_count=None):
+        """Reset game to initial state (with one player per viewport by default)"""
         # Create level
-        self.platforms = create_level_1()
-        self.enemies = create_enemies_level_1()
-        self.coins = create_coins_level_1()
-        self.powerups = create_powerups_level_1()
+        self.level = create_level(self.level_screens)
+        self.platforms = self.level.platforms
+        self.enemies = self.level.enemies
+        self.coins = self.level.coins
+        self.powerups = self.level.powerups
+        # Only what is near a player updates; the rest catches up on waking
+        self.activity = Activity(self.level, self.active_radius)
+        
+        # Create players (the first one is the local/followed player)
+        self.players = []
+        if player_count is None:
+            player_count = self.local_players
+        for _ in range(player_count):
+            self.add_player()
+        self.player = self.players[0] if self.players else None
+        
+        # Cameras scroll across worlds wider than the screen, one per viewport
+        self.cameras = [Camera(view.width, view.height, self.level.width, self.level.height)
+                        for view in self.viewports]
+        self.camera = self.cameras[0]
+        self.follow_players()
         
         # Particle system
-        self.particles = ParticleSystem()
-        
-        # Power-up effects
-        self.active_powerups = []
+        self.particles = ParticleSystem(enabled=not self.headless, rng=self.cosmetic_rng)
+        # Screen shake, kicked by combos
+        self.shake = postfx.Shake()
         
         # Game variables
         self.total_coins = len(self.coins)
-        
-        # Track player state for particle effects
-        self.player_was_on_ground = False
-        self.player_was_dashing = False
+        self.coins_collected = 0
+        
+    def add_player(self):
+        """Add a player at the spawn point and return it"""
+        color = PLAYER_COLORS[len(self.players) % len(PLAYER_COLORS)]
+        player = Player(50, SCREEN_HEIGHT - GROUND_HEIGHT - PLAYER_HEIGHT - 10, self.level.width, color)
+        self.players.append(player)
+        return player
+        
+    def remove_player(self, player):
+        self.players.remove(player)
+        if self.player is player:
+            self.player = self.players[0] if self.players else None
+        
+    def follow_players(self):
+        """Point each viewport's camera at its player"""
+        for camera, player in zip(self.cameras, self.players):
+            camera.follow(player.rect)
+        
+    def local_controls(self):
+        """Controls of each local player, from the keyboard"""
+        return [self.input.controls(i) for i in range(self.local_players)]
+        
+    @property
+    def active_powerups(self):
+        """Power-up effects of the local player"""
+        return self.player.active_powerups
         
     def run(self):
         """Main game loop"""
+        self.profiler.start_if_requested()
+        if self.threaded:
+            return self.run_threaded()
         running = True
         while running:
-            self.clock.tick(FPS)
-            
-            # Event handling
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        running = False
-                    elif event.key == pygame.K_RETURN:
-                        if self.state == MENU:
-                            self.state = PLAYING
-                        elif self.state == GAME_OVER or self.state == WIN:
-                            self.reset_game()
-                            self.state = PLAYING
-                            
-            # Update
+            self.profiler.phase = profiler.WAIT
+            dt = self.wait_for_frame()
+            self.profiler.phase = profiler.INPUT
+            running = self.handle_input()
+                    
+            # Update by the time the frame took, whatever the refresh rate
             if self.state == PLAYING:
-                self.update()
+                self.profiler.phase = profiler.UPDATE
+                self.update(self.local_controls(), dt)
+                if self.state == GAME_OVER or self.state == WIN:
+                    self.submit_score()
             
-            # Draw
-            self.draw()
-            pygame.display.flip()
+            self.present()
+        self.quit()
+        
+    def run_threaded(self):
+        """Main loop with the simulation on its own thread (see simthread.py)"""
+        sim = SimulationThread(self.sim_step, self.sim_capture, self.sim_rate)
+        sim.start(self.state == PLAYING)
+        self.profiler.watch(sim.thread)
+        running = True
+        while running:
+            self.profiler.phase = profiler.WAIT
+            self.wait_for_frame()
+            
+            # Anything touching game state waits for the current tick to finish
+            self.profiler.phase = profiler.INPUT
+            with sim.lock:
+                state = self.state
+                running = self.handle_input()
+                # Taps are kept until a tick has seen them
+                bits = self.input.control_bits()
+                self.sim_held = bits
+                self.sim_taps |= bits
+                if self.state != state:
+                    sim.republish()
+                    if self.state == PLAYING:
+                        sim.resume()
+                snapshot = sim.latest()
+                
+            if snapshot.state == PLAYING:
+                sim.presented(snapshot)
+            self.present(snapshot)
+        sim.stop()
+        sim.report_if_requested()
+        self.quit()
+        
+    def sim_step(self):
+        """One simulation tick (on the simulation thread, lock held)"""
+        if self.state != PLAYING:
+            return False
+        bits = self.sim_held | self.sim_taps
+        self.sim_taps = 0
+        self.update([Controls.from_bits(bits >> (i * PLAYER_SHIFT)) for i in range(self.local_players)],
+                    1.0 / self.sim_rate)
+        if self.state == GAME_OVER or self.state == WIN:
+            self.submit_score()
+        return self.state == PLAYING
+        
+    def sim_capture(self, tick):
+        """Snapshot for the render thread, with its own renderer and scratch pool"""
+        scratch.begin_frame()
+        return self.capture(self.sim_renderer, tick, freeze=True)
+        
+    def wait_for_frame(self):
+        """Wait for the next frame; returns the seconds an update should cover"""
+        if self.idle_frame is not None:
+            # Idle screen already shown: block until there is input
+            self.input.wait()
+            self.pacer.resume()
+            return timestep.STEP
+        milliseconds = self.pacer.wait()
+        self.input.poll()
+        return timestep.frame_time(milliseconds)
             
+    def handle_input(self):
+        """Menu, pause and quit keys; returns False when the game should quit"""
+        # Input (buffered so taps shorter than a frame still count)
+        self.input.begin_frame()
+        running = True
+        state = self.state
+        if self.input.pressed(STATS):
+            self.show_frame_stats = not self.show_frame_stats
+        if self.input.pressed(PROFILE):
+            self.profiler.start()
+        if self.input.quit_requested or self.input.pressed(BACK):
+            running = False
+        elif self.input.pressed(CONFIRM):
+            if self.state == MENU:
+                if self.player is None:
+                    self.reset_game()
+                self.state = PLAYING
+            elif self.state == GAME_OVER or self.state == WIN:
+                self.reset_game()
+                self.state = PLAYING
+        elif self.input.pressed(PAUSE):
+            if self.state == PLAYING:
+                self.state = PAUSED
+            elif self.state == PAUSED:
+                self.state = PLAYING
+        if self.state != state:
+            self.idle_frame = None
+        return running
+        
+    def present(self, snapshot=None):
+        """Draw (idle screens are drawn once, then redisplayed from the cache) and flip"""
+        self.profiler.phase = profiler.DRAW
+        if self.idle_frame is not None:
+            self.screen.blit(self.idle_frame, (0, 0))
+        else:
+            self.draw(snapshot)
+            state = self.state if snapshot is None else snapshot.state
+            if state in IDLE_STATES:
+                self.idle_frame = self.screen.copy()
+        if self.show_frame_stats:
+            self.draw_frame_stats()
+        if self.spectator is not None:
+            self.spectator.publish(self.backend)
+        self.profiler.phase = profiler.FLIP
+        self.backend.present()
+        self.input.presented()
+        startup.frame_presented()
+        
+    def quit(self):
+        self.profiler.stop()
+        self.input.report_if_requested()
+        self.pacer.report_if_requested()
+        if self.leaderboard is not None:
+            self.leaderboard.close()
+            self.leaderboard.report_if_requested()
+        if self.backend is not None:
+            self.backend.postfx.report_if_requested()
+        if self.spectator is not None:
+            self.spectator.close()
+            self.spectator.report_if_requested()
         pygame.quit()
         sys.exit()
         
-    def update(self):
-        """Update game logic"""
+    def submit_score(self):
+        """Queue the finished run's score; never waits on the network"""
+        if self.leaderboard is not None:
+            self.leaderboard.submit("platformer", self.player.score, won=self.state == WIN,
+                                    seed=self.seed, screens=self.level_screens)
+        
+    def update(self, controls=None, dt=timestep.STEP):
+        """Update game logic by dt seconds
+        
+        controls holds one Controls per player; None reads the keyboard for
+        the first player.
+        """
+        # Move players
+        for i, player in enumerate(self.players):
+            if controls is not None:
+                self.update_player(player, controls[i], dt)
+            else:
+                self.update_player(player, None if i == 0 else NO_CONTROLS, dt)
+        
+        # Wake what the players came near, put what they left to sleep
+        activity = self.activity
+        activity.refresh(self.players)
+        
+        # Update enemies
+        for enemy in activity.enemies.active:
+            enemy.update(dt)
+        
+        # Update coins (for animation)
+        for coin in activity.coins.active:
+            coin.update(dt)
+            
+        # Update power-ups
+        for powerup in activity.powerups.active:
+            powerup.update(dt)
+        activity.step(dt)
+        
+        # Update particles and screen shake
+        self.particles.update(dt)
+        self.shake.step(dt)
+        
+        # Power-up timers and collisions
+        for player in self.players:
+            self.check_player_collisions(player, dt)
+            
+        self.follow_players()
+                
+        # Check win condition (collect all coins)
+        if self.coins_collected == self.total_coins:
+            self.state = WIN
+            
+        # Running hash of the gameplay state, compared across builds by determinism.py
+        self.state_hash = determinism.chain(savestate.platformer_state(self), self.state_hash)
+        self.pickups.clear()
+            
+    def update_player(self, player, controls, dt=timestep.STEP):
+        """Emit movement particles and move one player"""
         # Emit dash particles
-        if self.player.is_dashing and not self.player_was_dashing:
-            self.particles.emit_dash(self.player.rect.centerx, self.player.rect.centery, self.player.facing_right)
-        self.player_was_dashing = self.player.is_dashing
+        if player.is_dashing and not player.was_dashing:
+            self.particles.emit_dash(player.rect.centerx, player.rect.centery, player.facing_right)
+        player.was_dashing = player.is_dashing
         
         # Emit jump particles
-        if not self.player.on_ground and self.player_was_on_ground:
-            self.particles.emit_jump(self.player.rect.centerx, self.player.rect.bottom)
+        if not player.on_ground and player.was_on_ground:
+            self.particles.emit_jump(player.rect.centerx, player.rect.bottom)
         
         # Emit landing particles
-        if self.player.on_ground and not self.player_was_on_ground:
-            self.particles.emit_landing(self.player.rect.centerx, self.player.rect.bottom)
+        if player.on_ground and not player.was_on_ground:
+            self.particles.emit_landing(player.rect.centerx, player.rect.bottom)
         
-        self.player_was_on_ground = self.player.on_ground
+        player.was_on_ground = player.on_ground
         
         # Update player with power-up effects
         speed_boost = 1.0
         jump_boost = 1.0
         
-        for effect in self.active_powerups:
+        for effect in player.active_powerups:
             if effect.type == PowerUp.SPEED_BOOST:
                 speed_boost = 1.5
             elif effect.type == PowerUp.MEGA_JUMP:
                 jump_boost = 1.4
         
-        self.player.update(self.platforms, speed_boost, jump_boost)
-        
-        # Update enemies
-        for enemy in self.enemies:
-            enemy.update()
-        
-        # Update coins (for animation)
-        for coin in self.coins:
-            coin.update()
-            
-        # Update power-ups
-        for powerup in self.powerups:
-            powerup.update()
-        
-        # Update particles
-        self.particles.update()
+        margin = COLLISION_MARGIN + int(COLLISION_SPEED * dt)
+        nearby_platforms = self.level.platform_grid.query(player.rect.inflate(margin * 2, margin * 2))
+        player.update(nearby_platforms, speed_boost, jump_boost, controls, dt,
+                      timestep.substeps(dt, self.substep_rate))
         
+    def check_player_collisions(self, player, dt=timestep.STEP):
+        """Power-up timers, pickups, enemy hits and falling for one player"""
         # Update active power-up timers
-        for effect in self.active_powerups:
-            effect.update()
-        self.active_powerups = [e for e in self.active_powerups if not e.is_expired()]
+        for effect in player.active_powerups:
+            effect.update(dt)
+        player.active_powerups = [e for e in player.active_powerups if not e.is_expired()]
             
-        # Check coin collection with combo system
-        for coin in self.coins:
-            if not coin.collected and self.player.rect.colliderect(coin.rect):
+        # Check coin collection with combo system (sleepers are out of reach)
+        for coin in self.activity.coins.active:
+            if not coin.collected and player.rect.colliderect(coin.rect):
                 coin.collected = True
-                self.player.add_combo()
-                multiplier = self.player.get_combo_multiplier()
+                self.coins_collected += 1
+                self.pickups.append(savestate.coin_pickup(coin))
+                player.add_combo()
+                multiplier = player.get_combo_multiplier()
                 
                 # Apply score multiplier power-up
-                if self.has_powerup(PowerUp.SCORE_MULTIPLIER):
+                if self.has_powerup(PowerUp.SCORE_MULTIPLIER, player):
                     multiplier *= 2
                     
                 points = int(10 * multiplier)
-                self.player.score += points
+                player.score += points
                 self.particles.emit_coin_collect(coin.rect.centerx, coin.rect.centery)
-                if self.player.combo > 2:
-                    self.particles.emit_combo(self.player.rect.centerx, self.player.rect.top)
+                if player.combo > 2:
+                    self.particles.emit_combo(player.rect.centerx, player.rect.top)
+                    self.shake.kick(player.combo * 0.5)
         
         # Check power-up collection
-        for powerup in self.powerups:
-            if not powerup.collected and self.player.rect.colliderect(powerup.rect):
+        for powerup in self.activity.powerups.active:
+            if not powerup.collected and player.rect.colliderect(powerup.rect):
                 powerup.collected = True
-                self.active_powerups.append(PowerUpEffect(powerup.powerup_type))
-                self.player.score += 25
+                self.pickups.append(savestate.powerup_pickup(powerup))
+                player.active_powerups.append(PowerUpEffect(powerup.powerup_type))
+                player.score += 25
                 self.particles.emit_coin_collect(powerup.rect.centerx, powerup.rect.centery)
                 
         # Check enemy collision
-        if self.player.immortal:
+        if player.immortal:
             # In immortal mode, colliding with enemies gives points and combo!
-            for enemy in self.enemies:
-                if self.player.rect.colliderect(enemy.rect) and not self.player.invincible:
-                    self.player.invincible = True
-                    self.player.invincible_timer = 30  # Short invincibility to prevent multiple hits
-                    self.player.add_combo()
-                    self.player.score += int(15 * self.player.get_combo_multiplier())
-                    self.particles.emit_combo(self.player.rect.centerx, self.player.rect.top)
+            for enemy in self.activity.enemies.active:
+                if player.rect.colliderect(enemy.rect) and not player.invincible:
+                    player.invincible = True
+                    player.invincible_timer = HIT_INVINCIBILITY_TIME  # Short invincibility to prevent multiple hits
+                    player.add_combo()
+                    player.score += int(15 * player.get_combo_multiplier())
+                    self.particles.emit_combo(player.rect.centerx, player.rect.top)
+                    self.shake.kick(player.combo * 0.5)
                     break
-        elif not self.player.invincible:
+        elif not player.invincible:
             # Only take damage if not immortal and not invincible
-            for enemy in self.enemies:
-                if self.player.rect.colliderect(enemy.rect):
-                    self.player.lives -= 1
-                    self.player.invincible = True
-                    self.player.invincible_timer = INVINCIBILITY_TIME
-                    if self.player.lives <= 0:
-                        self.state = GAME_OVER
-                    else:
-                        # Reset player position
-                        self.player.rect.x = 50
-                        self.player.rect.y = SCREEN_HEIGHT - GROUND_HEIGHT - PLAYER_HEIGHT - 10
-                        self.player.vel_x = 0
-                        self.player.vel_y = 0
+            for enemy in self.activity.enemies.active:
+                if player.rect.colliderect(enemy.rect):
+                    self.lose_life(player)
                     break  # Only hit once
                     
         # Check if player falls off screen (immortal mode: just reset position)
-        if self.player.rect.top > SCREEN_HEIGHT:
-            if self.player.immortal:
+        if player.rect.top > SCREEN_HEIGHT:
+            if player.immortal:
                 # Just reset position in immortal mode
-                self.player.rect.x = 50
-                self.player.rect.y = SCREEN_HEIGHT - GROUND_HEIGHT - PLAYER_HEIGHT - 10
-                self.player.vel_x = 0
-                self.player.vel_y = 0
+                self.respawn(player)
             else:
-                self.player.lives -= 1
-                self.player.invincible = True
-                self.player.invincible_timer = INVINCIBILITY_TIME
-                if self.player.lives <= 0:
-                    self.state = GAME_OVER
-                else:
-                    self.player.rect.x = 50
-                    self.player.rect.y = SCREEN_HEIGHT - GROUND_HEIGHT - PLAYER_HEIGHT - 10
-                    self.player.vel_x = 0
-                    self.player.vel_y = 0
+                self.lose_life(player)
                 
-        # Check win condition (collect all coins)
-        if all(coin.collected for coin in self.coins):
-            self.state = WIN
+    def lose_life(self, player):
+        player.lives -= 1
+        player.invincible = True
+        player.invincible_timer = INVINCIBILITY_TIME
+        if all(p.lives <= 0 for p in self.players):
+            self.state = GAME_OVER
+        elif player.lives > 0:
+            # Reset player position
+            self.respawn(player)
+            
+    def respawn(self, player):
+        player.rect.x = 50
+        player.rect.y = SCREEN_HEIGHT - GROUND_HEIGHT - PLAYER_HEIGHT - 10
+        player.sub_x = player.sub_y = 0.0
+        player.vel_x = 0
+        player.vel_y = 0
+                
+    def snapshot(self):
+        """Binary save state of the whole world (see savestate.py)"""
+        return savestate.snapshot_platformer(self)
+        
+    def restore(self, data):
+        """Load a snapshot() blob taken in a level of the same shape"""
+        if self.player is None:
+            self.reset_game()
+        savestate.restore_platformer(self, data)
+        self.idle_frame = None
                 
-    def has_powerup(self, powerup_type):
+    def has_powerup(self, powerup_type, player=None):
         """Check if player has a specific power-up active"""
-        return any(e.type == powerup_type for e in self.active_powerups)
+        if player is None:
+            player = self.player
+        return any(e.type == powerup_type for e in player.active_powerups)
             
-    def draw(self):
-        """Draw everything"""
-        # Background gradient (sky to lighter blue)
-        for y in range(SCREEN_HEIGHT):
-            color_value = 135 + int((y / SCREEN_HEIGHT) * 50)  # Gradient from darker to lighter
-            pygame.draw.line(self.screen, (color_value, 206, 235), (0, y), (SCREEN_WIDTH, y))
-        
-        if self.state == MENU:
+    def draw(self, snapshot=None):
+        """Draw everything; in threaded mode the world comes from a simulation snapshot"""
+        scratch.begin_frame()
+        state = self.state
+        if snapshot is not None:
+            state = snapshot.state
+        elif state != MENU:
+            snapshot = self.capture(self.renderer)
+        
+        if state == MENU:
+            self.backend.draw_world(self.renderer, (), SKY)
             self.draw_menu()
-        elif self.state == PLAYING:
-            self.draw_game()
-        elif self.state == GAME_OVER:
-            self.draw_game_over()
-        elif self.state == WIN:
-            self.draw_win()
+        elif state == PLAYING:
+            self.draw_game(snapshot)
+        elif state == GAME_OVER:
+            self.draw_game_over(snapshot)
+        elif state == WIN:
+            self.draw_win(snapshot)
+        elif state == PAUSED:
+            self.draw_paused(snapshot)
             
     def draw_menu(self):
         """Draw main menu"""
         # Animated title
-        title = self.font.render("🎮 SUPER PLATFORMER 🎮", True, RED)
+        title = self.backend.text(self.font, "🎮 SUPER PLATFORMER 🎮", True, RED)
         title_rect = title.get_rect(center=(SCREEN_WIDTH // 2, 100))
         
         # Shadow effect for title
-        title_shadow = self.font.render("🎮 SUPER PLATFORMER 🎮", True, BLACK)
+        title_shadow = self.backend.text(self.font, "🎮 SUPER PLATFORMER 🎮", True, BLACK)
         shadow_rect = title_shadow.get_rect(center=(SCREEN_WIDTH // 2 + 3, 103))
         self.screen.blit(title_shadow, shadow_rect)
         self.screen.blit(title, title_rect)
@@ -260,167 +577,278 @@ class Game:
             "Press ENTER to Start",
             "Press ESC to Quit"
         ]
+        if self.split_screen:
+            instructions[2:5] = [
+                "🔴 Player 1: A/D move, W jump, LEFT SHIFT dash",
+                "🔵 Player 2: arrows move, UP jump, RIGHT SHIFT dash",
+            ]
         
         y = 150
         for instruction in instructions:
             if instruction.startswith("HOW") or instruction.startswith("✨"):
-                text = self.small_font.render(instruction, True, BLUE)
+                text = self.backend.text(self.small_font, instruction, True, BLUE)
             elif instruction == "":
                 y += 10
                 continue
             else:
-                text = self.small_font.render(instruction, True, BLACK)
+                text = self.backend.text(self.small_font, instruction, True, BLACK)
             text_rect = text.get_rect(center=(SCREEN_WIDTH // 2, y))
             self.screen.blit(text, text_rect)
             y += 25
             
-    def draw_game(self):
-        """Draw game elements"""
+    def capture(self, renderer, tick=0, freeze=False):
+        """Record the world's draw commands, glows, shake and the HUD values as a Snapshot"""
+        if self.player is None:
+            return Snapshot(tick, self.state, (), None)  # menu before the first game
+        if self.split_screen:
+            # The world is recorded once per viewport, each culled by its own camera
+            views = []
+            for viewport, camera, player in zip(self.viewports, self.cameras, self.players):
+                self.record_world(renderer, camera)
+                views.append((viewport, renderer.take(freeze), renderer.take_glows(), self.hud_state(player)))
+            return Snapshot(tick, self.state, (), views[0][3], (), self.shake.offset(), tuple(views))
+        self.record_world(renderer)
+        return Snapshot(tick, self.state, renderer.take(freeze), self.hud_state(),
+                        renderer.take_glows(), self.shake.offset())
+        
+    def record_world(self, renderer, camera=None):
+        """Record the world visible to camera (the first one by default) into the renderer's layers"""
+        if camera is None:
+            camera = self.camera
+        renderer.set_offset(camera.x, camera.y)
+        
+        # Only objects inside the view (plus a margin) are drawn
+        view = camera.cull_rect(CULL_MARGIN)
+        
         # Draw platforms
-        for platform in self.platforms:
-            platform.draw(self.screen)
+        layer = renderer.layer(LAYER_PLATFORMS)
+        for platform in self.level.platform_grid.query(view):
+            platform.draw(layer)
             
         # Draw coins
-        for coin in self.coins:
-            coin.draw(self.screen)
+        layer = renderer.layer(LAYER_ITEMS)
+        for coin in self.level.coin_grid.query(view):
+            coin.draw(layer)
         
         # Draw power-ups
-        for powerup in self.powerups:
-            powerup.draw(self.screen)
+        for powerup in self.level.powerup_grid.query(view):
+            powerup.draw(layer)
             
         # Draw enemies
-        for enemy in self.enemies:
-            enemy.draw(self.screen)
+        layer = renderer.layer(LAYER_ENEMIES)
+        for enemy in self.level.enemy_grid.query(view):
+            enemy.draw(layer)
             
         # Draw particles (behind player)
-        self.particles.draw(self.screen)
+        self.particles.draw(renderer.layer(LAYER_PARTICLES))
             
-        # Draw player
-        self.player.draw(self.screen)
-        
-        # Draw HUD
-        self.draw_hud()
-        
-    def draw_hud(self):
-        """Draw heads-up display (score, lives, combo, dash, etc.)"""
+        # Draw players
+        layer = renderer.layer(LAYER_PLAYER)
+        for player in self.players:
+            player.draw(layer)
+            
+    def hud_state(self, player=None):
+        """Copy of what player's (the first player's) HUD shows, so it can be drawn after the game moves on"""
+        if player is None:
+            player = self.player
+        dash_percent = None
+        if player.dash_cooldown_timer > 0:
+            dash_percent = int((player.dash_cooldown_timer / player.dash_cooldown) * 100)
+        powerups = tuple((effect.type, effect.get_time_remaining()) for effect in player.active_powerups)
+        return HudState(player.score, player.immortal, player.lives, player.combo,
+                        player.get_combo_multiplier(), dash_percent,
+                        self.coins_collected, self.total_coins, powerups)
+        
+    def draw_game(self, snapshot=None):
+        """Draw game elements (of snapshot, or the current state); returns the snapshot drawn"""
+        if snapshot is None:
+            snapshot = self.capture(self.renderer)
+        
+        if snapshot.views:
+            # Split screen: the same sprites, sky and text caches serve every viewport
+            for viewport, layers, glows, hud in snapshot.views:
+                self.backend.draw_world(self.renderer, layers, SKY, glows, snapshot.shake, viewport)
+                self.draw_hud(hud, viewport.x)
+            for viewport in snapshot.views[1:]:
+                self.backend.rect(BLACK, (viewport[0].x - SPLIT_DIVIDER // 2, 0, SPLIT_DIVIDER, SCREEN_HEIGHT))
+            return snapshot
+        
+        # Sky, then the world in one batch per layer, bloom and shake, scaled to the window
+        self.backend.draw_world(self.renderer, snapshot.layers, SKY, snapshot.glows, snapshot.shake)
+        
+        # Draw HUD (always at native resolution)
+        self.draw_hud(snapshot.hud)
+        return snapshot
+        
+    def final_score_text(self, snapshot):
+        if snapshot.views:
+            return "Final Scores: " + " / ".join(str(view[3].score) for view in snapshot.views)
+        return f"Final Score: {snapshot.hud.score}"
+        
+    def draw_hud(self, hud, x=0):
+        """Draw heads-up display (score, lives, combo, dash, etc.), x pixels from the left"""
         # Main HUD background panel (larger to fit new info)
-        hud_bg = pygame.Surface((220, 190))
-        hud_bg.set_alpha(180)
-        hud_bg.fill((50, 50, 50))
-        self.screen.blit(hud_bg, (5, 5))
+        hud_bg = scratch.acquire((220, 190), alpha=180, fill=(50, 50, 50))
+        self.screen.blit(hud_bg, (x + 5, 5))
         
         # Score with icon
-        score_text = self.small_font.render(f"⭐ Score: {self.player.score}", True, YELLOW)
-        self.screen.blit(score_text, (15, 15))
+        score_text = self.backend.text(self.small_font, f"⭐ Score: {hud.score}", True, YELLOW)
+        self.screen.blit(score_text, (x + 15, 15))
         
         # Immortal mode indicator
-        if self.player.immortal:
-            immortal_text = self.small_font.render("🛡️  IMMORTAL MODE!", True, (255, 215, 0))
-            self.screen.blit(immortal_text, (15, 40))
+        if hud.immortal:
+            immortal_text = self.backend.text(self.small_font, "🛡️  IMMORTAL MODE!", True, (255, 215, 0))
+            self.screen.blit(immortal_text, (x + 15, 40))
         else:
             # Lives with heart icons (only show if not immortal)
-            lives_text = self.small_font.render(f"❤️  Lives:", True, RED)
-            self.screen.blit(lives_text, (15, 40))
+            lives_text = self.backend.text(self.small_font, f"❤️  Lives:", True, RED)
+            self.screen.blit(lives_text, (x + 15, 40))
             # Draw heart icons for lives
-            for i in range(min(self.player.lives, 8)):  # Max 8 hearts displayed
-                heart_x = 100 + i * 20
-                if heart_x < 215:  # Don't overflow panel
-                    heart = self.small_font.render("❤️", True, RED)
+            for i in range(min(hud.lives, 8)):  # Max 8 hearts displayed
+                heart_x = x + 100 + i * 20
+                if heart_x < x + 215:  # Don't overflow panel
+                    heart = self.backend.text(self.small_font, "❤️", True, RED)
                     self.screen.blit(heart, (heart_x, 40))
         
         # Combo counter (if active)
-        if self.player.combo > 0:
-            combo_color = (255, 100, 255) if self.player.combo >= 5 else (255, 200, 100)
-            combo_text = self.small_font.render(f"🔥 COMBO x{self.player.combo}! ", True, combo_color)
-            self.screen.blit(combo_text, (15, 65))
-            multiplier_text = self.small_font.render(f"   ({self.player.get_combo_multiplier()}x points)", True, combo_color)
-            self.screen.blit(multiplier_text, (15, 65))
+        if hud.combo > 0:
+            combo_color = (255, 100, 255) if hud.combo >= 5 else (255, 200, 100)
+            combo_text = self.backend.text(self.small_font, f"🔥 COMBO x{hud.combo}! ", True, combo_color)
+            self.screen.blit(combo_text, (x + 15, 65))
+            multiplier_text = self.backend.text(self.small_font, f"   ({hud.multiplier}x points)", True, combo_color)
+            self.screen.blit(multiplier_text, (x + 15, 65))
         
         # Dash cooldown indicator
-        dash_y = 90 if self.player.combo > 0 else 65
-        if self.player.dash_cooldown_timer > 0:
-            cooldown_pct = (self.player.dash_cooldown_timer / self.player.dash_cooldown) * 100
-            dash_text = self.small_font.render(f"⚡ Dash: {int(cooldown_pct)}%", True, (150, 150, 150))
+        dash_y = 90 if hud.combo > 0 else 65
+        if hud.dash_percent is not None:
+            dash_text = self.backend.text(self.small_font, f"⚡ Dash: {hud.dash_percent}%", True, (150, 150, 150))
         else:
-            dash_text = self.small_font.render("⚡ Dash: READY!", True, (100, 255, 100))
-        self.screen.blit(dash_text, (15, dash_y))
+            dash_text = self.backend.text(self.small_font, "⚡ Dash: READY!", True, (100, 255, 100))
+        self.screen.blit(dash_text, (x + 15, dash_y))
         
         # Coins collected with progress bar
         coins_y = dash_y + 25
-        coins_collected = sum(1 for coin in self.coins if coin.collected)
-        coins_text = self.small_font.render(f"💰 Coins: {coins_collected}/{self.total_coins}", True, YELLOW)
-        self.screen.blit(coins_text, (15, coins_y))
+        coins_collected = hud.coins_collected
+        coins_text = self.backend.text(self.small_font, f"💰 Coins: {coins_collected}/{hud.total_coins}", True, YELLOW)
+        self.screen.blit(coins_text, (x + 15, coins_y))
         
         # Progress bar for coins
         bar_width = 190
         bar_height = 10
-        bar_x = 15
+        bar_x = x + 15
         bar_y = coins_y + 20
         # Background bar
-        pygame.draw.rect(self.screen, (100, 100, 100), (bar_x, bar_y, bar_width, bar_height))
+        self.backend.rect((100, 100, 100), (bar_x, bar_y, bar_width, bar_height))
         # Progress bar
-        progress = (coins_collected / self.total_coins) * bar_width
-        pygame.draw.rect(self.screen, YELLOW, (bar_x, bar_y, progress, bar_height))
+        progress = (coins_collected / hud.total_coins) * bar_width
+        self.backend.rect(YELLOW, (bar_x, bar_y, progress, bar_height))
         # Border
-        pygame.draw.rect(self.screen, WHITE, (bar_x, bar_y, bar_width, bar_height), 2)
+        self.backend.rect(WHITE, (bar_x, bar_y, bar_width, bar_height), 2)
         
         # Active power-ups display
         powerup_y = bar_y + 15
-        if self.active_powerups:
-            for i, effect in enumerate(self.active_powerups):
-                if effect.type == PowerUp.SPEED_BOOST:
-                    text = self.small_font.render(f"⚡ Speed: {effect.get_time_remaining():.1f}s", True, BLUE)
-                elif effect.type == PowerUp.MEGA_JUMP:
-                    text = self.small_font.render(f"🚀 Jump: {effect.get_time_remaining():.1f}s", True, (255, 100, 255))
+        if hud.powerups:
+            for i, (powerup_type, remaining) in enumerate(hud.powerups):
+                if powerup_type == PowerUp.SPEED_BOOST:
+                    text = self.backend.text(self.small_font, f"⚡ Speed: {remaining:.1f}s", True, BLUE)
+                elif powerup_type == PowerUp.MEGA_JUMP:
+                    text = self.backend.text(self.small_font, f"🚀 Jump: {remaining:.1f}s", True, (255, 100, 255))
                 else:  # SCORE_MULTIPLIER
-                    text = self.small_font.render(f"⭐ 2x Score: {effect.get_time_remaining():.1f}s", True, (255, 215, 0))
-                self.screen.blit(text, (15, powerup_y + i * 20))
+                    text = self.backend.text(self.small_font, f"⭐ 2x Score: {remaining:.1f}s", True, (255, 215, 0))
+                self.screen.blit(text, (x + 15, powerup_y + i * 20))
+        
+    def draw_frame_stats(self):
+        """Frame pacing overlay (toggled with F3)"""
+        text = self.backend.text(self.small_font, self.pacer.overlay_text(), True, WHITE, BLACK)
+        self.screen.blit(text, (SCREEN_WIDTH - text.get_width() - 5, SCREEN_HEIGHT - text.get_height() - 5))
+        
+    def draw_paused(self, snapshot=None):
+        """Draw pause screen"""
+        snapshot = self.draw_game(snapshot)
+        self.backend.dim(128)
+        
+        paused_text = self.backend.text(self.font, "PAUSED", True, WHITE)
+        paused_rect = paused_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 20))
+        self.screen.blit(paused_text, paused_rect)
+        
+        resume_text = self.backend.text(self.small_font, "Press P to Resume", True, WHITE)
+        resume_rect = resume_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 30))
+        self.screen.blit(resume_text, resume_rect)
         
-    def draw_game_over(self):
+    def draw_game_over(self, snapshot=None):
         """Draw game over screen"""
         # Dim background
-        self.draw_game()
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        overlay.set_alpha(128)
-        overlay.fill(BLACK)
-        self.screen.blit(overlay, (0, 0))
+        snapshot = self.draw_game(snapshot)
+        self.backend.dim(128)
         
         # Game over text
-        game_over_text = self.font.render("GAME OVER", True, RED)
+        game_over_text = self.backend.text(self.font, "GAME OVER", True, RED)
         game_over_rect = game_over_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50))
         self.screen.blit(game_over_text, game_over_rect)
         
-        score_text = self.font.render(f"Final Score: {self.player.score}", True, WHITE)
+        score_text = self.backend.text(self.font, self.final_score_text(snapshot), True, WHITE)
         score_rect = score_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 10))
         self.screen.blit(score_text, score_rect)
         
-        restart_text = self.small_font.render("Press ENTER to Restart", True, WHITE)
+        restart_text = self.backend.text(self.small_font, "Press ENTER to Restart", True, WHITE)
         restart_rect = restart_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 60))
         self.screen.blit(restart_text, restart_rect)
         
-    def draw_win(self):
+    def draw_win(self, snapshot=None):
         """Draw win screen"""
         # Dim background
-        self.draw_game()
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        overlay.set_alpha(128)
-        overlay.fill(BLACK)
-        self.screen.blit(overlay, (0, 0))
+        snapshot = self.draw_game(snapshot)
+        self.backend.dim(128)
         
         # Win text
-        win_text = self.font.render("YOU WIN!", True, YELLOW)
+        win_text = self.backend.text(self.font, "YOU WIN!", True, YELLOW)
         win_rect = win_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50))
         self.screen.blit(win_text, win_rect)
         
-        score_text = self.font.render(f"Final Score: {self.player.score}", True, WHITE)
+        score_text = self.backend.text(self.font, self.final_score_text(snapshot), True, WHITE)
         score_rect = score_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 10))
         self.screen.blit(score_text, score_rect)
         
-        restart_text = self.small_font.render("Press ENTER to Play Again", True, WHITE)
+        restart_text = self.backend.text(self.small_font, "Press ENTER to Play Again", True, WHITE)
         restart_rect = restart_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 60))
         self.screen.blit(restart_text, restart_rect)
 
 
 if __name__ == "__main__":
-    game = Game()
+    import argparse
+    parser = argparse.ArgumentParser(description="Super Platformer Game")
+    parser.add_argument("--screens", type=int, default=1, help="level width in screens")
+    parser.add_argument("--pacing", choices=("sleep", "hybrid", "uncapped"),
+                        help="frame pacing mode (default: $GAME_PACING or sleep)")
+    parser.add_argument("--seed", type=int, help="random seed (default: $GAME_SEED or random)")
+    parser.add_argument("--render-scale", type=float,
+                        help="world resolution relative to the window (default: $GAME_RENDER_SCALE or 1)")
+    parser.add_argument("--filter", choices=("nearest", "smooth"),
+                        help="filter for scaling the world (default: $GAME_RENDER_FILTER or nearest)")
+    parser.add_argument("--threaded", action="store_true", default=None,
+                        help="simulate on a separate thread (default: $GAME_SIM_THREAD)")
+    parser.add_argument("--backend", choices=backend.BACKENDS,
+                        help="render with Surfaces or SDL textures (default: $GAME_RENDER_BACKEND or surface)")
+    parser.add_argument("--quality", choices=tuple(postfx.QUALITY_STAGES),
+                        help="post-processing stages to run (default: $GAME_QUALITY or high)")
+    parser.add_argument("--split-screen", action="store_true",
+                        help="two players on one keyboard (WASD + left shift, arrows + right shift)")
+    parser.add_argument("--palette", action="store_true", default=None,
+                        help="draw the world in 8-bit palette mode to save memory (default: $GAME_PALETTE)")
+    parser.add_argument("--active-radius", type=int,
+                        help="pixels around a player where level objects update, 0 for everywhere "
+                             "(default: $GAME_ACTIVE_RADIUS or the view)")
+    parser.add_argument("--spectate", type=int, metavar="PORT",
+                        help="stream frames to spectator_viewer.py on this TCP port (default: $GAME_SPECTATOR_PORT)")
+    parser.add_argument("--sim-rate", type=int,
+                        help="fixed updates a second with --threaded (default: $GAME_SIM_RATE or 60)")
+    parser.add_argument("--substep-rate", type=int,
+                        help="move and collide in slices of at most 1/RATE s, 0 for none "
+                             "(default: $GAME_SUBSTEP_RATE or 60)")
+    args = parser.parse_args()
+    game = Game(level_screens=args.screens, pacing=args.pacing, seed=args.seed,
+                render_scale=args.render_scale, render_filter=args.filter, threaded=args.threaded,
+                render_backend=args.backend, quality=args.quality, split_screen=args.split_screen,
+                indexed=args.palette, active_radius=args.active_radius,
+                spectator_port=args.spectate, sim_rate=args.sim_rate, substep_rate=args.substep_rate)
     game.run()
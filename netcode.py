@@ -0,0 +1,239 @@
+"""
+Network protocol and snapshot delta compression for the platformer
+
+Packets are small fixed-layout structs over UDP. The server describes the
+world as a set of records (one per player, one per enemy, one for world
+flags), each keyed by (kind, id) and packed into bytes. A snapshot sent to a
+client only carries the records that differ from the last snapshot that
+client acknowledged, plus the ids of players that have left. A changed
+record that existed in the baseline is sent as a byte patch (a bitmask of
+changed bytes followed by just those bytes) when that is smaller.
+"""
+import struct
+
+MAGIC = b"PG"
+PROTOCOL_VERSION = 2
+
+# Packet types
+HELLO = 1      # client -> server: join
+WELCOME = 2    # server -> client: your id and the world settings
+INPUT = 3      # client -> server: controls for a tick + last snapshot received
+SNAPSHOT = 4   # server -> client: delta-compressed world state
+BYE = 5        # client -> server: leaving
+
+HEADER = struct.Struct("<2sBB")          # magic, version, packet type
+WELCOME_BODY = struct.Struct("<HHH")     # client id, tick rate, level screens
+INPUT_BODY = struct.Struct("<IBI")       # input seq, control bits, acked snapshot tick
+SNAPSHOT_BODY = struct.Struct("<IIHH")   # tick, baseline tick (0 = full), your id, entry count
+ENTRY = struct.Struct("<BIH")            # record kind, record id, payload length
+
+# Record kinds
+RECORD_WORLD = 0
+RECORD_PLAYER = 1
+RECORD_ENEMY = 2
+
+# Payload length that marks a removed record
+REMOVED = 0xFFFF
+# Length flag: the payload is a byte patch against the baseline record
+PATCH = 0x8000
+
+WORLD_RECORD = struct.Struct("<BI")            # game state, coins collected (+ bitsets)
+PLAYER_RECORD = struct.Struct("<iiBHIBHH")    # x, y, flags, invincible timer, score, lives, combo, dash cooldown
+# (timers in milliseconds)
+ENEMY_RECORD = struct.Struct("<ii")            # x, y
+
+# Player flag bits
+FLAG_FACING_RIGHT = 1
+FLAG_INVINCIBLE = 2
+FLAG_DASHING = 4
+FLAG_IMMORTAL = 8
+FLAG_ON_GROUND = 16
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def pack_header(packet_type):
+    return HEADER.pack(MAGIC, PROTOCOL_VERSION, packet_type)
+
+
+def unpack_header(data):
+    """Return the packet type, raising ProtocolError on foreign packets"""
+    if len(data) < HEADER.size:
+        raise ProtocolError("short packet")
+    magic, version, packet_type = HEADER.unpack_from(data)
+    if magic != MAGIC or version != PROTOCOL_VERSION:
+        raise ProtocolError("not a game packet")
+    return packet_type
+
+
+def pack_bits(flags):
+    """Pack a sequence of booleans into bytes, eight per byte"""
+    out = bytearray((len(flags) + 7) // 8)
+    for i, flag in enumerate(flags):
+        if flag:
+            out[i >> 3] |= 1 << (i & 7)
+    return bytes(out)
+
+
+def unpack_bits(data, count):
+    return [bool(data[i >> 3] & (1 << (i & 7))) for i in range(count)]
+
+
+# ------------- Records -------------
+def player_record(player):
+    flags = ((FLAG_FACING_RIGHT if player.facing_right else 0) |
+             (FLAG_INVINCIBLE if player.invincible else 0) |
+             (FLAG_DASHING if player.is_dashing else 0) |
+             (FLAG_IMMORTAL if player.immortal else 0) |
+             (FLAG_ON_GROUND if player.on_ground else 0))
+    return PLAYER_RECORD.pack(
+        player.rect.x, player.rect.y, flags, min(round(player.invincible_timer * 1000), 0xFFFF),
+        player.score & 0xFFFFFFFF, max(player.lives, 0) & 0xFF, player.combo & 0xFFFF,
+        min(round(player.dash_cooldown_timer * 1000), 0xFFFF))
+
+
+def apply_player_record(player, payload):
+    (player.rect.x, player.rect.y, flags, invincible_ms, player.score,
+     player.lives, player.combo, dash_cooldown_ms) = PLAYER_RECORD.unpack(payload)
+    player.invincible_timer = invincible_ms / 1000
+    player.dash_cooldown_timer = dash_cooldown_ms / 1000
+    player.facing_right = bool(flags & FLAG_FACING_RIGHT)
+    player.invincible = bool(flags & FLAG_INVINCIBLE)
+    player.is_dashing = bool(flags & FLAG_DASHING)
+    player.immortal = bool(flags & FLAG_IMMORTAL)
+    player.on_ground = bool(flags & FLAG_ON_GROUND)
+
+
+def world_record(game):
+    return (WORLD_RECORD.pack(game.state, game.coins_collected) +
+            pack_bits([coin.collected for coin in game.coins]) +
+            pack_bits([powerup.collected for powerup in game.powerups]))
+
+
+def apply_world_record(game, payload):
+    game.state, game.coins_collected = WORLD_RECORD.unpack_from(payload)
+    coin_bytes = (len(game.coins) + 7) // 8
+    offset = WORLD_RECORD.size
+    for coin, collected in zip(game.coins, unpack_bits(payload[offset:], len(game.coins))):
+        coin.collected = collected
+    offset += coin_bytes
+    for powerup, collected in zip(game.powerups, unpack_bits(payload[offset:], len(game.powerups))):
+        powerup.collected = collected
+
+
+def enemy_record(enemy):
+    return ENEMY_RECORD.pack(enemy.rect.x, enemy.rect.y)
+
+
+def apply_enemy_record(enemy, payload):
+    enemy.rect.x, enemy.rect.y = ENEMY_RECORD.unpack(payload)
+
+
+def make_patch(old, new):
+    """Bitmask of changed byte positions followed by the changed bytes"""
+    mask = bytearray((len(new) + 7) // 8)
+    changed = bytearray()
+    for i, (a, b) in enumerate(zip(old, new)):
+        if a != b:
+            mask[i >> 3] |= 1 << (i & 7)
+            changed.append(b)
+    return bytes(mask) + bytes(changed)
+
+
+def apply_patch(old, patch):
+    out = bytearray(old)
+    mask_size = (len(old) + 7) // 8
+    pos = mask_size
+    for i in range(len(old)):
+        if patch[i >> 3] & (1 << (i & 7)):
+            out[i] = patch[pos]
+            pos += 1
+    return bytes(out), pos
+
+
+# ------------- Snapshots -------------
+def encode_delta(records, baseline=None, removable_kinds=(RECORD_PLAYER,), patch_cache=None):
+    """Encode records as entries against baseline (None = everything)
+
+    Returns (entry bytes, entry count). Only records whose kind is in
+    removable_kinds are reported as removed when they are missing; other
+    kinds (e.g. enemies outside a client's interest area) are simply left
+    unchanged on the client. Clients mostly share baselines, so the server
+    passes one patch_cache dict per tick to avoid diffing the same pair of
+    records once per client.
+    """
+    parts = []
+    count = 0
+    for key, payload in records.items():
+        old = baseline.get(key) if baseline is not None else None
+        if old == payload:
+            continue
+        if old is not None and len(old) == len(payload):
+            if patch_cache is None:
+                patch = make_patch(old, payload)
+            else:
+                patch = patch_cache.get((old, payload))
+                if patch is None:
+                    patch = patch_cache[(old, payload)] = make_patch(old, payload)
+            if len(patch) < len(payload):
+                parts.append(ENTRY.pack(key[0], key[1], PATCH | len(payload)))
+                parts.append(patch)
+                count += 1
+                continue
+        parts.append(ENTRY.pack(key[0], key[1], len(payload)))
+        parts.append(payload)
+        count += 1
+    if baseline is not None:
+        for key in baseline:
+            if key[0] in removable_kinds and key not in records:
+                parts.append(ENTRY.pack(key[0], key[1], REMOVED))
+                count += 1
+    return b"".join(parts), count
+
+
+def snapshot_packet(tick, baseline_tick, client_id, deltas):
+    """Assemble a snapshot from one or more encode_delta() results"""
+    body = SNAPSHOT_BODY.pack(tick, baseline_tick, client_id, sum(count for _, count in deltas))
+    return pack_header(SNAPSHOT) + body + b"".join(entries for entries, _ in deltas)
+
+
+def encode_snapshot(tick, baseline_tick, client_id, records, baseline=None):
+    """Encode a whole snapshot as a delta against baseline (None = full)"""
+    delta = encode_delta(records, baseline)
+    return snapshot_packet(tick, baseline_tick if baseline is not None else 0, client_id, [delta])
+
+
+def decode_snapshot(data, baselines):
+    """Rebuild a full record dict from a snapshot packet
+
+    baselines maps tick -> records for snapshots already decoded. Returns
+    (tick, client_id, records), or None if the baseline is no longer known.
+    """
+    offset = HEADER.size
+    tick, baseline_tick, client_id, count = SNAPSHOT_BODY.unpack_from(data, offset)
+    offset += SNAPSHOT_BODY.size
+    if baseline_tick:
+        baseline = baselines.get(baseline_tick)
+        if baseline is None:
+            return None
+        records = dict(baseline)
+    else:
+        records = {}
+    for _ in range(count):
+        kind, record_id, length = ENTRY.unpack_from(data, offset)
+        offset += ENTRY.size
+        if length == REMOVED:
+            records.pop((kind, record_id), None)
+            continue
+        if length & PATCH:
+            old = records.get((kind, record_id))
+            if old is None:
+                raise ProtocolError("patch for a record missing from the baseline")
+            records[(kind, record_id)], used = apply_patch(old, data[offset:])
+            offset += used
+            continue
+        records[(kind, record_id)] = bytes(data[offset:offset + length])
+        offset += length
+    return tick, client_id, records
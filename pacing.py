@@ -0,0 +1,175 @@
+"""
+Frame pacing and frame-time statistics
+
+Three ways to wait for the next frame:
+
+  sleep     Clock.tick(fps): sleeps the OS scheduler's way. Cheap on CPU,
+            but a wake-up can land a millisecond or more late.
+  hybrid    time.sleep() until HYBRID_SPIN_MARGIN before the deadline, then
+            Clock.tick_busy_loop(fps) spins for the rest. Burns a little
+            CPU for much steadier frame times.
+  uncapped  Clock.tick() without a limit, to measure headroom.
+
+Whatever the mode, FrameStats keeps a histogram of frame times with jitter
+and missed-deadline counts. Pick the mode with GAME_PACING (or --pacing in
+main.py) and set GAME_FRAME_STATS=1 to print the numbers on exit.
+"""
+import math
+import os
+import time
+
+import pygame
+
+SLEEP = "sleep"
+HYBRID = "hybrid"
+UNCAPPED = "uncapped"
+MODES = (SLEEP, HYBRID, UNCAPPED)
+
+PACING_ENV = "GAME_PACING"
+STATS_ENV = "GAME_FRAME_STATS"
+
+# Spin (instead of sleep) for this long before each deadline in hybrid mode
+HYBRID_SPIN_MARGIN = 0.002
+# A frame longer than the target period plus this missed its deadline
+MISS_TOLERANCE = 0.001
+
+BUCKET_MS = 0.25
+BUCKET_COUNT = 400      # 0..100 ms, longer frames go in the last bucket
+
+
+class FrameStats:
+    """Histogram of frame times in BUCKET_MS buckets, plus jitter and misses"""
+
+    def __init__(self, fps):
+        self.target = 1.0 / fps if fps else 0.0
+        self.reset()
+
+    def reset(self):
+        self.buckets = [0] * BUCKET_COUNT
+        self.frames = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.longest = 0.0
+        self.missed = 0
+        self.jitter_total = 0.0
+        self.previous = None
+
+    def add(self, frame_time):
+        index = int(frame_time * 1000 / BUCKET_MS)
+        self.buckets[index if index < BUCKET_COUNT else BUCKET_COUNT - 1] += 1
+        self.frames += 1
+        self.total += frame_time
+        self.total_sq += frame_time * frame_time
+        if frame_time > self.longest:
+            self.longest = frame_time
+        if self.target and frame_time > self.target + MISS_TOLERANCE:
+            self.missed += 1
+        # Frame-to-frame change is what shows up on screen as microstutter
+        if self.previous is not None:
+            self.jitter_total += abs(frame_time - self.previous)
+        self.previous = frame_time
+
+    def percentile(self, p):
+        """Frame time in ms at percentile p (upper edge of its bucket)"""
+        if not self.frames:
+            return 0.0
+        wanted = math.ceil(self.frames * p / 100)
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= wanted:
+                return (index + 1) * BUCKET_MS
+        return BUCKET_COUNT * BUCKET_MS
+
+    def summary(self):
+        frames = max(self.frames, 1)
+        mean = self.total / frames
+        variance = max(self.total_sq / frames - mean * mean, 0.0)
+        return {
+            "frames": self.frames,
+            "fps": frames / self.total if self.total else 0.0,
+            "mean_ms": mean * 1000,
+            "stdev_ms": math.sqrt(variance) * 1000,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.longest * 1000,
+            "jitter_ms": self.jitter_total / max(self.frames - 1, 1) * 1000,
+            "missed": self.missed,
+        }
+
+    def report(self):
+        s = self.summary()
+        return (f"{s['frames']} frames, {s['fps']:.1f} fps, mean {s['mean_ms']:.2f} ms "
+                f"(p50 {s['p50_ms']:.2f} / p95 {s['p95_ms']:.2f} / p99 {s['p99_ms']:.2f} / max {s['max_ms']:.2f}), "
+                f"jitter {s['jitter_ms']:.2f} ms, {s['missed']} missed deadlines")
+
+    def histogram(self, width=40):
+        """Text histogram of the non-empty range, one line per millisecond"""
+        per_ms = int(1 / BUCKET_MS)
+        rows = [sum(self.buckets[i:i + per_ms]) for i in range(0, BUCKET_COUNT, per_ms)]
+        used = [i for i, count in enumerate(rows) if count]
+        if not used:
+            return ""
+        peak = max(rows)
+        lines = []
+        for ms in range(used[0], used[-1] + 1):
+            bar = "#" * (rows[ms] * width // peak)
+            lines.append(f"{ms:3d}-{ms + 1:<3d} ms {rows[ms]:7d} {bar}")
+        return "\n".join(lines)
+
+
+class FramePacer:
+    """Waits for the next frame in the chosen mode and records frame times"""
+
+    def __init__(self, fps, mode=None, idle=None):
+        mode = mode or os.environ.get(PACING_ENV) or SLEEP
+        if mode not in MODES:
+            raise ValueError(f"unknown pacing mode {mode!r} (expected one of {', '.join(MODES)})")
+        self.fps = fps
+        self.mode = mode
+        self.idle = idle        # called once per frame before spinning in hybrid mode
+        self.clock = pygame.time.Clock()
+        self.stats = FrameStats(0 if mode == UNCAPPED else fps)
+        self.last = None
+
+    def wait(self):
+        """Block until the next frame is due; returns milliseconds since the last one"""
+        if self.mode == SLEEP:
+            self.clock.tick(self.fps)
+        elif self.mode == HYBRID:
+            if self.last is not None:
+                remaining = self.last + 1.0 / self.fps - time.perf_counter() - HYBRID_SPIN_MARGIN
+                if remaining > 0:
+                    time.sleep(remaining)
+            if self.idle is not None:
+                self.idle()
+            self.clock.tick_busy_loop(self.fps)
+        else:
+            self.clock.tick()
+        now = time.perf_counter()
+        if self.last is None:
+            self.last = now
+            return 0
+        frame_time = now - self.last
+        self.last = now
+        self.stats.add(frame_time)
+        return frame_time * 1000
+
+    def resume(self):
+        """Forget the last frame time, e.g. after sleeping on an idle screen"""
+        self.last = None
+
+    def overlay_text(self):
+        """One line for an on-screen stats overlay"""
+        s = self.stats
+        return (f"{self.mode} {self.clock.get_fps():.0f} fps  p99 {s.percentile(99):.1f} ms  "
+                f"jitter {s.jitter_total / max(s.frames - 1, 1) * 1000:.2f} ms  missed {s.missed}")
+
+    def get_fps(self):
+        return self.clock.get_fps()
+
+    def report_if_requested(self):
+        if os.environ.get(STATS_ENV):
+            print(f"pacing {self.mode}: {self.stats.report()}")
+            print(self.stats.histogram(), flush=True)
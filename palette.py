@@ -0,0 +1,132 @@
+"""
+8-bit palette-indexed render mode for low-memory machines
+
+The art only uses a few dozen colours: the named ones in constants.py, a
+handful of shades hard-coded in the painters and draw methods, and the sky
+gradient. In this mode the world surface and every cached sprite (baked
+layers like the runner's ground included) are 8-bit surfaces sharing one
+256-colour palette, a quarter of the memory of 32-bit pixels, and
+sprite blits copy bytes between identical palettes. The world is converted
+to the display format once per frame, when it is presented; the HUD and
+menus are still drawn in full colour on the display.
+
+Sprites are mapped to their nearest palette colours once, when they are
+baked (exactly with NumPy, else by SDL's 3-3-2 colour lookup). 8-bit
+sprites have no per-pixel alpha: a pixel is transparent below half
+opacity and opaque above it, so soft glows are best left to the bloom
+stage (postfx.py).
+
+Enable with GAME_PALETTE=1 (or --palette in main.py); surface backend only.
+"""
+import os
+
+import pygame
+import constants
+
+try:
+    import numpy
+except ImportError:     # optional: sprites are then mapped by SDL
+    numpy = None
+
+PALETTE_ENV = "GAME_PALETTE"
+KEY_COLOR = (255, 0, 255)   # palette entry 0: transparent pixels, never drawn
+KEY_INDEX = 0
+ALPHA_THRESHOLD = 128
+
+# Shades hard-coded in painters and draw methods (coin, enemy, platform,
+# player borders, particles, power-ups, the runner)
+ART_COLORS = (
+    (100, 80, 0), (200, 180, 0), (255, 215, 0), (255, 255, 200),
+    (0, 150, 0), (100, 50, 15), (180, 100, 30), (90, 40, 10),
+    (255, 50, 50), (50, 150, 255),
+    (100, 150, 255), (150, 150, 150), (150, 150, 200), (200, 100, 255), (200, 200, 200),
+    (200, 200, 255), (255, 255, 100), (255, 50, 200), (50, 100, 200), (255, 100, 255),
+    (200, 40, 40), (60, 60, 60), (80, 40, 160), (255, 200, 40), (20, 20, 20),
+    (220, 220, 220), (30, 30, 30), (80, 50, 20), (255, 80, 80),
+)
+# Gradients drawn in the world, every step of which gets an entry
+RAMPS = ((constants.SKY_BLUE, constants.SKY_BOTTOM),)
+GREY_LEVELS = 16
+CUBE_LEVELS = 5     # an even spread of everything else (antialiased edges, text)
+
+
+def enabled(value=None):
+    """value, else $GAME_PALETTE"""
+    if value is None:
+        return os.environ.get(PALETTE_ENV, "") not in ("", "0")
+    return value
+
+
+def build_palette():
+    """The 256 colours: transparent key, art colours, ramps, greys, then a colour cube"""
+    colors = [KEY_COLOR]
+    named = [value for name, value in vars(constants).items()
+             if name.isupper() and isinstance(value, tuple) and len(value) == 3
+             and all(isinstance(c, int) and 0 <= c <= 255 for c in value)]
+    colors += named
+    colors += ART_COLORS
+    for start, end in RAMPS:
+        steps = max(abs(b - a) for a, b in zip(start, end))
+        colors += [tuple(a + (b - a) * i // steps for a, b in zip(start, end)) for i in range(steps + 1)]
+    colors += [(v, v, v) for v in range(0, 256, 255 // (GREY_LEVELS - 1))]
+    levels = [round(i * 255 / (CUBE_LEVELS - 1)) for i in range(CUBE_LEVELS)]
+    colors += [(r, g, b) for r in levels for g in levels for b in levels]
+    unique = list(dict.fromkeys(colors))
+    if KEY_COLOR in unique[1:]:
+        unique.remove(KEY_COLOR)
+        unique.insert(0, KEY_COLOR)
+    unique = unique[:256]
+    return unique + [(0, 0, 0)] * (256 - len(unique))
+
+
+PALETTE = build_palette()
+
+
+def new_surface(size):
+    """A blank 8-bit surface with the game palette"""
+    surface = pygame.Surface(size, 0, 8)
+    surface.set_palette(PALETTE)
+    return surface
+
+
+def nearest_indices(rgb):
+    """Palette index closest to each colour of an (..., 3) array"""
+    codes = (rgb[..., 0].astype(numpy.int32) << 16) | (rgb[..., 1].astype(numpy.int32) << 8) | rgb[..., 2]
+    unique, inverse = numpy.unique(codes, return_inverse=True)
+    colors = numpy.stack([unique >> 16, (unique >> 8) & 0xFF, unique & 0xFF], axis=1)
+    table = numpy.array(PALETTE[1:], dtype=numpy.int32)   # never map onto the key
+    distance = ((colors[:, None, :] - table[None, :, :]) ** 2).sum(axis=2)
+    return (distance.argmin(axis=1) + 1).astype(numpy.uint8)[inverse].reshape(codes.shape)
+
+
+def to_indexed(surface):
+    """8-bit copy of surface on the game palette; transparent pixels use the colour key"""
+    has_alpha = bool(surface.get_flags() & pygame.SRCALPHA)
+    if numpy is None:
+        if has_alpha:
+            # SDL ignores per-pixel alpha here: paint transparent pixels the key first
+            opaque = pygame.Surface(surface.get_size())
+            opaque.fill(KEY_COLOR)
+            for x in range(surface.get_width()):
+                for y in range(surface.get_height()):
+                    color = surface.get_at((x, y))
+                    if color.a >= ALPHA_THRESHOLD:
+                        opaque.set_at((x, y), color[:3])
+            surface = opaque
+        indexed = surface.convert(new_surface((1, 1)))
+    else:
+        indexed = new_surface(surface.get_size())
+        indices = nearest_indices(pygame.surfarray.pixels3d(surface))
+        if has_alpha:
+            indices[pygame.surfarray.pixels_alpha(surface) < ALPHA_THRESHOLD] = KEY_INDEX
+        pixels = pygame.surfarray.pixels2d(indexed)
+        pixels[:] = indices
+        del pixels
+    if has_alpha:
+        indexed.set_colorkey(KEY_COLOR)
+    return indexed
+
+
+def surface_bytes(surface):
+    """Pixel memory of a surface"""
+    return surface.get_pitch() * surface.get_height()
@@ -5,10 +5,14 @@ import pygame
 import random
 import math
 from constants import *
+from timestep import STEP
 
 
 class Particle:
-    def __init__(self, x, y, color, vel_x=0, vel_y=0, lifetime=30, size=4):
+    __slots__ = ("x", "y", "color", "vel_x", "vel_y", "lifetime", "max_lifetime", "size")
+    gravity = 1080  # px/s²
+    
+    def __init__(self, x, y, color, vel_x=0, vel_y=0, lifetime=0.5, size=4):
         self.x = x
         self.y = y
         self.color = color
@@ -17,86 +21,120 @@ class Particle:
         self.lifetime = lifetime
         self.max_lifetime = lifetime
         self.size = size
-        self.gravity = 0.3
         
-    def update(self):
-        self.x += self.vel_x
-        self.y += self.vel_y
-        self.vel_y += self.gravity
-        self.lifetime -= 1
+    def update(self, dt=STEP):
+        self.x += self.vel_x * dt
+        self.y += self.vel_y * dt
+        self.vel_y += self.gravity * dt
+        self.lifetime -= dt
         
     def is_dead(self):
         return self.lifetime <= 0
         
     def draw(self, screen):
         alpha = int((self.lifetime / self.max_lifetime) * 255)
-        surf = pygame.Surface((self.size * 2, self.size * 2))
-        surf.set_alpha(alpha)
-        surf.set_colorkey((0, 0, 0))
-        pygame.draw.circle(surf, self.color, (self.size, self.size), self.size)
+        surf = get_particle_sprite(self.color, self.size, alpha)
         screen.blit(surf, (int(self.x - self.size), int(self.y - self.size)))
 
 
+# Faded particle sprites, keyed by (color, size, alpha step)
+ALPHA_STEPS = 32
+_particle_sprites = {}
+
+
+def get_particle_sprite(color, size, alpha):
+    """Return a shared circle sprite for a particle, faded to roughly alpha"""
+    step = alpha * ALPHA_STEPS // 256
+    key = (color, size, step)
+    surf = _particle_sprites.get(key)
+    if surf is None:
+        surf = pygame.Surface((size * 2, size * 2))
+        surf.set_alpha(step * 256 // ALPHA_STEPS)
+        surf.set_colorkey((0, 0, 0))
+        pygame.draw.circle(surf, color, (size, size), size)
+        _particle_sprites[key] = surf
+    return surf
+
+
 class ParticleSystem:
-    def __init__(self):
+    def __init__(self, enabled=True, rng=None):
         self.particles = []
+        # Headless simulations (e.g. the network server) skip cosmetic particles
+        self.enabled = enabled
+        # Cosmetic random stream, so effects never shift the gameplay stream
+        self.rng = rng or random.Random()
         
     def emit_jump(self, x, y):
         """Emit particles when player jumps"""
+        if not self.enabled:
+            return
+        rng = self.rng
         for _ in range(8):
-            angle = random.uniform(0.5 * math.pi, 1.5 * math.pi)  # Downward spread
-            speed = random.uniform(2, 5)
+            angle = rng.uniform(0.5 * math.pi, 1.5 * math.pi)  # Downward spread
+            speed = rng.uniform(120, 300)
             vel_x = math.cos(angle) * speed
             vel_y = math.sin(angle) * speed
-            color = random.choice([WHITE, (200, 200, 255), (150, 150, 200)])
-            self.particles.append(Particle(x, y, color, vel_x, vel_y, lifetime=25))
+            color = rng.choice([WHITE, (200, 200, 255), (150, 150, 200)])
+            self.particles.append(Particle(x, y, color, vel_x, vel_y, lifetime=0.4))
             
     def emit_landing(self, x, y):
         """Emit particles when player lands"""
+        if not self.enabled:
+            return
+        rng = self.rng
         for _ in range(10):
-            angle = random.uniform(-0.3 * math.pi, -0.7 * math.pi)  # Upward spread
-            speed = random.uniform(1, 4)
+            angle = rng.uniform(-0.3 * math.pi, -0.7 * math.pi)  # Upward spread
+            speed = rng.uniform(60, 240)
             vel_x = math.cos(angle) * speed
             vel_y = math.sin(angle) * speed
-            color = random.choice([(200, 200, 200), (150, 150, 150), WHITE])
-            self.particles.append(Particle(x, y, color, vel_x, vel_y, lifetime=20))
+            color = rng.choice([(200, 200, 200), (150, 150, 150), WHITE])
+            self.particles.append(Particle(x, y, color, vel_x, vel_y, lifetime=0.33))
             
     def emit_dash(self, x, y, facing_right):
         """Emit particles when player dashes"""
+        if not self.enabled:
+            return
+        rng = self.rng
         for _ in range(3):
-            vel_x = random.uniform(-2, 2)
-            vel_y = random.uniform(-1, 1)
+            vel_x = rng.uniform(-120, 120)
+            vel_y = rng.uniform(-60, 60)
             if facing_right:
-                vel_x -= 3
+                vel_x -= 180
             else:
-                vel_x += 3
-            color = random.choice([BLUE, (100, 150, 255), (50, 100, 200)])
-            self.particles.append(Particle(x, y, color, vel_x, vel_y, lifetime=15, size=5))
+                vel_x += 180
+            color = rng.choice([BLUE, (100, 150, 255), (50, 100, 200)])
+            self.particles.append(Particle(x, y, color, vel_x, vel_y, lifetime=0.25, size=5))
             
     def emit_coin_collect(self, x, y):
         """Emit particles when collecting a coin"""
+        if not self.enabled:
+            return
+        rng = self.rng
         for _ in range(12):
-            angle = random.uniform(0, 2 * math.pi)
-            speed = random.uniform(2, 6)
+            angle = rng.uniform(0, 2 * math.pi)
+            speed = rng.uniform(120, 360)
             vel_x = math.cos(angle) * speed
             vel_y = math.sin(angle) * speed
-            color = random.choice([YELLOW, (255, 215, 0), (255, 255, 100)])
-            self.particles.append(Particle(x, y, color, vel_x, vel_y, lifetime=30, size=3))
+            color = rng.choice([YELLOW, (255, 215, 0), (255, 255, 100)])
+            self.particles.append(Particle(x, y, color, vel_x, vel_y, lifetime=0.5, size=3))
             
     def emit_combo(self, x, y):
         """Emit particles for combo effects"""
+        if not self.enabled:
+            return
+        rng = self.rng
         for _ in range(5):
-            angle = random.uniform(-math.pi/2, -math.pi/6)
-            speed = random.uniform(1, 3)
+            angle = rng.uniform(-math.pi/2, -math.pi/6)
+            speed = rng.uniform(60, 180)
             vel_x = math.cos(angle) * speed
             vel_y = math.sin(angle) * speed
-            color = random.choice([(255, 100, 255), (255, 50, 200), (200, 100, 255)])
-            self.particles.append(Particle(x, y, color, vel_x, vel_y, lifetime=35, size=4))
+            color = rng.choice([(255, 100, 255), (255, 50, 200), (200, 100, 255)])
+            self.particles.append(Particle(x, y, color, vel_x, vel_y, lifetime=0.6, size=4))
             
-    def update(self):
+    def update(self, dt=STEP):
         # Update all particles
         for particle in self.particles:
-            particle.update()
+            particle.update(dt)
         # Remove dead particles
         self.particles = [p for p in self.particles if not p.is_dead()]
         
@@ -0,0 +1,65 @@
+"""
+Platform class for ground and floating platforms
+"""
+import pygame
+from constants import *
+from assets import get_sprite
+
+
+class Platform:
+    __slots__ = ("rect",)
+    
+    def __init__(self, x, y, width, height):
+        self.rect = pygame.Rect(x, y, width, height)
+        
+    def world_bounds(self):
+        """Area this platform can ever cover (for the spatial index)"""
+        return self.rect
+        
+    def draw(self, screen):
+        """Draw platform with enhanced 3D-like effect"""
+        size = self.rect.size
+        screen.blit(get_sprite("platform", size, paint_platform, size[0], size[1]), self.rect)
+
+
+def paint_platform(surf, width, height):
+    """Paint a platform sprite of the given size (baked once per size)"""
+    rect = pygame.Rect(0, 0, width, height)
+    # Main platform
+    pygame.draw.rect(surf, BROWN, rect)
+
+    # Top highlight (lighter brown)
+    highlight_rect = pygame.Rect(0, 0, width, 5)
+    pygame.draw.rect(surf, (180, 100, 30), highlight_rect)
+
+    # Side shadow (darker brown)
+    shadow_rect = pygame.Rect(0, height - 5, width, 5)
+    pygame.draw.rect(surf, (90, 40, 10), shadow_rect)
+
+    # Border
+    pygame.draw.rect(surf, BLACK, rect, 2)
+
+    # Add brick pattern for ground
+    if height > 30:  # Only for ground/thick platforms
+        for x in range(0, width, 40):
+            for y in range(10, height - 5, 20):
+                pygame.draw.line(surf, (100, 50, 15), (x, y), (x + 20, y), 1)
+
+
+def create_level_1():
+    """Create the first level with platforms"""
+    platforms = []
+    
+    # Ground
+    ground = Platform(0, SCREEN_HEIGHT - GROUND_HEIGHT, SCREEN_WIDTH, GROUND_HEIGHT)
+    platforms.append(ground)
+    
+    # Floating platforms
+    platforms.append(Platform(150, 450, 150, PLATFORM_HEIGHT))
+    platforms.append(Platform(400, 380, 120, PLATFORM_HEIGHT))
+    platforms.append(Platform(600, 450, 150, PLATFORM_HEIGHT))
+    platforms.append(Platform(300, 280, 150, PLATFORM_HEIGHT))
+    platforms.append(Platform(550, 200, 120, PLATFORM_HEIGHT))
+    platforms.append(Platform(100, 180, 100, PLATFORM_HEIGHT))
+    
+    return platforms
@@ -2,17 +2,26 @@
 Player character class
 """
 import pygame
+import scratch
 from constants import *
+from timestep import STEP, countdown
+from assets import get_sprite
+from controls import Controls
+
+DOUBLE_JUMP_FACTOR = 0.85  # Slightly weaker than first jump
+DECELERATION = 0.8  # Share of vel_x kept per STEP without input
+FLASH_RATE = 6  # Invincibility flashes per second
 
 
 class Player(pygame.sprite.Sprite):
-    def __init__(self, x, y):
+    def __init__(self, x, y, world_width=SCREEN_WIDTH, color=PLAYER_COLOR):
         super().__init__()
-        self.image = pygame.Surface((PLAYER_WIDTH, PLAYER_HEIGHT))
-        self.image.fill(PLAYER_COLOR)
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
+        self.rect = pygame.Rect(x, y, PLAYER_WIDTH, PLAYER_HEIGHT)
+        # Position past the whole pixels in rect, so slow moves add up
+        self.sub_x = 0.0
+        self.sub_y = 0.0
+        self.world_width = world_width
+        self.color = color
         
         # Movement
         self.vel_x = 0
@@ -24,7 +33,7 @@ class Player(pygame.sprite.Sprite):
         self.score = 0
         self.lives = 5  # More lives!
         self.invincible = False
-        self.invincible_timer = 0
+        self.invincible_timer = 0.0
         self.immortal = True  # IMMORTAL MODE - player never dies!
         
         # Double jump feature
@@ -32,63 +41,70 @@ class Player(pygame.sprite.Sprite):
         self.has_double_jumped = False
         
         # Dash ability
-        self.dash_speed = 20
-        self.dash_duration = 10
-        self.dash_cooldown = 40  # frames
-        self.dash_timer = 0
-        self.dash_cooldown_timer = 0
+        self.dash_speed = 1200  # px/s
+        self.dash_duration = 1 / 6  # seconds
+        self.dash_cooldown = 2 / 3  # seconds
+        self.dash_timer = 0.0
+        self.dash_cooldown_timer = 0.0
         self.is_dashing = False
         
         # Combo system
         self.combo = 0
-        self.combo_timer = 0
-        self.combo_max_time = 180  # 3 seconds to continue combo
+        self.combo_timer = 0.0
+        self.combo_max_time = 3.0  # seconds to continue combo
         
         # Power-up modifiers
         self.speed_boost = 1.0
         self.jump_boost = 1.0
         
-    def update(self, platforms, speed_boost=1.0, jump_boost=1.0):
+        # Game bookkeeping: active power-up effects and state for particle triggers
+        self.active_powerups = []
+        self.was_on_ground = False
+        self.was_dashing = False
+        
+    def update(self, platforms, speed_boost=1.0, jump_boost=1.0, controls=None, dt=STEP, substeps=1):
+        """Advance dt seconds, moving and colliding in that many equal substeps"""
         # Store power-up modifiers
         self.speed_boost = speed_boost
         self.jump_boost = jump_boost
         # Update invincibility timer
         if self.invincible:
-            self.invincible_timer -= 1
-            if self.invincible_timer <= 0:
+            self.invincible_timer = countdown(self.invincible_timer, dt)
+            if self.invincible_timer == 0:
                 self.invincible = False
         
         # Update combo timer
         if self.combo_timer > 0:
-            self.combo_timer -= 1
-            if self.combo_timer <= 0:
+            self.combo_timer = countdown(self.combo_timer, dt)
+            if self.combo_timer == 0:
                 self.combo = 0
         
         # Update dash cooldown
         if self.dash_cooldown_timer > 0:
-            self.dash_cooldown_timer -= 1
+            self.dash_cooldown_timer = countdown(self.dash_cooldown_timer, dt)
         
         # Update dash
         if self.is_dashing:
-            self.dash_timer -= 1
-            if self.dash_timer <= 0:
+            self.dash_timer = countdown(self.dash_timer, dt)
+            if self.dash_timer == 0:
                 self.is_dashing = False
         
-        # Get key presses
-        keys = pygame.key.get_pressed()
+        # Get key presses (unless controls come from elsewhere, e.g. the network)
+        if controls is None:
+            controls = Controls.from_keys(pygame.key.get_pressed())
         
         # Dash ability (Shift key)
-        if (keys[pygame.K_LSHIFT] or keys[pygame.K_RSHIFT]) and not self.is_dashing and self.dash_cooldown_timer == 0:
+        if controls.dash and not self.is_dashing and self.dash_cooldown_timer == 0:
             self.is_dashing = True
             self.dash_timer = self.dash_duration
             self.dash_cooldown_timer = self.dash_cooldown
         
         # Horizontal movement with acceleration
         target_vel_x = 0
-        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
+        if controls.left:
             target_vel_x = -PLAYER_SPEED * self.speed_boost
             self.facing_right = False
-        if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
+        if controls.right:
             target_vel_x = PLAYER_SPEED * self.speed_boost
             self.facing_right = True
         
@@ -103,37 +119,49 @@ class Player(pygame.sprite.Sprite):
         if target_vel_x != 0:
             self.vel_x = target_vel_x
         else:
-            self.vel_x *= 0.8  # Smooth deceleration
+            self.vel_x *= DECELERATION ** (dt / STEP)  # Smooth deceleration
             
         # Jumping with double jump
-        if (keys[pygame.K_SPACE] or keys[pygame.K_UP] or keys[pygame.K_w]):
+        if controls.jump:
             if self.on_ground:
                 self.vel_y = JUMP_STRENGTH * self.jump_boost
                 self.on_ground = False
                 self.has_double_jumped = False
             elif self.can_double_jump and not self.has_double_jumped:
                 # Double jump!
-                self.vel_y = JUMP_STRENGTH * 0.85 * self.jump_boost  # Slightly weaker than first jump
+                self.vel_y = JUMP_STRENGTH * DOUBLE_JUMP_FACTOR * self.jump_boost
                 self.has_double_jumped = True
             
+        step = dt / substeps
+        for _ in range(substeps):
+            self.move(platforms, step)
+            
+    def move(self, platforms, dt):
+        """Fall and move for dt seconds, stopping at platforms"""
         # Apply gravity
-        self.vel_y += GRAVITY
-        if self.vel_y > 20:  # Terminal velocity
-            self.vel_y = 20
+        self.vel_y += GRAVITY * dt
+        if self.vel_y > TERMINAL_VELOCITY:
+            self.vel_y = TERMINAL_VELOCITY
             
-        # Update position
-        self.rect.x += self.vel_x
+        # Update position (rect rounds to whole pixels; the rest carries over)
+        x = self.rect.x + self.sub_x + self.vel_x * dt
+        self.rect.x = x
+        self.sub_x = x - self.rect.x
         self.check_collisions_x(platforms)
         
-        self.rect.y += self.vel_y
-        self.on_ground = False
-        self.check_collisions_y(platforms)
-        
-        # Keep player on screen (horizontally)
+        # Keep player inside the world (horizontally)
         if self.rect.left < 0:
             self.rect.left = 0
-        if self.rect.right > SCREEN_WIDTH:
-            self.rect.right = SCREEN_WIDTH
+            self.sub_x = 0.0
+        if self.rect.right > self.world_width:
+            self.rect.right = self.world_width
+            self.sub_x = 0.0
+        
+        y = self.rect.y + self.sub_y + self.vel_y * dt
+        self.rect.y = y
+        self.sub_y = y - self.rect.y
+        self.on_ground = False
+        self.check_collisions_y(platforms)
             
     def check_collisions_x(self, platforms):
         """Check horizontal collisions with platforms"""
@@ -141,8 +169,10 @@ class Player(pygame.sprite.Sprite):
             if self.rect.colliderect(platform.rect):
                 if self.vel_x > 0:  # Moving right
                     self.rect.right = platform.rect.left
+                    self.sub_x = 0.0
                 elif self.vel_x < 0:  # Moving left
                     self.rect.left = platform.rect.right
+                    self.sub_x = 0.0
                     
     def check_collisions_y(self, platforms):
         """Check vertical collisions with platforms"""
@@ -150,25 +180,34 @@ class Player(pygame.sprite.Sprite):
             if self.rect.colliderect(platform.rect):
                 if self.vel_y > 0:  # Falling down
                     self.rect.bottom = platform.rect.top
+                    self.sub_y = 0.0
                     self.vel_y = 0
                     self.on_ground = True
                 elif self.vel_y < 0:  # Jumping up
                     self.rect.top = platform.rect.bottom
+                    self.sub_y = 0.0
+                    self.vel_y = 0
+        if not self.on_ground and self.vel_y >= 0:
+            # A short substep may not reach the next pixel: still standing if touching a top
+            below = self.rect.move(0, 1)
+            for platform in platforms:
+                if below.colliderect(platform.rect) and platform.rect.top == self.rect.bottom:
+                    self.sub_y = 0.0
                     self.vel_y = 0
+                    self.on_ground = True
+                    break
                     
     def draw(self, screen):
         """Draw player with enhanced visual"""
         # Flash when invincible
-        if self.invincible and self.invincible_timer % 10 < 5:
+        if self.invincible and self.invincible_timer * FLASH_RATE % 1 < 0.5:
             return  # Skip drawing to create flash effect
         
         # Draw dash trail effect
         if self.is_dashing:
             for i in range(3):
                 trail_alpha = 50 - (i * 15)
-                trail_surf = pygame.Surface((self.rect.width, self.rect.height))
-                trail_surf.set_alpha(trail_alpha)
-                trail_surf.fill(BLUE)
+                trail_surf = scratch.acquire(self.rect.size, alpha=trail_alpha, fill=BLUE)
                 offset = i * 8
                 if self.facing_right:
                     screen.blit(trail_surf, (self.rect.x - offset, self.rect.y))
@@ -178,37 +217,11 @@ class Player(pygame.sprite.Sprite):
         # Draw immortal glow effect
         if self.immortal:
             glow_size = 5
-            glow_surf = pygame.Surface((self.rect.width + glow_size*2, self.rect.height + glow_size*2))
-            glow_surf.set_alpha(100)
-            glow_surf.fill(YELLOW)
-            screen.blit(glow_surf, (self.rect.x - glow_size, self.rect.y - glow_size))
+            screen.glow(self.rect.inflate(glow_size*2, glow_size*2), YELLOW, 100)
             
-        # Main body with gradient effect (simulate by drawing multiple rects)
-        pygame.draw.rect(screen, PLAYER_COLOR, self.rect)
-        pygame.draw.rect(screen, (255, 50, 50), self.rect, 3)  # Border
-        
-        # Draw eyes
-        eye_size = 6
-        eye_y = self.rect.top + 15
-        if self.facing_right:
-            eye_x = self.rect.right - 18
-        else:
-            eye_x = self.rect.left + 18
-        
-        # White of eye
-        pygame.draw.circle(screen, WHITE, (eye_x, eye_y), eye_size)
-        # Pupil
-        pygame.draw.circle(screen, BLACK, (eye_x, eye_y), eye_size - 2)
-        
-        # Draw smile
-        mouth_y = self.rect.top + 30
-        if self.facing_right:
-            mouth_start = (self.rect.right - 25, mouth_y)
-            mouth_end = (self.rect.right - 10, mouth_y)
-        else:
-            mouth_start = (self.rect.left + 10, mouth_y)
-            mouth_end = (self.rect.left + 25, mouth_y)
-        pygame.draw.line(screen, BLACK, mouth_start, mouth_end, 3)
+        # Main body, eyes and smile are baked once per facing direction and colour
+        sprite = get_sprite("player", self.rect.size, paint_player, self.facing_right, self.color)
+        screen.blit(sprite, self.rect)
     
     def add_combo(self):
         """Add to combo counter"""
@@ -225,3 +238,34 @@ class Player(pygame.sprite.Sprite):
             return 2
         else:
             return 3
+
+
+def paint_player(surf, facing_right, color=PLAYER_COLOR):
+    """Paint the player body (baked once per facing direction and colour)"""
+    rect = surf.get_rect()
+    # Main body with gradient effect (simulate by drawing multiple rects)
+    pygame.draw.rect(surf, color, rect)
+    pygame.draw.rect(surf, tuple(min(c + 50, 255) for c in color), rect, 3)  # Border
+
+    # Draw eyes
+    eye_size = 6
+    eye_y = rect.top + 15
+    if facing_right:
+        eye_x = rect.right - 18
+    else:
+        eye_x = rect.left + 18
+
+    # White of eye
+    pygame.draw.circle(surf, WHITE, (eye_x, eye_y), eye_size)
+    # Pupil
+    pygame.draw.circle(surf, BLACK, (eye_x, eye_y), eye_size - 2)
+
+    # Draw smile
+    mouth_y = rect.top + 30
+    if facing_right:
+        mouth_start = (rect.right - 25, mouth_y)
+        mouth_end = (rect.right - 10, mouth_y)
+    else:
+        mouth_start = (rect.left + 10, mouth_y)
+        mouth_end = (rect.left + 25, mouth_y)
+    pygame.draw.line(surf, BLACK, mouth_start, mouth_end, 3)
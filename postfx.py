@@ -0,0 +1,300 @@
+"""
+Full-screen post-processing on surfarray pixel views
+
+Effects that used to be drawn object by object run as whole-frame passes
+over pygame.surfarray views with NumPy:
+
+  gradient  the sky is computed as one column of colours and broadcast
+            into a Surface once, then blitted, instead of one draw.line
+            per row every frame.
+  dim       the darkened backdrop of the pause and end screens shifts and
+            masks the packed 32-bit pixels in place when the dim halves,
+            quarters, ... every channel (alpha 128, 192, ...). Any other
+            alpha blends the translucent full-screen overlay as before:
+            SDL does that faster than NumPy can multiply every channel.
+  bloom     each glowing object (Layer.glow) is splatted into a quarter
+            resolution light buffer, box blurred, scaled up and added to
+            the frame, instead of a flat translucent rectangle. Blurring
+            is linear, so each glow's light is computed once per size and
+            colour and later frames only add it; that keeps it about as
+            cheap as the rectangles, not cheaper.
+  shake     combos kick a Shake whose offset scrolls the finished world.
+
+Every stage is timed (PostFX.times). GAME_QUALITY (or --quality in main.py)
+picks which stages run: off, low, medium or high. A stage that is off - or
+every stage, without NumPy - falls back to the per-object drawing.
+GAME_FRAME_STATS=1 prints the stage times on exit.
+"""
+import math
+import os
+import time
+
+import pygame
+import palette
+import scratch
+from pacing import STATS_ENV
+from timestep import STEP
+
+try:
+    import numpy
+except ImportError:     # optional: without it every stage is off
+    numpy = None
+
+QUALITY_ENV = "GAME_QUALITY"
+GRADIENT = "gradient"
+DIM = "dim"
+BLOOM = "bloom"
+SHAKE = "shake"
+STAGES = (GRADIENT, DIM, BLOOM, SHAKE)
+QUALITY_STAGES = {
+    "off": (),
+    "low": (GRADIENT, DIM),
+    "medium": (GRADIENT, DIM, SHAKE),
+    "high": STAGES,
+}
+DEFAULT_QUALITY = "high"
+
+BLOOM_DOWNSCALE = 4     # light buffer resolution divisor
+BLOOM_RADIUS = 3        # box blur radius, in light buffer pixels (two passes)
+BLOOM_STRENGTH = 1.5    # light added per unit of glow alpha
+BLOOM_MARGIN = 2 * BLOOM_RADIUS * BLOOM_DOWNSCALE   # how far light spreads, in pixels
+LIGHT_CACHE_SIZE = 64   # blurred glows kept, by size, colour and alpha
+
+SHAKE_MAX = 8.0         # pixels
+SHAKE_HALF_LIFE = 0.07  # seconds
+SHAKE_FREQUENCY = (174.0, 222.0)    # radians per second, x and y
+
+
+def quality_setting(quality=None):
+    """quality, else $GAME_QUALITY, else the default; validated"""
+    if quality is None:
+        quality = os.environ.get(QUALITY_ENV, DEFAULT_QUALITY)
+    if quality not in QUALITY_STAGES:
+        raise ValueError(f"quality must be one of {tuple(QUALITY_STAGES)}, got {quality!r}")
+    return quality
+
+
+class Gradient:
+    """Vertical gradient background, from top colour to bottom colour
+
+    Calling it paints the gradient one line per row (the per-object way);
+    PostFX draws it vectorised when the gradient stage is on.
+    """
+    __slots__ = ("top", "bottom")
+
+    def __init__(self, top, bottom):
+        self.top = tuple(top)
+        self.bottom = tuple(bottom)
+
+    def color(self, y, height):
+        return tuple(t + int((y / height) * (b - t)) for t, b in zip(self.top, self.bottom))
+
+    def __call__(self, surface):
+        width, height = surface.get_size()
+        for y in range(height):
+            pygame.draw.line(surface, self.color(y, height), (0, y), (width, y))
+
+
+class Shake:
+    """Screen shake amplitude, kicked by combos and decaying over time
+
+    The offset is a function of the time shaken, not a random stream, so
+    shaking never touches gameplay or cosmetic randomness.
+    """
+    __slots__ = ("amplitude", "time")
+
+    def __init__(self):
+        self.amplitude = 0.0
+        self.time = 0.0
+
+    def kick(self, strength):
+        self.amplitude = min(SHAKE_MAX, self.amplitude + strength)
+
+    def step(self, dt=STEP):
+        self.time += dt
+        self.amplitude *= 0.5 ** (dt / SHAKE_HALF_LIFE)
+        if self.amplitude < 0.5:
+            self.amplitude = 0.0
+
+    def offset(self):
+        """(dx, dy) for this frame, or None when still"""
+        if not self.amplitude:
+            return None
+        return (round(self.amplitude * math.sin(self.time * SHAKE_FREQUENCY[0])),
+                round(self.amplitude * math.cos(self.time * SHAKE_FREQUENCY[1])))
+
+
+class StageTimes:
+    """Time spent in each stage, whichever way it ran"""
+
+    def __init__(self):
+        self.total = dict.fromkeys(STAGES, 0.0)
+        self.calls = dict.fromkeys(STAGES, 0)
+
+    def add(self, stage, seconds):
+        self.total[stage] += seconds
+        self.calls[stage] += 1
+
+    def summary(self):
+        return {stage: {"calls": self.calls[stage],
+                        "mean_ms": self.total[stage] / self.calls[stage] * 1000 if self.calls[stage] else 0.0}
+                for stage in STAGES}
+
+    def report(self):
+        s = self.summary()
+        return ", ".join(f"{stage} {s[stage]['mean_ms']:.3f} ms x{s[stage]['calls']}"
+                         for stage in STAGES if s[stage]["calls"])
+
+
+def box_blur(light, radius):
+    """Blur a (width, height, 3) float array in place along both axes"""
+    size = 2 * radius + 1
+    for axis in (0, 1):
+        padded = numpy.pad(light, [(radius, radius) if a == axis else (0, 0) for a in range(3)])
+        summed = numpy.cumsum(padded, axis=axis)
+        if axis == 0:
+            light[0] = summed[size - 1]
+            light[1:] = summed[size:] - summed[:-size]
+        else:
+            light[:, 0] = summed[:, size - 1]
+            light[:, 1:] = summed[:, size:] - summed[:, :-size]
+        light /= size
+
+
+def packed_shift(factor):
+    """Right shift that scales every 8-bit channel by factor to within one level, or None
+
+    0 leaves the channels as they are and 8 clears them.
+    """
+    shift = min(range(9), key=lambda shift: abs(factor * 255 - (0xFF >> shift)))
+    return shift if abs(factor * 255 - (0xFF >> shift)) <= 1 else None
+
+
+def glow_sprite(size=64):
+    """White sprite whose alpha falls off from the middle, for additive glows"""
+    ramp = (numpy.arange(size) + 0.5) / size * 2 - 1
+    distance = numpy.hypot(ramp[:, None], ramp[None, :])
+    surface = pygame.Surface((size, size), pygame.SRCALPHA, 32)
+    surface.fill((255, 255, 255, 0))
+    alpha = pygame.surfarray.pixels_alpha(surface)
+    alpha[:] = (numpy.clip(1 - distance, 0, 1) ** 2 * 255).astype(numpy.uint8)
+    del alpha
+    return surface
+
+
+class PostFX:
+    """The post-processing stages enabled at a quality level"""
+
+    def __init__(self, quality=None):
+        self.quality = quality_setting(quality)
+        self.stages = frozenset(QUALITY_STAGES[self.quality] if numpy is not None else ())
+        self.times = StageTimes()
+        self.skies = {}         # (size, gradient) -> Surface
+        self.lights = {}        # (width, height, colour, alpha) -> blurred light
+
+    def enabled(self, stage):
+        return stage in self.stages
+
+    def background(self, target, background):
+        """Fill target with a colour, a Gradient or any painter called with it"""
+        if isinstance(background, Gradient):
+            start = time.perf_counter()
+            if GRADIENT in self.stages:
+                target.blit(self.sky(background, target), (0, 0))
+            else:
+                background(target)
+            self.times.add(GRADIENT, time.perf_counter() - start)
+        elif callable(background):
+            background(target)
+        elif target.get_bitsize() == 8 and numpy is not None:
+            # pygame fills 8-bit surfaces a pixel at a time; this is a memset
+            pixels = pygame.surfarray.pixels2d(target)
+            pixels[:] = target.map_rgb(background)
+            del pixels
+        else:
+            target.fill(background)
+
+    def sky(self, gradient, target):
+        """gradient at target's size, computed once with NumPy"""
+        key = (target.get_size(), target.get_bitsize(), gradient.top, gradient.bottom)
+        surface = self.skies.get(key)
+        if surface is None:
+            width, height = key[0]
+            top = numpy.array(gradient.top, dtype=numpy.float64)
+            span = numpy.array(gradient.bottom, dtype=numpy.float64) - top
+            # Same arithmetic as Gradient.color: top + int(y / height * span)
+            column = top + (numpy.arange(height)[:, None] / height * span).astype(numpy.int64)
+            surface = pygame.Surface((width, height), 0, 32)
+            pixels = pygame.surfarray.pixels3d(surface)
+            pixels[:] = column.astype(numpy.uint8)[None, :, :]
+            del pixels
+            if target.get_bitsize() == 8:
+                surface = palette.to_indexed(surface)
+            elif pygame.display.get_surface():
+                surface = surface.convert(target)
+            self.skies[key] = surface
+        return surface
+
+    def dim(self, target, alpha):
+        """Darken target as a black overlay of the given alpha would"""
+        start = time.perf_counter()
+        shift = None
+        if DIM in self.stages and target.get_bitsize() == 32 and not target.get_flags() & pygame.SRCALPHA:
+            shift = packed_shift(1 - alpha / 255)
+        if shift is None:
+            target.blit(scratch.acquire(target.get_size(), alpha=alpha, fill=(0, 0, 0)), (0, 0))
+        elif shift:
+            # Keep only the bits that stayed inside their own channel
+            mask = sum((channel >> shift) & channel for channel in target.get_masks()[:3])
+            pixels = pygame.surfarray.pixels2d(target)
+            pixels >>= shift
+            pixels &= mask
+            del pixels
+        self.times.add(DIM, time.perf_counter() - start)
+
+    def bloom(self, target, glows, scale=1.0):
+        """Add blurred light around each glow (x, y, width, height, colour, alpha)"""
+        if not glows:
+            return
+        start = time.perf_counter()
+        margin = BLOOM_MARGIN
+        for x, y, width, height, color, alpha in glows:
+            light = self.light(round(width * scale), round(height * scale), color, alpha)
+            target.blit(light, (round(x * scale) - margin, round(y * scale) - margin),
+                        special_flags=pygame.BLEND_ADD)
+        self.times.add(BLOOM, time.perf_counter() - start)
+
+    def light(self, width, height, color, alpha):
+        """The blurred light of one glow, computed at quarter resolution once per look"""
+        key = (width, height, color, alpha)
+        surface = self.lights.get(key)
+        if surface is None:
+            step = BLOOM_DOWNSCALE
+            margin = BLOOM_MARGIN
+            size = (-(-(width + 2 * margin) // step), -(-(height + 2 * margin) // step))
+            light = numpy.zeros(size + (3,), numpy.float32)
+            inner = margin // step
+            light[inner:size[0] - inner, inner:size[1] - inner] = (
+                numpy.array(color, numpy.float32) * (alpha / 255 * BLOOM_STRENGTH))
+            box_blur(light, BLOOM_RADIUS)
+            box_blur(light, BLOOM_RADIUS)
+            small = pygame.Surface(size, 0, 32)
+            pygame.surfarray.blit_array(small, numpy.minimum(light, 255).astype(numpy.uint8))
+            surface = pygame.transform.smoothscale(small, (size[0] * step, size[1] * step))
+            if len(self.lights) >= LIGHT_CACHE_SIZE:
+                self.lights.clear()
+            self.lights[key] = surface
+        return surface
+
+    def shake(self, target, offset, scale=1.0):
+        """Move the finished frame by offset (edge pixels are left in place)"""
+        start = time.perf_counter()
+        target.scroll(round(offset[0] * scale), round(offset[1] * scale))
+        self.times.add(SHAKE, time.perf_counter() - start)
+
+    def report(self):
+        return f"post-processing ({self.quality}): {self.times.report() or 'no stages ran'}"
+
+    def report_if_requested(self):
+        if os.environ.get(STATS_ENV):
+            print(self.report(), flush=True)
@@ -2,42 +2,60 @@
 Power-ups system
 """
 import pygame
-import random
 import math
 from constants import *
+from timestep import STEP, countdown
+from assets import get_font, get_sprite
 
 
-class PowerUp(pygame.sprite.Sprite):
+# Color and symbol per power-up type (SPEED_BOOST, MEGA_JUMP, SCORE_MULTIPLIER)
+POWERUP_STYLES = {
+    0: (BLUE, "⚡"),
+    1: ((255, 100, 255), "🚀"),
+    2: ((255, 215, 0), "⭐"),
+}
+POWERUP_NAMES = {0: "Speed Boost", 1: "Mega Jump", 2: "2x Score"}
+
+
+class PowerUp:
     SPEED_BOOST = 0
     MEGA_JUMP = 1
     SCORE_MULTIPLIER = 2
     
+    __slots__ = ("powerup_type", "rect", "collected", "animation_offset")
+    size = 30
+    animation_speed = 6.0  # float phase per second
+    
     def __init__(self, x, y, powerup_type):
-        super().__init__()
         self.powerup_type = powerup_type
-        self.size = 30
         self.rect = pygame.Rect(x, y, self.size, self.size)
         self.collected = False
         self.animation_offset = 0
-        self.animation_speed = 0.1
         
-        # Set color and effect based on type
-        if powerup_type == self.SPEED_BOOST:
-            self.color = BLUE
-            self.symbol = "⚡"
-            self.name = "Speed Boost"
-        elif powerup_type == self.MEGA_JUMP:
-            self.color = (255, 100, 255)
-            self.symbol = "🚀"
-            self.name = "Mega Jump"
-        else:  # SCORE_MULTIPLIER
-            self.color = (255, 215, 0)
-            self.symbol = "⭐"
-            self.name = "2x Score"
+    # Color, symbol and name are per type, not per instance
+    @property
+    def color(self):
+        return POWERUP_STYLES[self.powerup_type][0]
+        
+    @property
+    def symbol(self):
+        return POWERUP_STYLES[self.powerup_type][1]
+        
+    @property
+    def name(self):
+        return POWERUP_NAMES[self.powerup_type]
             
-    def update(self):
+    def update(self, dt=STEP):
         # Floating animation
-        self.animation_offset += self.animation_speed
+        self.animation_offset += self.animation_speed * dt
+        
+    def advance(self, seconds):
+        """Where seconds of update() would leave the power-up"""
+        self.update(seconds)
+        
+    def world_bounds(self):
+        """Area covered by the glow and floating animation"""
+        return self.rect.inflate(10, 20)
         
     def draw(self, screen):
         if self.collected:
@@ -46,28 +64,37 @@ class PowerUp(pygame.sprite.Sprite):
         # Draw floating effect
         float_y = self.rect.y + math.sin(self.animation_offset) * 5
         
-        # Draw glow
+        # Glow, body and symbol are baked into one sprite per type, unless
+        # the glow is left to the bloom pass
         glow_size = self.size + 10
-        glow_surf = pygame.Surface((glow_size, glow_size))
-        glow_surf.set_alpha(100)
-        glow_surf.fill(self.color)
-        screen.blit(glow_surf, (self.rect.x - 5, float_y - 5))
-        
-        # Draw main powerup
-        pygame.draw.circle(screen, self.color, (self.rect.centerx, int(float_y + self.size//2)), self.size//2)
-        pygame.draw.circle(screen, WHITE, (self.rect.centerx, int(float_y + self.size//2)), self.size//2, 3)
-        
-        # Draw symbol
-        font = pygame.font.Font(None, 24)
-        text = font.render(self.symbol, True, WHITE)
-        text_rect = text.get_rect(center=(self.rect.centerx, int(float_y + self.size//2)))
-        screen.blit(text, text_rect)
+        flat_glow = screen.glows is None
+        sprite = get_sprite("powerup", (glow_size, glow_size), paint_powerup, self.color, self.symbol, flat_glow)
+        screen.blit(sprite, (self.rect.x - 5, float_y - 5))
+        if not flat_glow:
+            screen.glow((self.rect.x - 5, round(float_y) - 5, glow_size, glow_size), self.color, 100)
+
+
+def paint_powerup(surf, color, symbol, flat_glow=True):
+    """Paint a power-up sprite, with its glow unless bloom draws it (baked once per type)"""
+    size = surf.get_width() - 10
+    center = (surf.get_width() // 2, 5 + size // 2)
+
+    # Draw glow
+    if flat_glow:
+        surf.fill(color + (100,))
+
+    # Draw main powerup
+    pygame.draw.circle(surf, color, center, size // 2)
+    pygame.draw.circle(surf, WHITE, center, size // 2, 3)
+
+    # Draw symbol
+    text = get_font(24).render(symbol, True, WHITE)
+    text_rect = text.get_rect(center=center)
+    surf.blit(text, text_rect)
 
 
 def create_powerups_level_1():
     """Create power-ups for level 1"""
-    import math  # Import here to avoid circular import
-    
     powerups = []
     
     # Speed boost on middle platform
@@ -84,16 +111,18 @@ def create_powerups_level_1():
 
 class PowerUpEffect:
     """Tracks active power-up effects on the player"""
-    def __init__(self, powerup_type, duration=300):  # 5 seconds default
+    __slots__ = ("type", "duration", "timer")
+    
+    def __init__(self, powerup_type, duration=5.0):  # seconds
         self.type = powerup_type
         self.duration = duration
         self.timer = duration
         
-    def update(self):
-        self.timer -= 1
+    def update(self, dt=STEP):
+        self.timer = countdown(self.timer, dt)
         
     def is_expired(self):
         return self.timer <= 0
         
     def get_time_remaining(self):
-        return self.timer / 60  # Convert frames to seconds
+        return self.timer
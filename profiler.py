@@ -0,0 +1,163 @@
+"""
+On-demand sampling profiler for a running game
+
+A capture samples the main thread's Python stack from a background thread
+every SAMPLE_INTERVAL for a bounded number of seconds, tags each sample
+with the frame phase the game loop was in (wait, input, update, draw,
+flip) and writes the counts as collapsed stacks, one line per distinct
+stack, the phase as its root:
+
+    update;main.py:run;main.py:update;enemy.py:update 42
+
+flamegraph.pl, speedscope and inferno read that directly. With the
+simulation on its own thread (simthread.py) that thread is sampled too,
+under a "simulation" root.
+
+The game loop only stores a string when the phase changes; the sampler
+thread does everything else and sleeps between samples, so a capture can
+run under real load (it reports its own time per sample when done).
+
+Press F9 to start a capture, or set GAME_PROFILE=<seconds> to start one at
+launch (that length is then used for F9 too; 10 s otherwise). Files go to
+GAME_PROFILE_DIR, default the working directory, as
+profile-<game>-<date>-<time>.folded.
+"""
+import os
+import sys
+import threading
+import time
+
+PROFILE_ENV = "GAME_PROFILE"
+PROFILE_DIR_ENV = "GAME_PROFILE_DIR"
+DEFAULT_SECONDS = 10.0
+SAMPLE_INTERVAL = 0.005     # seconds
+# GIL switch interval during a capture. A waking sampler waits up to this
+# long for the main thread to let go of the GIL, and the sample lands where
+# it did: at the default 5 ms that is nearly always a blocking call (flip,
+# sleeping), and short phases like update would never be seen.
+SWITCH_INTERVAL = 0.00005
+
+# Frame phases, set by the game loops
+WAIT = "wait"
+INPUT = "input"
+UPDATE = "update"
+DRAW = "draw"
+FLIP = "flip"
+SIMULATION = "simulation"
+
+
+class Profiler:
+    """Samples the main thread (and any watched thread) during a capture"""
+
+    def __init__(self, name, interval=SAMPLE_INTERVAL):
+        self.name = name
+        self.interval = interval
+        self.phase = WAIT
+        self.main_ident = threading.main_thread().ident
+        self.watched = {}       # thread ident -> root tag
+        self.labels = {}        # code object -> "file.py:function"
+        self.thread = None
+        self.stopping = threading.Event()
+        self.seconds = float(os.environ.get(PROFILE_ENV) or DEFAULT_SECONDS)
+        self.last_path = None
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def watch(self, thread, tag=SIMULATION):
+        """Also sample thread (once started), under root tag"""
+        self.watched[thread.ident] = tag
+
+    def start_if_requested(self):
+        """Start a capture if $GAME_PROFILE asks for one"""
+        if os.environ.get(PROFILE_ENV):
+            self.start()
+
+    def start(self, seconds=None):
+        """Start a capture in the background; False if one is already running"""
+        if self.running:
+            return False
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self._run, args=(seconds or self.seconds,),
+                                       name="profiler", daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        """End a running capture early and write what it has"""
+        if self.running:
+            self.stopping.set()
+            self.thread.join()
+
+    def _run(self, seconds):
+        counts = {}
+        samples = 0
+        sampling = 0.0
+        main_ident = self.main_ident
+        interval = self.interval
+        stopping = self.stopping
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(switch_interval, SWITCH_INTERVAL))
+        started = time.perf_counter()
+        deadline = started + seconds
+        while not stopping.wait(interval):
+            start = time.perf_counter()
+            if start >= deadline:
+                break
+            frames = sys._current_frames()
+            frame = frames.get(main_ident)
+            if frame is not None:
+                key = self.phase + ";" + self.collapse(frame)
+                counts[key] = counts.get(key, 0) + 1
+            for ident, tag in self.watched.items():
+                frame = frames.get(ident)
+                if frame is not None:
+                    key = tag + ";" + self.collapse(frame)
+                    counts[key] = counts.get(key, 0) + 1
+            del frames, frame
+            samples += 1
+            sampling += time.perf_counter() - start
+        elapsed = time.perf_counter() - started
+        sys.setswitchinterval(switch_interval)
+        self.last_path = self.write(counts)
+        print(self.report(counts, samples, elapsed, sampling), flush=True)
+
+    def collapse(self, frame):
+        """The stack as "outermost;...;innermost" labels"""
+        labels = self.labels
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            label = labels.get(code)
+            if label is None:
+                label = labels[code] = f"{os.path.basename(code.co_filename)}:{code.co_name}"
+            stack.append(label)
+            frame = frame.f_back
+        stack.reverse()
+        return ";".join(stack)
+
+    def write(self, counts):
+        directory = os.environ.get(PROFILE_DIR_ENV, ".")
+        path = os.path.join(directory, f"profile-{self.name}-{time.strftime('%Y%m%d-%H%M%S')}.folded")
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(path, "w") as f:
+                for stack, count in sorted(counts.items()):
+                    f.write(f"{stack} {count}\n")
+        except OSError as e:
+            print(f"profile: could not write {path}: {e}", flush=True)
+            return None
+        return path
+
+    def report(self, counts, samples, elapsed, sampling):
+        phases = {}
+        for stack, count in counts.items():
+            phase = stack.split(";", 1)[0]
+            phases[phase] = phases.get(phase, 0) + count
+        total = sum(phases.values()) or 1
+        split = ", ".join(f"{phase} {count * 100 / total:.0f}%"
+                          for phase, count in sorted(phases.items(), key=lambda item: -item[1]))
+        cost = sampling / samples * 1e6 if samples else 0.0
+        return (f"profile: {samples} samples in {elapsed:.1f} s ({cost:.0f} us each), {split}"
+                f" -> {self.last_path or 'not written'}")
@@ -0,0 +1,205 @@
+"""
+Platform reachability graph built from the real player physics
+
+The jump arc only depends on GRAVITY, JUMP_STRENGTH and the double jump
+factor, so it is simulated once, in updates of timestep.STEP exactly like
+Player.update, for every possible double-jump frame. That gives a table of
+how many frames (STEPs) the player can stay in the air before coming down
+through a given height difference. Two platforms are connected when the
+horizontal gap between them can be covered in that many frames at
+PLAYER_SPEED (plus the dash bonus). Candidate pairs come from the level's spatial grid, so building the
+graph is roughly linear in the number of platforms.
+"""
+import heapq
+
+from constants import *
+from timestep import STEP
+
+DOUBLE_JUMP_FACTOR = 0.85
+DASH_SPEED = 1200           # px/s
+DASH_DURATION = 10          # frames
+WALK_STEP = PLAYER_SPEED * STEP     # px walked per frame
+DASH_BONUS = (DASH_SPEED - PLAYER_SPEED) * STEP
+
+# Keep some slack so a controller steering frame by frame can make it
+REACH_SAFETY = 0.8
+HEIGHT_SAFETY = 15
+
+
+def _simulate_arc(double_jump_frame, max_drop):
+    """Per-frame y offsets of a jump (negative is up), as Player.update does it"""
+    y = 0.0
+    vel_y = JUMP_STRENGTH
+    frame = 0
+    offsets = []
+    while y <= max_drop:
+        frame += 1
+        if frame == double_jump_frame:
+            vel_y = JUMP_STRENGTH * DOUBLE_JUMP_FACTOR
+        vel_y += GRAVITY * STEP
+        if vel_y > TERMINAL_VELOCITY:
+            vel_y = TERMINAL_VELOCITY
+        y += vel_y * STEP
+        offsets.append((round(y), vel_y))
+    return offsets
+
+
+class JumpTable:
+    """Latest frame at which a jump comes down through each height difference"""
+
+    def __init__(self, max_drop=SCREEN_HEIGHT):
+        self.max_drop = max_drop
+        self.max_rise = 0
+        frames_by_dy = {}
+        arcs = [_simulate_arc(None, max_drop)]
+        arcs += [_simulate_arc(k, max_drop) for k in range(2, 60)]
+        for arc in arcs:
+            previous = 0
+            for frame, (y, vel_y) in enumerate(arc, start=1):
+                self.max_rise = max(self.max_rise, -y)
+                if vel_y > 0:
+                    # Descending from previous to y: can land on any top in (previous, y]
+                    for dy in range(previous + 1, y + 1):
+                        if frames_by_dy.get(dy, 0) < frame:
+                            frames_by_dy[dy] = frame
+                previous = y
+        self.offset = -min(frames_by_dy)
+        self.frames = [0] * (self.offset + max(frames_by_dy) + 1)
+        for dy, frames in frames_by_dy.items():
+            self.frames[dy + self.offset] = frames
+
+    def air_frames(self, dy):
+        """Frames available to land on a top dy pixels below the takeoff (0 if impossible)"""
+        index = dy + self.offset
+        if index < 0:
+            return 0
+        if index >= len(self.frames):
+            return self.frames[-1]
+        return self.frames[index]
+
+    def reach(self, dy, dash=True):
+        """Horizontal distance coverable while landing dy pixels lower"""
+        frames = self.air_frames(dy + HEIGHT_SAFETY if dy < 0 else dy)
+        if frames == 0:
+            return -1
+        distance = frames * WALK_STEP
+        if dash:
+            distance += min(frames, DASH_DURATION) * DASH_BONUS
+        return distance * REACH_SAFETY
+
+    def max_reach(self):
+        return max(self.frames) * WALK_STEP + DASH_DURATION * DASH_BONUS
+
+
+def horizontal_gap(a, b):
+    """Pixels the player must travel between standing on a and standing on b"""
+    if b.left >= a.right:
+        gap = b.left - a.right
+    elif a.left >= b.right:
+        gap = a.left - b.right
+    else:
+        return 0
+    # The player only has to get a corner over the edge
+    return max(0, gap - PLAYER_WIDTH + 2)
+
+
+class ReachabilityGraph:
+    """Directed graph of which platform tops can be reached from which"""
+
+    def __init__(self, level, table=None):
+        self.level = level
+        self.table = table or JumpTable(max_drop=level.height)
+        self.edges = [[] for _ in level.platforms]  # index -> [(target, cost)]
+        self.build()
+
+    def build(self):
+        platforms = self.level.platforms
+        grid = self.level.platform_grid
+        table = self.table
+        reach_x = int(table.max_reach())
+        rise = table.max_rise
+        for i, a in enumerate(platforms):
+            a_rect = a.rect
+            window = a_rect.inflate(reach_x * 2, 0)
+            window.top = a_rect.top - rise
+            window.height = rise + self.level.height
+            for j in grid.query_indices(window):
+                if j == i:
+                    continue
+                b_rect = platforms[j].rect
+                dy = b_rect.top - a_rect.top
+                gap = horizontal_gap(a_rect, b_rect)
+                if dy == 0 and gap == 0:
+                    # Touching tops (e.g. tiled ground): just walk across
+                    self.edges[i].append((j, 1))
+                    continue
+                if gap <= table.reach(dy):
+                    # Cost ~ frames: travel distance plus a penalty for each jump
+                    self.edges[i].append((j, int(gap // WALK_STEP) + abs(dy) // 10 + 30))
+
+    def edge_count(self):
+        return sum(len(targets) for targets in self.edges)
+
+    def shortest_paths(self, source, blocked=()):
+        """Dijkstra from source; returns (distance, previous) dicts"""
+        dist = {source: 0}
+        prev = {}
+        heap = [(0, source)]
+        while heap:
+            d, node = heapq.heappop(heap)
+            if d > dist[node]:
+                continue
+            for target, cost in self.edges[node]:
+                if (node, target) in blocked:
+                    continue
+                nd = d + cost
+                if nd < dist.get(target, 1 << 60):
+                    dist[target] = nd
+                    prev[target] = node
+                    heapq.heappush(heap, (nd, target))
+        return dist, prev
+
+    @staticmethod
+    def path_to(prev, source, target):
+        path = [target]
+        while path[-1] != source:
+            path.append(prev[path[-1]])
+        path.reverse()
+        return path
+
+    def platform_under(self, rect):
+        """Index of the platform whose top rect is standing on, or None"""
+        probe = rect.inflate(0, 2)
+        probe.top = rect.bottom - 1
+        for index in self.level.platform_grid.query_indices(probe):
+            top = self.level.platforms[index].rect
+            if top.top == rect.bottom and top.left < rect.right and rect.left < top.right:
+                return index
+        return None
+
+    def coin_platform(self, coin):
+        """Platform to stand on to collect a coin: the nearest top below it"""
+        bounds = coin.world_bounds()
+        column = bounds.inflate(PLAYER_WIDTH * 2, 0)
+        column.height = self.level.height
+        best = None
+        for index in self.level.platform_grid.query_indices(column):
+            rect = self.level.platforms[index].rect
+            if rect.top >= bounds.bottom - COIN_SIZE and rect.left < column.right and column.left < rect.right:
+                if best is None or rect.top < self.level.platforms[best].rect.top:
+                    best = index
+        return best
+
+    def unreachable_coins(self, start_platform):
+        """Coins that cannot be collected starting from start_platform"""
+        dist, _ = self.shortest_paths(start_platform)
+        missing = []
+        for coin in self.level.coins:
+            platform = self.coin_platform(coin)
+            if platform is None or platform not in dist:
+                missing.append(coin)
+                continue
+            head_room = self.level.platforms[platform].rect.top - coin.world_bounds().bottom
+            if head_room > self.table.max_rise + PLAYER_HEIGHT:
+                missing.append(coin)
+        return missing
@@ -0,0 +1,202 @@
+"""
+Layered sprite-batch renderer
+
+Entities draw into a layer instead of the screen. A layer looks like a
+Surface to them (it has a blit() method) but only records the command.
+flush() then submits every layer, lowest first, with a single
+Surface.blits() call, so the per-entity Python overhead is one list append
+instead of one C call round trip per blit.
+
+With a scale other than 1 (see resolution.py) a layer maps every command
+from screen to target pixels as it records it: destinations are multiplied
+and sprites are replaced by scaled copies, cached until the scale changes.
+Scratch surfaces are rescaled into the same copy every frame, and only when
+their content may have changed, so scaling allocates nothing either.
+
+Glowing areas go through Layer.glow(): with bloom on (see postfx.py) they
+are collected apart from the layers, for the bloom pass to light up;
+otherwise they are drawn as flat translucent rectangles.
+"""
+import pygame
+import scratch
+
+# Layer order used by both games (lower layers are drawn first)
+LAYER_BACKGROUND = 0
+LAYER_PLATFORMS = 10
+LAYER_ITEMS = 20
+LAYER_ENEMIES = 30
+LAYER_PARTICLES = 40
+LAYER_PLAYER = 50
+
+
+class Layer:
+    """Records blit commands; quacks like a Surface for entity draw methods
+
+    Destinations are given in world coordinates and shifted by the layer's
+    offset (the camera position), then scaled, as they are recorded.
+    """
+    __slots__ = ("commands", "offset_x", "offset_y", "glows", "scale", "scaled", "scale_source")
+
+    def __init__(self, glows=None, scale=1.0, scaled=None, scale_source=None):
+        self.commands = []
+        self.offset_x = 0
+        self.offset_y = 0
+        self.glows = glows      # the renderer's glow list while bloom is on
+        self.scale = scale
+        # The renderer's sprite cache and resizer, for scales other than 1
+        self.scaled = scaled
+        self.scale_source = scale_source
+
+    def blit(self, source, dest, area=None, special_flags=0):
+        scale = self.scale
+        if scale != 1.0:
+            # Cached sprites are looked up here, without a call per command
+            scaled = self.scaled.get(source)
+            source = scaled if scaled is not None else self.scale_source(source)
+            dest = (round((dest[0] - self.offset_x) * scale), round((dest[1] - self.offset_y) * scale))
+            if area is not None:
+                x, y, width, height = area
+                area = pygame.Rect(round(x * scale), round(y * scale), round(width * scale), round(height * scale))
+        elif self.offset_x or self.offset_y:
+            dest = (dest[0] - self.offset_x, dest[1] - self.offset_y)
+        if special_flags:
+            self.commands.append((source, dest, area, special_flags))
+        elif area is not None:
+            self.commands.append((source, dest, area))
+        else:
+            self.commands.append((source, dest))
+
+    def glow(self, rect, color, alpha):
+        """A glowing area: light for the bloom pass if on, else a flat translucent rect"""
+        x, y, width, height = rect
+        if self.glows is None:
+            self.blit(scratch.acquire((width, height), alpha=alpha, fill=color), (x, y))
+        else:
+            self.glows.append((x - self.offset_x, y - self.offset_y, width, height, color, alpha))
+
+
+class Renderer:
+    """Collects draw commands into sorted layers and submits them in batches"""
+
+    def __init__(self):
+        self.layers = {}
+        self.offset = (0, 0)
+        self.scale = 1.0
+        self.smooth = False
+        self.scaled = {}        # source -> scaled copy
+        self.rescaled = {}      # scratch surface -> [scaled copy, fill it was scaled with]
+        self.glows = None       # glows recorded since the last take_glows(), when blooming
+        # Statistics for the most recent flush
+        self.draw_calls = 0
+        self.commands = 0
+
+    def layer(self, index):
+        """Return the layer with the given sort index, creating it if needed"""
+        layer = self.layers.get(index)
+        if layer is None:
+            layer = self.layers[index] = Layer(self.glows, self.scale, self.scaled, self.scale_source)
+            layer.offset_x, layer.offset_y = self.offset
+        return layer
+
+    def set_offset(self, x, y):
+        """Scroll every layer so world position (x, y) lands at the top-left"""
+        self.offset = (x, y)
+        for layer in self.layers.values():
+            layer.offset_x = x
+            layer.offset_y = y
+
+    def set_scale(self, scale, smooth=False):
+        """Draw into a target scale times the size of the screen coordinates"""
+        if (scale, smooth) != (self.scale, self.smooth):
+            self.scaled.clear()
+            self.rescaled.clear()
+        self.scale = scale
+        self.smooth = smooth
+        for layer in self.layers.values():
+            layer.scale = scale
+
+    def set_bloom(self, enabled):
+        """Collect Layer.glow() areas for a bloom pass instead of drawing them flat"""
+        if enabled != (self.glows is not None):
+            self.glows = [] if enabled else None
+            for layer in self.layers.values():
+                layer.glows = self.glows
+
+    def take_glows(self):
+        """Remove and return the glows recorded so far, as a tuple"""
+        if not self.glows:
+            return ()
+        glows = tuple(self.glows)
+        self.glows.clear()
+        return glows
+
+    def scale_source(self, source):
+        """source resized by the current scale"""
+        scaled = self.scaled.get(source)
+        if scaled is not None:
+            return scaled
+        if scratch.owns(source):
+            return self.rescale(source)
+        scaled = self.scaled[source] = self.resize(source)
+        return scaled
+
+    def rescale(self, source):
+        """A scratch surface's scaled copy, redrawn in place when its content may differ"""
+        entry = self.rescaled.get(source)
+        fill = scratch.fill_of(source)
+        if entry is None:
+            entry = self.rescaled[source] = [self.resize(source), fill]
+        elif fill is None or fill != entry[1]:
+            self.resize(source, entry[0])
+            entry[1] = fill
+        return entry[0]
+
+    def resize(self, source, dest=None):
+        """source scaled into dest, or into a new Surface"""
+        scale = self.scale
+        width, height = source.get_size()
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        # Colour-keyed sprites would get dark fringes from smoothing (and
+        # palette sprites can't be smoothed)
+        if self.smooth and source.get_colorkey() is None and source.get_bitsize() >= 24:
+            resize = pygame.transform.smoothscale
+        else:
+            resize = pygame.transform.scale
+        return resize(source, size) if dest is None else resize(source, size, dest)
+
+    def blit(self, source, dest, layer=0, area=None, special_flags=0):
+        self.layer(layer).blit(source, dest, area, special_flags)
+
+    def take(self, freeze=False):
+        """Remove and return the recorded commands, one sequence per non-empty layer
+
+        With freeze the result is tuples only (destinations copied out of
+        any Rects), safe to draw later or from another thread.
+        """
+        taken = []
+        for index in sorted(self.layers):
+            layer = self.layers[index]
+            commands = layer.commands
+            if not commands:
+                continue
+            if freeze:
+                taken.append(tuple((c[0], (c[1][0], c[1][1])) + c[2:] for c in commands))
+                commands.clear()
+            else:
+                taken.append(commands)
+                layer.commands = []
+        return tuple(taken) if freeze else taken
+
+    def submit(self, layers, target):
+        """Blit layers from take() to target, one blits() call per layer"""
+        commands = 0
+        for layer_commands in layers:
+            target.blits(layer_commands, doreturn=False)
+            commands += len(layer_commands)
+        self.draw_calls = len(layers)
+        self.commands = commands
+        return self.draw_calls
+
+    def flush(self, target):
+        """Submit every non-empty layer to target, one blits() call per layer"""
+        return self.submit(self.take(), target)
@@ -0,0 +1,106 @@
+"""
+Internal render resolution for the game world
+
+With a render scale other than 1 the world (background and every renderer
+layer) is drawn into an offscreen surface of scale times the window's size,
+then scaled to the window once per frame with nearest or smooth filtering.
+The HUD, menus and overlays are drawn onto the window afterwards, so text
+stays at native resolution. A scale below 1 saves fill rate on weak GPUs
+and large panels; above 1 supersamples.
+
+Game coordinates do not change: the renderer multiplies blit destinations
+by the scale and blits copies of the sprites scaled once and cached.
+
+In palette mode (palette.py) the world surface is always offscreen and
+8-bit, and presenting it converts it to the window's format.
+"""
+import os
+import pygame
+import palette
+
+SCALE_ENV = "GAME_RENDER_SCALE"
+FILTER_ENV = "GAME_RENDER_FILTER"
+NEAREST = "nearest"
+SMOOTH = "smooth"
+FILTERS = (NEAREST, SMOOTH)
+MIN_SCALE = 0.25
+MAX_SCALE = 2.0
+
+
+def settings(scale=None, filter=None):
+    """(scale, filter) from the arguments or the environment, validated"""
+    if scale is None:
+        scale = float(os.environ.get(SCALE_ENV, 1.0))
+    if filter is None:
+        filter = os.environ.get(FILTER_ENV, NEAREST)
+    if not MIN_SCALE <= scale <= MAX_SCALE:
+        raise ValueError(f"render scale must be between {MIN_SCALE} and {MAX_SCALE}, got {scale}")
+    if filter not in FILTERS:
+        raise ValueError(f"render filter must be one of {FILTERS}, got {filter!r}")
+    return scale, filter
+
+
+def scaled_size(size, scale):
+    return (max(1, round(size[0] * scale)), max(1, round(size[1] * scale)))
+
+
+class WorldSurface:
+    """Offscreen target for the world, presented to the window each frame"""
+
+    def __init__(self, screen, scale=None, filter=None, indexed=False):
+        scale, filter = settings(scale, filter)
+        self.screen = screen
+        self.scale = scale
+        self.filter = filter
+        self.indexed = indexed
+        self.size = scaled_size(screen.get_size(), scale)
+        self.scaled = None  # 8-bit window-sized copy of the world, for nearest scaling
+        if indexed:
+            self.surface = palette.new_surface(self.size)
+        elif self.size == screen.get_size():
+            # Native resolution: draw straight into the window
+            self.surface = screen
+        else:
+            self.surface = pygame.Surface(self.size).convert(screen)
+
+    @property
+    def native(self):
+        return self.surface is self.screen
+
+    def area(self, rect):
+        """The part of the world surface behind window rect"""
+        scale = self.scale
+        return pygame.Rect(round(rect[0] * scale), round(rect[1] * scale),
+                           round(rect[2] * scale), round(rect[3] * scale))
+
+    def present(self, viewport=None):
+        """Scale the finished world (or one viewport of it) onto the window
+
+        Nothing to do when the world is drawn straight into the window.
+        """
+        if self.surface is self.screen:
+            return
+        source, target = self.surface, self.screen
+        if viewport is not None:
+            source = source.subsurface(self.area(viewport))
+            target = target.subsurface(viewport)
+        if self.indexed:
+            self.present_indexed(source, target)
+        elif self.filter == SMOOTH:
+            pygame.transform.smoothscale(source, target.get_size(), target)
+        else:
+            pygame.transform.scale(source, target.get_size(), target)
+
+    def present_indexed(self, source, target):
+        """Convert the 8-bit world while copying it: a plain blit at native size,
+        scaled 8-bit to 8-bit first for nearest, converted first for smooth"""
+        size = target.get_size()
+        if source.get_size() == size:
+            target.blit(source, (0, 0))
+        elif self.filter == SMOOTH:
+            pygame.transform.smoothscale(source.convert(target), size, target)
+        else:
+            if self.scaled is None or self.scaled.get_size() != size:
+                self.scaled = palette.new_surface(size)
+            pygame.transform.scale(source, size, self.scaled)
+            target.blit(self.scaled, (0, 0))
@@ -0,0 +1,246 @@
+"""
+Compact binary world snapshots (save states, rewind, crash resume)
+
+Every piece of state is written as a fixed-layout struct record, arrays of
+records are packed back to back, and nothing goes through pickle. Level
+geometry is not stored: a snapshot restores into a game whose level has the
+same shape (the restore checks the object counts), so only the parts that
+change while playing are saved.
+
+The gameplay records without particles or RNG state are also what
+determinism.py hashes every frame (platformer_state()): the players, and a
+PICKUP record for each coin or power-up taken that frame. Which objects are
+awake (activity.py) never enters the hash.
+"""
+import struct
+
+from constants import *
+from particle import Particle
+from powerup import PowerUpEffect
+
+PLATFORMER_MAGIC = b"PSV4"
+
+# Shared by both games: state of a random.Random stream
+RNG_HEADER = struct.Struct("<iBd")      # version, has gauss_next, gauss_next
+RNG_STATE = struct.Struct("<625I")
+RNG_SIZE = RNG_HEADER.size + RNG_STATE.size
+
+HEADER = struct.Struct("<4sBIIIHIIIIId")
+# magic, game state, coins collected, total coins, camera x, player count,
+# enemy count, coin count, power-up count, particle count, state hash,
+# activity time (seconds)
+STATE = struct.Struct("<BIH")           # game state, coins collected, player count
+
+PLAYER = struct.Struct("<iiddddHiidddidddB")
+# x, y, sub-pixel x and y, vel_x, vel_y, flags, score, lives, invincible timer,
+# dash timer, dash cooldown timer, combo, combo timer, speed boost, jump boost,
+# active effect count (timers in seconds)
+EFFECT = struct.Struct("<Bdd")          # type, duration, timer
+ENEMY = struct.Struct("<iidd")          # x, y, sub-pixel x, vel_x
+COIN = struct.Struct("<iBd")            # y, collected, animation offset
+POWERUP = struct.Struct("<Bd")          # collected, animation offset
+PICKUP = struct.Struct("<Bii")          # kind (COIN_PICKUP, POWERUP_PICKUP), x, y where it rested
+COIN_PICKUP = 0
+POWERUP_PICKUP = 1
+SLEPT_AT = struct.Struct("<d")          # activity time an object fell asleep at, AWAKE while awake
+AWAKE = -1.0
+PARTICLE = struct.Struct("<ddddBBBddB")  # x, y, vel_x, vel_y, color, lifetime, max lifetime, size
+
+# Player flag bits
+PLAYER_FLAGS = ("on_ground", "facing_right", "invincible", "immortal", "can_double_jump",
+                "has_double_jumped", "is_dashing", "was_on_ground", "was_dashing")
+
+
+class SnapshotError(ValueError):
+    """The blob is not a snapshot of this kind of world"""
+
+
+def check_size(data, expected, kind):
+    """Raise SnapshotError unless data is exactly the size its record counts add up to"""
+    if len(data) != expected:
+        raise SnapshotError(f"{kind} snapshot is {len(data)} bytes, its record counts need {expected}")
+
+
+def pack_rng(rng):
+    version, internal, gauss_next = rng.getstate()
+    return (RNG_HEADER.pack(version, gauss_next is not None, gauss_next or 0.0) +
+            RNG_STATE.pack(*internal))
+
+
+def unpack_rng(data, offset, rng):
+    """Restore rng from data at offset; returns the offset after it"""
+    version, has_gauss, gauss_next = RNG_HEADER.unpack_from(data, offset)
+    offset += RNG_HEADER.size
+    internal = RNG_STATE.unpack_from(data, offset)
+    offset += RNG_STATE.size
+    rng.setstate((version, internal, gauss_next if has_gauss else None))
+    return offset
+
+
+def pack_particles(particles):
+    pack = PARTICLE.pack
+    return b"".join([pack(p.x, p.y, p.vel_x, p.vel_y, *p.color, p.lifetime, p.max_lifetime, p.size)
+                     for p in particles])
+
+
+def unpack_particles(data, offset, count):
+    end = offset + PARTICLE.size * count
+    particles = []
+    for x, y, vel_x, vel_y, r, g, b, lifetime, max_lifetime, size in PARTICLE.iter_unpack(data[offset:end]):
+        particle = Particle(x, y, (r, g, b), vel_x, vel_y, max_lifetime, size)
+        particle.lifetime = lifetime
+        particles.append(particle)
+    return particles, end
+
+
+# ------------- Platformer (main.Game) -------------
+def _pack_player(player):
+    flags = 0
+    for bit, name in enumerate(PLAYER_FLAGS):
+        if getattr(player, name):
+            flags |= 1 << bit
+    effects = player.active_powerups
+    return PLAYER.pack(
+        player.rect.x, player.rect.y, player.sub_x, player.sub_y, player.vel_x, player.vel_y, flags, player.score,
+        player.lives, player.invincible_timer, player.dash_timer, player.dash_cooldown_timer,
+        player.combo, player.combo_timer, player.speed_boost, player.jump_boost, len(effects),
+    ) + b"".join([EFFECT.pack(e.type, e.duration, e.timer) for e in effects])
+
+
+def _unpack_player(player, data, offset):
+    (player.rect.x, player.rect.y, player.sub_x, player.sub_y, player.vel_x, player.vel_y, flags, player.score,
+     player.lives, player.invincible_timer, player.dash_timer, player.dash_cooldown_timer,
+     player.combo, player.combo_timer, player.speed_boost, player.jump_boost,
+     effect_count) = PLAYER.unpack_from(data, offset)
+    offset += PLAYER.size
+    for bit, name in enumerate(PLAYER_FLAGS):
+        setattr(player, name, bool(flags & (1 << bit)))
+    effects = []
+    for _ in range(effect_count):
+        effect_type, duration, timer = EFFECT.unpack_from(data, offset)
+        offset += EFFECT.size
+        effect = PowerUpEffect(effect_type, duration)
+        effect.timer = timer
+        effects.append(effect)
+    player.active_powerups = effects
+    return offset
+
+
+def _players_end(data, offset, count):
+    """Offset after count player records (and their effects) starting at offset"""
+    for _ in range(count):
+        if offset + PLAYER.size > len(data):
+            raise SnapshotError("platformer snapshot is truncated")
+        offset += PLAYER.size + EFFECT.size * PLAYER.unpack_from(data, offset)[-1]
+    return offset
+
+
+def _pack_world(game, parts):
+    """Append the player, enemy, coin and power-up records to parts"""
+    parts.extend([_pack_player(player) for player in game.players])
+    pack = ENEMY.pack
+    parts.extend([pack(e.rect.x, e.rect.y, e.sub_x, e.vel_x) for e in game.enemies])
+    pack = COIN.pack
+    parts.extend([pack(c.rect.y, c.collected, c.animation_offset) for c in game.coins])
+    pack = POWERUP.pack
+    parts.extend([pack(p.collected, p.animation_offset) for p in game.powerups])
+    return parts
+
+
+def coin_pickup(coin):
+    return PICKUP.pack(COIN_PICKUP, coin.rect.x, coin.original_y)
+
+
+def powerup_pickup(powerup):
+    return PICKUP.pack(POWERUP_PICKUP, powerup.rect.x, powerup.rect.y)
+
+
+def platformer_state(game):
+    """Gameplay state of this frame: the players and the pickups (game.pickups)
+
+    Enemies and bobbing are functions of time and only matter through what
+    they do to the players, so the hash costs the same on any level and
+    with any active radius. No camera, particles or RNG state.
+    """
+    parts = [STATE.pack(game.state, game.coins_collected, len(game.players))]
+    parts.extend([_pack_player(player) for player in game.players])
+    parts.extend(game.pickups)
+    return b"".join(parts)
+
+
+def snapshot_platformer(game):
+    """Serialize everything that changes while playing main.Game"""
+    particles = game.particles.particles
+    parts = [HEADER.pack(PLATFORMER_MAGIC, game.state, game.coins_collected, game.total_coins,
+                         game.camera.x, len(game.players), len(game.enemies), len(game.coins),
+                         len(game.powerups), len(particles), game.state_hash, game.activity.time)]
+    _pack_world(game, parts)
+    # Sleepers are saved as they fell asleep, with when: saving never wakes anything
+    for group in game.activity.groups:
+        parts.append(struct.pack(f"<{len(group.slept_at)}d",
+                                 *[AWAKE if at is None else at for at in group.slept_at]))
+    parts.append(pack_particles(particles))
+    parts.append(pack_rng(game.rng))
+    parts.append(pack_rng(game.cosmetic_rng))
+    return b"".join(parts)
+
+
+def restore_platformer(game, data):
+    """Load a snapshot_platformer() blob into a game with the same level shape"""
+    if len(data) < HEADER.size or data[:4] != PLATFORMER_MAGIC:
+        raise SnapshotError("not a platformer snapshot")
+    (_, state, coins_collected, total_coins, camera_x, player_count, enemy_count, coin_count,
+     powerup_count, particle_count, state_hash, activity_time) = HEADER.unpack_from(data)
+    if (enemy_count, coin_count, powerup_count) != (len(game.enemies), len(game.coins), len(game.powerups)):
+        raise SnapshotError("snapshot was taken in a different level")
+    offset = HEADER.size
+    # Every record must be there before anything in the game is overwritten
+    check_size(data, _players_end(data, offset, player_count) + ENEMY.size * enemy_count + COIN.size * coin_count
+               + POWERUP.size * powerup_count + SLEPT_AT.size * (enemy_count + coin_count + powerup_count)
+               + PARTICLE.size * particle_count + 2 * RNG_SIZE, "platformer")
+
+    while len(game.players) < player_count:
+        game.add_player()
+    while len(game.players) > player_count:
+        game.remove_player(game.players[-1])
+    for player in game.players:
+        offset = _unpack_player(player, data, offset)
+
+    end = offset + ENEMY.size * enemy_count
+    for enemy, (x, y, sub_x, vel_x) in zip(game.enemies, ENEMY.iter_unpack(data[offset:end])):
+        enemy.rect.x = x
+        enemy.rect.y = y
+        enemy.sub_x = sub_x
+        enemy.vel_x = vel_x
+    offset = end
+
+    end = offset + COIN.size * coin_count
+    for coin, (y, collected, animation_offset) in zip(game.coins, COIN.iter_unpack(data[offset:end])):
+        coin.rect.y = y
+        coin.collected = bool(collected)
+        coin.animation_offset = animation_offset
+    offset = end
+
+    end = offset + POWERUP.size * powerup_count
+    for powerup, (collected, animation_offset) in zip(game.powerups, POWERUP.iter_unpack(data[offset:end])):
+        powerup.collected = bool(collected)
+        powerup.animation_offset = animation_offset
+    offset = end
+
+    slept_at = []
+    for count in (enemy_count, coin_count, powerup_count):
+        slept_at.append([None if at == AWAKE else at for at in struct.unpack_from(f"<{count}d", data, offset)])
+        offset += SLEPT_AT.size * count
+    game.activity.restore(activity_time, slept_at)
+
+    game.particles.particles, offset = unpack_particles(data, offset, particle_count)
+    offset = unpack_rng(data, offset, game.rng)
+    offset = unpack_rng(data, offset, game.cosmetic_rng)
+
+    game.state = state
+    game.coins_collected = coins_collected
+    game.total_coins = total_coins
+    game.camera.x = camera_x
+    game.state_hash = state_hash
+    if game.players:
+        game.player = game.players[0]
@@ -0,0 +1,103 @@
+"""
+Pool of reusable scratch surfaces for transient effects
+
+Dash trails, glows, the HUD panel and dimming overlays only live for one
+frame. Instead of allocating a fresh Surface for each of them every frame,
+draw code acquires one from this pool, keyed by size, flags and alpha.
+Surfaces handed out during a frame stay reserved until the next
+begin_frame() (blits may be deferred by the renderer until its flush), then
+all go back to the pool, so a steady-state frame allocates nothing.
+
+A surface that is acquired with a fill colour is only refilled when it last
+held a different colour. Each thread has its own pool, so a simulation
+thread recording draw commands (simthread.py) never hands out a surface the
+render thread is using.
+"""
+import threading
+import pygame
+
+_local = threading.local()
+_entries = {}   # id() of every pooled surface -> its [surface, fill] entry
+stats = {"allocations": 0, "reuses": 0, "fills": 0, "frames": 0}
+
+
+def _new_surface(size, flags, alpha):
+    surface = pygame.Surface(size, flags)
+    # Match the display format when there is one, so blits need no conversion
+    if pygame.display.get_surface() is not None:
+        surface = surface.convert_alpha() if flags & pygame.SRCALPHA else surface.convert()
+    if alpha is not None:
+        surface.set_alpha(alpha)
+    return surface
+
+
+def _pools():
+    """(free, used) for this thread: key -> [[surface, fill], ...]"""
+    pools = getattr(_local, "pools", None)
+    if pools is None:
+        pools = _local.pools = ({}, {})
+    return pools
+
+
+def acquire(size, flags=0, alpha=None, fill=None):
+    """Return a surface reserved for the rest of this frame"""
+    key = (size, flags, alpha)
+    free_by_key, used_by_key = _pools()
+    free = free_by_key.get(key)
+    if free:
+        entry = free.pop()
+        stats["reuses"] += 1
+    else:
+        entry = [_new_surface(size, flags, alpha), None]
+        _entries[id(entry[0])] = entry
+        stats["allocations"] += 1
+    used_by_key.setdefault(key, []).append(entry)
+    if fill is not None and entry[1] != fill:
+        entry[0].fill(fill)
+        entry[1] = fill
+        stats["fills"] += 1
+    elif fill is None:
+        entry[1] = None     # the caller draws its own content
+    return entry[0]
+
+
+def begin_frame():
+    """Return every surface handed out last frame to the pool"""
+    stats["frames"] += 1
+    free_by_key, used_by_key = _pools()
+    for key, entries in used_by_key.items():
+        free_by_key.setdefault(key, []).extend(entries)
+        entries.clear()
+
+
+def owns(surface):
+    """True for surfaces handed out by this pool (their content changes)"""
+    return id(surface) in _entries
+
+
+def fill_of(surface):
+    """Colour a pooled surface was last filled with, or None if the caller drew on it"""
+    return _entries[id(surface)][1]
+
+
+def pooled_count():
+    free_by_key, used_by_key = _pools()
+    return sum(len(entries) for entries in free_by_key.values()) + sum(len(entries) for entries in used_by_key.values())
+
+
+def pooled_bytes():
+    total = 0
+    for pool in _pools():
+        for entries in pool.values():
+            for surface, _ in entries:
+                total += surface.get_bytesize() * surface.get_width() * surface.get_height()
+    return total
+
+
+def clear():
+    """Drop this thread's pooled surfaces (e.g. after the display format changes)"""
+    for pool in _pools():
+        for entries in pool.values():
+            for surface, _ in entries:
+                _entries.pop(id(surface), None)
+        pool.clear()
@@ -0,0 +1,283 @@
+"""
+Headless authoritative server for the platformer
+
+The server owns the only simulation of the world. Clients send their
+controls every frame; the server advances main.Game at a fixed tick rate
+using the latest controls it has from each client and sends every client a
+snapshot delta-compressed against the last snapshot that client
+acknowledged. Enemies are only sent when they are near the client's player.
+
+Run: python server.py [--port 50007] [--tick-rate 60] [--screens 1]
+"""
+import argparse
+import os
+import socket
+import time
+from collections import deque
+
+# No window is ever opened, but pygame still wants a video driver name
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from constants import *
+from controls import Controls, NO_CONTROLS
+from main import Game
+import netcode
+import timestep
+
+DEFAULT_PORT = 50007
+HISTORY_TICKS = 64          # snapshots kept per client for delta baselines
+CLIENT_TIMEOUT = 5.0        # seconds without input before a client is dropped
+INTEREST_MARGIN = 400       # enemies this far outside a client's view are not sent
+STATS_WINDOW = 3600         # tick times kept for the timing statistics
+
+
+class ClientSlot:
+    """Server-side state for one connected client"""
+
+    def __init__(self, client_id, address, player):
+        self.client_id = client_id
+        self.address = address
+        self.player = player
+        self.controls = NO_CONTROLS
+        self.last_input_seq = 0
+        self.acked_tick = 0
+        self.last_heard = time.monotonic()
+        self.history = {}   # tick -> enemy records sent to this client in that snapshot
+
+
+class ServerStats:
+    """Tick timing and bandwidth counters"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.ticks = 0
+        self.tick_times = deque(maxlen=STATS_WINDOW)
+        self.bytes_sent = 0
+        self.packets_sent = 0
+        self.bytes_received = 0
+        self.full_snapshots = 0
+
+    def summary(self, client_count, tick_rate):
+        times = sorted(self.tick_times) or [0.0]
+        ticks = max(self.ticks, 1)
+        per_client = self.bytes_sent / ticks / max(client_count, 1)
+        return {
+            "ticks": self.ticks,
+            "clients": client_count,
+            "tick_ms_mean": sum(times) / len(times) * 1000,
+            "tick_ms_p99": times[min(len(times) - 1, int(len(times) * 0.99))] * 1000,
+            "bytes_per_client_per_tick": per_client,
+            "kbit_per_client": per_client * tick_rate * 8 / 1000,
+            "full_snapshots": self.full_snapshots,
+        }
+
+
+class GameServer:
+    def __init__(self, host="0.0.0.0", port=DEFAULT_PORT, tick_rate=None, level_screens=1):
+        # Updates cover 1/tick_rate seconds, so any rate plays the same (GAME_SIM_RATE)
+        self.tick_rate = timestep.sim_rate(tick_rate)
+        self.level_screens = level_screens
+        self.game = Game(level_screens=level_screens, headless=True)
+        self.game.reset_game(player_count=0)
+        self.game.state = PLAYING
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.setblocking(False)
+        self.address = self.sock.getsockname()
+
+        self.clients = {}        # address -> ClientSlot
+        self.shared_history = {} # tick -> world and player records sent to everyone
+        self.next_client_id = 1
+        self.tick = 0
+        self.stats = ServerStats()
+        self.running = False
+
+    # ------------- Networking -------------
+    def receive(self):
+        """Drain every waiting packet without blocking"""
+        while True:
+            try:
+                data, address = self.sock.recvfrom(2048)
+            except BlockingIOError:
+                return
+            except ConnectionResetError:
+                continue
+            self.stats.bytes_received += len(data)
+            try:
+                packet_type = netcode.unpack_header(data)
+            except netcode.ProtocolError:
+                continue
+            if packet_type == netcode.HELLO:
+                self.handle_hello(address)
+            elif packet_type == netcode.INPUT:
+                self.handle_input(address, data)
+            elif packet_type == netcode.BYE:
+                self.drop_client(address)
+
+    def handle_hello(self, address):
+        slot = self.clients.get(address)
+        if slot is None:
+            slot = ClientSlot(self.next_client_id, address, self.game.add_player())
+            self.next_client_id += 1
+            self.clients[address] = slot
+        body = netcode.WELCOME_BODY.pack(slot.client_id, self.tick_rate, self.level_screens)
+        self.send(netcode.pack_header(netcode.WELCOME) + body, address)
+
+    def handle_input(self, address, data):
+        slot = self.clients.get(address)
+        if slot is None or len(data) < netcode.HEADER.size + netcode.INPUT_BODY.size:
+            return
+        seq, bits, acked_tick = netcode.INPUT_BODY.unpack_from(data, netcode.HEADER.size)
+        slot.last_heard = time.monotonic()
+        # Inputs can arrive out of order; only newer ones replace the controls
+        if seq > slot.last_input_seq:
+            slot.last_input_seq = seq
+            slot.controls = Controls.from_bits(bits)
+        if acked_tick > slot.acked_tick and acked_tick in slot.history:
+            slot.acked_tick = acked_tick
+
+    def drop_client(self, address):
+        slot = self.clients.pop(address, None)
+        if slot is not None:
+            self.game.remove_player(slot.player)
+
+    def send(self, data, address):
+        try:
+            self.sock.sendto(data, address)
+        except OSError:
+            return
+        self.stats.bytes_sent += len(data)
+        self.stats.packets_sent += 1
+
+    # ------------- Simulation -------------
+    def step(self):
+        """Receive input, advance one tick and send snapshots"""
+        start = time.perf_counter()
+        self.receive()
+
+        now = time.monotonic()
+        for address, slot in list(self.clients.items()):
+            if now - slot.last_heard > CLIENT_TIMEOUT:
+                self.drop_client(address)
+
+        self.tick += 1
+        game = self.game
+        if game.players and game.state == PLAYING:
+            game.update([slot.controls for slot in self.ordered_slots()], 1.0 / self.tick_rate)
+        elif game.state in (GAME_OVER, WIN):
+            # Round over: start a new round with everyone still connected
+            self.restart_round()
+
+        self.send_snapshots()
+
+        self.stats.ticks += 1
+        self.stats.tick_times.append(time.perf_counter() - start)
+
+    def ordered_slots(self):
+        """Client slots in the same order as game.players"""
+        by_player = {id(slot.player): slot for slot in self.clients.values()}
+        return [by_player[id(player)] for player in self.game.players]
+
+    def restart_round(self):
+        slots = self.ordered_slots()
+        self.game.reset_game(player_count=len(slots))
+        for slot, player in zip(slots, self.game.players):
+            slot.player = player
+        self.game.state = PLAYING
+
+    def shared_records(self):
+        """Records every client receives: world flags and all players"""
+        shared = {(netcode.RECORD_WORLD, 0): netcode.world_record(self.game)}
+        for slot in self.clients.values():
+            shared[(netcode.RECORD_PLAYER, slot.client_id)] = netcode.player_record(slot.player)
+        return shared
+
+    def enemy_records(self, slot):
+        """Records for the enemies near this client's player"""
+        view = self.game.camera.view_rect
+        view.centerx = slot.player.rect.centerx
+        interest = view.inflate(INTEREST_MARGIN * 2, INTEREST_MARGIN * 2)
+        enemies = self.game.enemies
+        return {(netcode.RECORD_ENEMY, index): netcode.enemy_record(enemies[index])
+                for index in self.game.level.enemy_grid.query_indices(interest)}
+
+    def send_snapshots(self):
+        """Send every client its snapshot for this tick
+
+        The shared part is identical for all clients at a given tick, so its
+        delta is encoded once per distinct baseline tick rather than once
+        per client. Only the enemy part is encoded per client.
+        """
+        shared = self.shared_records()
+        self.shared_history[self.tick] = shared
+        self.shared_history.pop(self.tick - HISTORY_TICKS, None)
+        shared_deltas = {}
+        patch_cache = {}
+        for slot in self.clients.values():
+            enemy_records = self.enemy_records(slot)
+            baseline_tick = slot.acked_tick
+            enemy_baseline = slot.history.get(baseline_tick)
+            shared_baseline = self.shared_history.get(baseline_tick)
+            if enemy_baseline is None or shared_baseline is None:
+                baseline_tick = 0
+                enemy_baseline = shared_baseline = None
+                self.stats.full_snapshots += 1
+
+            shared_delta = shared_deltas.get(baseline_tick)
+            if shared_delta is None:
+                shared_delta = shared_deltas[baseline_tick] = netcode.encode_delta(
+                    shared, shared_baseline, patch_cache=patch_cache)
+            enemy_delta = netcode.encode_delta(enemy_records, enemy_baseline, patch_cache=patch_cache)
+            packet = netcode.snapshot_packet(self.tick, baseline_tick, slot.client_id,
+                                             [shared_delta, enemy_delta])
+            self.send(packet, slot.address)
+
+            slot.history[self.tick] = enemy_records
+            slot.history.pop(self.tick - HISTORY_TICKS, None)
+
+    def serve_forever(self, duration=None):
+        """Run at the fixed tick rate until stop() (or for duration seconds)"""
+        self.running = True
+        interval = 1.0 / self.tick_rate
+        next_tick = time.perf_counter()
+        end = None if duration is None else next_tick + duration
+        while self.running and (end is None or next_tick < end):
+            self.step()
+            next_tick += interval
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.perf_counter()  # fell behind; don't try to catch up
+
+    def stop(self):
+        self.running = False
+
+    def close(self):
+        self.sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless platformer server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--tick-rate", type=int, help="updates a second (default: $GAME_SIM_RATE or 60)")
+    parser.add_argument("--screens", type=int, default=1)
+    args = parser.parse_args()
+
+    server = GameServer(args.host, args.port, args.tick_rate, args.screens)
+    print(f"Serving on {server.address[0]}:{server.address[1]} at {server.tick_rate} ticks/s")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(server.stats.summary(len(server.clients), server.tick_rate))
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
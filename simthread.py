@@ -0,0 +1,191 @@
+"""
+Fixed-rate simulation on its own thread, rendered from snapshots
+
+In threaded mode the game's update runs on a SimulationThread at a fixed
+tick rate. After every tick the thread captures what the renderer needs -
+the world's draw commands (Renderer.take(freeze=True), so they hold no
+references to live Rects) and the HUD values - as an immutable Snapshot and
+publishes it into a two-slot buffer. The main thread keeps polling input
+and draws the newest published snapshot, so a slow draw no longer delays
+physics and a slow tick no longer delays the frame.
+
+Anything that changes game state from the main thread (input, menus,
+resets) holds SimulationThread.lock, the same lock the thread holds while
+it steps and publishes, and republishes a snapshot if it changed the state.
+
+FrameCounters counts rendered frames that repeated the previous tick
+(duplicated) and ticks that were never shown (dropped); the thread also
+keeps a pacing.FrameStats of its tick intervals. Enable with
+GAME_SIM_THREAD=1 (or --threaded in main.py); GAME_FRAME_STATS=1 prints the
+counters on exit.
+"""
+import os
+import threading
+import time
+
+from pacing import FrameStats, STATS_ENV
+
+THREAD_ENV = "GAME_SIM_THREAD"
+# Further behind schedule than this and the thread stops trying to catch up
+MAX_LAG_TICKS = 5
+
+
+def enabled(threaded=None):
+    """threaded, else $GAME_SIM_THREAD"""
+    if threaded is None:
+        return os.environ.get(THREAD_ENV, "") not in ("", "0")
+    return threaded
+
+
+class Snapshot:
+    """Everything needed to draw one simulation tick; never modified
+
+    glows are the tick's bloom lights and shake its screen shake offset
+    (None when still); see postfx.py. A split-screen game records one
+    (viewport, layers, glows, hud) per player in views instead of layers.
+    """
+    __slots__ = ("tick", "state", "layers", "hud", "glows", "shake", "views")
+
+    def __init__(self, tick, state, layers, hud, glows=(), shake=None, views=()):
+        self.tick = tick
+        self.state = state
+        self.layers = layers
+        self.hud = hud
+        self.glows = glows
+        self.shake = shake
+        self.views = views
+
+
+class SnapshotBuffer:
+    """Two slots: the simulation fills the back one, then the two swap"""
+
+    def __init__(self):
+        self.slots = [None, None]
+        self.front = 0
+        self.swap_lock = threading.Lock()
+
+    def publish(self, snapshot):
+        back = 1 - self.front
+        self.slots[back] = snapshot
+        with self.swap_lock:
+            self.front = back
+
+    def latest(self):
+        with self.swap_lock:
+            return self.slots[self.front]
+
+
+class FrameCounters:
+    """Rendered frames against simulation ticks"""
+
+    def __init__(self):
+        self.frames = 0
+        self.duplicated = 0
+        self.dropped = 0
+        self.last_tick = None
+
+    def presented(self, tick):
+        self.frames += 1
+        if self.last_tick is not None:
+            if tick == self.last_tick:
+                self.duplicated += 1
+            elif tick > self.last_tick + 1:
+                self.dropped += tick - self.last_tick - 1
+        self.last_tick = tick
+
+    def resume(self):
+        """Forget the last tick, e.g. after an idle screen"""
+        self.last_tick = None
+
+    def summary(self):
+        return {"frames": self.frames, "duplicated": self.duplicated, "dropped": self.dropped}
+
+    def report(self):
+        return f"{self.frames} frames rendered, {self.duplicated} duplicated, {self.dropped} ticks dropped"
+
+
+class SimulationThread:
+    """Runs step() at rate Hz and publishes capture(tick) after each tick
+
+    step() advances the game one tick and returns False when there is
+    nothing to simulate (menu, pause, game over); the thread then sleeps
+    until resume(). capture(tick) returns the tick's Snapshot.
+    """
+
+    def __init__(self, step, capture, rate):
+        self.step = step
+        self.capture = capture
+        self.period = 1.0 / rate
+        self.lock = threading.Lock()
+        self.snapshots = SnapshotBuffer()
+        self.counters = FrameCounters()
+        self.tick_stats = FrameStats(rate)
+        self.tick = 0
+        self.late_ticks = 0
+        self.active = threading.Event()
+        self.stopping = False
+        self.thread = threading.Thread(target=self._run, name="simulation", daemon=True)
+
+    def start(self, active):
+        with self.lock:
+            self.republish()
+            if active:
+                self.active.set()
+        self.thread.start()
+
+    def stop(self):
+        self.stopping = True
+        self.active.set()
+        self.thread.join()
+
+    def resume(self):
+        """Start ticking again; call with the lock held, after changing state"""
+        self.active.set()
+
+    def republish(self):
+        """Publish the current state again (lock held), e.g. after a menu action"""
+        self.snapshots.publish(self.capture(self.tick))
+
+    def latest(self):
+        return self.snapshots.latest()
+
+    def presented(self, snapshot):
+        self.counters.presented(snapshot.tick)
+
+    def _run(self):
+        period = self.period
+        next_tick = time.perf_counter()
+        last = None
+        while True:
+            if not self.active.is_set():
+                self.active.wait()
+                next_tick = time.perf_counter()
+                last = None
+                self.counters.resume()
+            if self.stopping:
+                return
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -MAX_LAG_TICKS * period:
+                # Hopelessly behind (e.g. the process was suspended): resync
+                self.late_ticks += 1
+                next_tick = time.perf_counter()
+            with self.lock:
+                self.tick += 1
+                if not self.step():
+                    self.active.clear()
+                self.snapshots.publish(self.capture(self.tick))
+            now = time.perf_counter()
+            if last is not None:
+                self.tick_stats.add(now - last)
+            last = now
+            next_tick += period
+
+    def report(self):
+        return (f"simulation: {self.tick} ticks, {self.late_ticks} resyncs, "
+                f"tick times {self.tick_stats.report()}; render: {self.counters.report()}")
+
+    def report_if_requested(self):
+        if os.environ.get(STATS_ENV):
+            print(self.report(), flush=True)
@@ -0,0 +1,300 @@
+"""
+Spectator streaming: presented frames as dirty tiles over TCP
+
+Either game can serve its picture to spectator screens on other machines
+(spectator_viewer.py). Each presented frame is split into TILE_SIZE
+squares; only the tiles that differ from the previous frame are sent,
+their RGB pixels zlib-compressed together in one message. A viewer that
+connects first gets every tile (a key frame), then deltas.
+
+The game thread only copies the finished frame into a spare Surface, at
+most GAME_SPECTATOR_FPS (default 30) times a second and only while someone
+is watching.
+Finding the dirty tiles, compressing and sending run on the spectator
+thread; if it is still busy with the previous frame the new one is
+skipped. Dirty tiles are found with NumPy when it is installed, else tile
+by tile.
+
+Protocol (all little-endian): the server sends HELLO once, then FRAME
+messages: the header, tile count pairs of (column, row) as uint16, then
+the compressed pixels of those tiles, each row-major RGB, in that order.
+A viewer joining makes the next frame a key frame for every viewer.
+
+Set GAME_SPECTATOR_PORT (or --spectate PORT in main.py) to serve;
+GAME_FRAME_STATS=1 prints bandwidth and encode times on exit.
+"""
+import os
+import select
+import socket
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+
+import pygame
+from pacing import STATS_ENV
+
+try:
+    import numpy
+except ImportError:     # optional: tiles are then compared one by one
+    numpy = None
+
+PORT_ENV = "GAME_SPECTATOR_PORT"
+DEFAULT_PORT = 50010
+FPS_ENV = "GAME_SPECTATOR_FPS"
+DEFAULT_FPS = 30
+TILE_SIZE = 32
+COMPRESS_LEVEL = 1          # fast; tiles of flat colour compress well anyway
+ACCEPT_POLL = 0.1           # seconds between checks for new viewers while idle
+SEND_TIMEOUT = 1.0          # a viewer that can't take a frame this fast is dropped
+STATS_WINDOW = 1024
+
+MAGIC = b"SPEC"
+VERSION = 1
+HELLO = struct.Struct("<4sBHHH")        # magic, version, width, height, tile size
+FRAME = struct.Struct("<IBHI")          # frame number, key frame, tile count, compressed length
+TILE = struct.Struct("<HH")             # column, row
+
+
+def tile_grid(size, tile=TILE_SIZE):
+    """(columns, rows) of tiles covering size; edge tiles may be smaller"""
+    return (-(-size[0] // tile), -(-size[1] // tile))
+
+
+def tile_rect(column, row, size, tile=TILE_SIZE):
+    x = column * tile
+    y = row * tile
+    return pygame.Rect(x, y, min(tile, size[0] - x), min(tile, size[1] - y))
+
+
+class TileEncoder:
+    """Turns successive frames into FRAME messages of their changed tiles
+
+    Frames are drawn into target, which alternates between two Surfaces so
+    the previous frame is still there to compare against, without a copy.
+    """
+
+    def __init__(self, size, tile=TILE_SIZE):
+        self.size = tuple(size)
+        self.tile = tile
+        self.columns, self.rows = tile_grid(self.size, tile)
+        self.surfaces = [pygame.Surface(self.size, 0, 32), pygame.Surface(self.size, 0, 32)]
+        self.current = 0
+        self.encoded = 0        # frames encoded; the first is always a key frame
+        self.row_starts = list(range(0, self.size[1], tile))
+        self.column_starts = list(range(0, self.size[0], tile))
+        self.scratch = None     # XOR of the two frames
+        self.tile_bytes = {}    # no NumPy: last pixels of each tile
+
+    @property
+    def target(self):
+        """The Surface to copy the next frame into"""
+        return self.surfaces[self.current]
+
+    def encode(self, key=False):
+        """(FRAME message, tiles in it) for target; key sends every tile"""
+        key = key or not self.encoded
+        if numpy is not None:
+            tiles, pixels = self.dirty_numpy(key)
+        else:
+            tiles, pixels = self.dirty_tiles(key)
+        self.encoded += 1
+        self.current ^= 1
+        data = zlib.compress(b"".join(pixels), COMPRESS_LEVEL) if tiles else b""
+        header = FRAME.pack(self.encoded, key, len(tiles), len(data))
+        index = b"".join([TILE.pack(column, row) for column, row in tiles])
+        return header + index + data, len(tiles)
+
+    def dirty_numpy(self, key):
+        tile = self.tile
+        surface = self.target
+        if key:
+            changed = numpy.ones((self.rows, self.columns), bool)
+        else:
+            # Row-major (height, width) views of both frames' packed pixels
+            current = pygame.surfarray.pixels2d(surface).T
+            previous = pygame.surfarray.pixels2d(self.surfaces[self.current ^ 1]).T
+            if self.scratch is None:
+                self.scratch = numpy.empty(current.shape, current.dtype)
+            changes = numpy.bitwise_xor(current, previous, out=self.scratch)
+            del current, previous
+            # OR whole rows of tiles together first: contiguous and fast
+            changes = numpy.bitwise_or.reduceat(changes, self.row_starts, axis=0)
+            changed = numpy.bitwise_or.reduceat(changes, self.column_starts, axis=1) != 0
+        rgb = pygame.surfarray.pixels3d(surface)
+        tiles = []
+        pixels = []
+        for row, column in zip(*numpy.nonzero(changed)):
+            x = column * tile
+            y = row * tile
+            tiles.append((int(column), int(row)))
+            # Columns-first view to row-major RGB
+            pixels.append(rgb[x:x + tile, y:y + tile].transpose(1, 0, 2).tobytes())
+        del rgb
+        return tiles, pixels
+
+    def dirty_tiles(self, key):
+        surface = self.target
+        previous = self.tile_bytes
+        tiles = []
+        pixels = []
+        for row in range(self.rows):
+            for column in range(self.columns):
+                data = pygame.image.tobytes(
+                    surface.subsurface(tile_rect(column, row, self.size, self.tile)), "RGB")
+                if key or previous.get((column, row)) != data:
+                    previous[(column, row)] = data
+                    tiles.append((column, row))
+                    pixels.append(data)
+        return tiles, pixels
+
+
+class SpectatorStats:
+    """What streaming cost, against sending every frame raw"""
+
+    def __init__(self, size):
+        self.raw_frame_bytes = size[0] * size[1] * 3
+        self.frames = 0
+        self.skipped = 0
+        self.tiles = 0
+        self.bytes_encoded = 0  # per frame, whoever it went to
+        self.bytes_sent = 0     # to all viewers
+        self.viewers = 0
+        self.encode_times = deque(maxlen=STATS_WINDOW)
+
+    def summary(self):
+        times = sorted(self.encode_times)
+        frames = self.frames or 1
+        return {
+            "frames": self.frames,
+            "skipped": self.skipped,
+            "viewers": self.viewers,
+            "tiles_per_frame": self.tiles / frames,
+            "bytes_per_frame": self.bytes_encoded / frames,
+            "raw_ratio": self.bytes_encoded / (frames * self.raw_frame_bytes),
+            "bytes_sent": self.bytes_sent,
+            "encode_ms": sum(times) / len(times) * 1000 if times else 0.0,
+            "encode_p95_ms": times[int(len(times) * 0.95)] * 1000 if times else 0.0,
+        }
+
+    def report(self):
+        s = self.summary()
+        return (f"spectator: {s['frames']} frames to {s['viewers']} viewers ({s['skipped']} skipped), "
+                f"{s['tiles_per_frame']:.1f} tiles and {s['bytes_per_frame'] / 1024:.1f} KiB per frame "
+                f"({s['raw_ratio'] * 100:.2f}% of raw), encode {s['encode_ms']:.2f} ms "
+                f"(p95 {s['encode_p95_ms']:.2f})")
+
+
+class Viewer:
+    __slots__ = ("sock", "address", "needs_key")
+
+    def __init__(self, sock, address):
+        self.sock = sock
+        self.address = address
+        self.needs_key = True
+
+
+class SpectatorServer:
+    """Accepts viewers and streams them the frames publish() hands over"""
+
+    def __init__(self, size, port, host="", fps=None):
+        self.size = tuple(size)
+        if fps is None:
+            fps = float(os.environ.get(FPS_ENV, DEFAULT_FPS))
+        self.period = 1.0 / fps
+        self.listener = socket.create_server((host, port))
+        self.listener.setblocking(False)
+        self.port = self.listener.getsockname()[1]
+        self.encoder = TileEncoder(self.size)
+        self.stats = SpectatorStats(self.size)
+        self.viewers = []
+        self.watching = 0       # viewer count, read by the game thread
+        self.busy = False       # the spectator thread owns encoder.target
+        self.next_frame = 0.0
+        self.wake = threading.Event()
+        self.stopping = False
+        self.thread = threading.Thread(target=self._run, name="spectator", daemon=True)
+        self.thread.start()
+
+    def publish(self, backend):
+        """Hand over the frame about to be presented (game thread; cheap)"""
+        if not self.watching:
+            return
+        now = time.perf_counter()
+        if now < self.next_frame:
+            return
+        if self.busy:
+            self.stats.skipped += 1
+            return
+        self.next_frame = max(self.next_frame + self.period, now)
+        backend.read_frame(self.encoder.target)
+        self.busy = True
+        self.wake.set()
+
+    def _run(self):
+        while not self.stopping:
+            self.wake.wait(ACCEPT_POLL)
+            self.wake.clear()
+            self.accept()
+            if self.busy:
+                self.send_frame()
+                self.busy = False
+        for viewer in self.viewers:
+            viewer.sock.close()
+        self.listener.close()
+
+    def accept(self):
+        while select.select([self.listener], [], [], 0)[0]:
+            try:
+                sock, address = self.listener.accept()
+            except OSError:
+                return
+            sock.setblocking(True)
+            sock.settimeout(SEND_TIMEOUT)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            try:
+                sock.sendall(HELLO.pack(MAGIC, VERSION, self.size[0], self.size[1], TILE_SIZE))
+            except OSError:
+                sock.close()
+                continue
+            self.viewers.append(Viewer(sock, address))
+            self.stats.viewers += 1
+        self.watching = len(self.viewers)
+
+    def send_frame(self):
+        start = time.perf_counter()
+        key = any(viewer.needs_key for viewer in self.viewers)
+        message, tiles = self.encoder.encode(key)
+        self.stats.encode_times.append(time.perf_counter() - start)
+        self.stats.frames += 1
+        self.stats.tiles += tiles
+        self.stats.bytes_encoded += len(message)
+        for viewer in list(self.viewers):
+            try:
+                viewer.sock.sendall(message)
+            except OSError:
+                viewer.sock.close()
+                self.viewers.remove(viewer)
+                continue
+            viewer.needs_key = False
+            self.stats.bytes_sent += len(message)
+        self.watching = len(self.viewers)
+
+    def close(self):
+        self.stopping = True
+        self.wake.set()
+        self.thread.join()
+
+    def report_if_requested(self):
+        if os.environ.get(STATS_ENV):
+            print(self.stats.report(), flush=True)
+
+
+def from_env(size, port=None):
+    """A SpectatorServer on port, else $GAME_SPECTATOR_PORT; None when neither is set"""
+    if port is None:
+        port = os.environ.get(PORT_ENV)
+    if port is None or port == "":
+        return None
+    return SpectatorServer(size, int(port))
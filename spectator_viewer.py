@@ -0,0 +1,94 @@
+"""
+Spectator screen for a game streaming with spectator.py
+
+Connects to a game started with GAME_SPECTATOR_PORT (or --spectate), and
+rebuilds its picture from the dirty tiles in every FRAME message. The
+window is the game's size; reconnect by restarting the viewer.
+
+SpectatorClient only speaks the protocol and paints into a Surface, so it
+can be driven headless by benchmarks.
+
+Run: python spectator_viewer.py [--host 127.0.0.1] [--port 50010]
+"""
+import argparse
+import socket
+import zlib
+
+import pygame
+import spectator
+
+CONNECT_TIMEOUT = 5.0
+
+
+class SpectatorClient:
+    def __init__(self, host="127.0.0.1", port=spectator.DEFAULT_PORT):
+        self.sock = socket.create_connection((host, port), timeout=CONNECT_TIMEOUT)
+        self.sock.settimeout(None)
+        magic, version, width, height, tile = spectator.HELLO.unpack(self.recv(spectator.HELLO.size))
+        if magic != spectator.MAGIC or version != spectator.VERSION:
+            raise ConnectionError(f"not a spectator stream (version {version})")
+        self.size = (width, height)
+        self.tile = tile
+        self.frame = pygame.Surface(self.size, 0, 32)
+        self.frames = 0
+        self.bytes_received = spectator.HELLO.size
+        self.last_number = 0
+
+    def recv(self, count):
+        """Exactly count bytes"""
+        chunks = []
+        while count:
+            chunk = self.sock.recv(count)
+            if not chunk:
+                raise ConnectionError("spectator stream closed")
+            chunks.append(chunk)
+            count -= len(chunk)
+        return b"".join(chunks)
+
+    def receive(self):
+        """Read one FRAME message and paint its tiles; returns the tiles painted"""
+        number, key, count, length = spectator.FRAME.unpack(self.recv(spectator.FRAME.size))
+        index = self.recv(spectator.TILE.size * count)
+        data = zlib.decompress(self.recv(length)) if length else b""
+        self.bytes_received += spectator.FRAME.size + len(index) + length
+        offset = 0
+        for column, row in spectator.TILE.iter_unpack(index):
+            rect = spectator.tile_rect(column, row, self.size, self.tile)
+            end = offset + rect.width * rect.height * 3
+            self.frame.blit(pygame.image.frombuffer(data[offset:end], rect.size, "RGB"), rect)
+            offset = end
+        self.frames += 1
+        self.last_number = number
+        return count
+
+    def close(self):
+        self.sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spectator screen for a streaming game")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=spectator.DEFAULT_PORT)
+    args = parser.parse_args()
+
+    client = SpectatorClient(args.host, args.port)
+    pygame.display.init()
+    screen = pygame.display.set_mode(client.size)
+    pygame.display.set_caption(f"Spectating {args.host}:{args.port}")
+    running = True
+    try:
+        while running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+            client.receive()
+            screen.blit(client.frame, (0, 0))
+            pygame.display.flip()
+    except ConnectionError as e:
+        print(e)
+    client.close()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
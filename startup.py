@@ -0,0 +1,41 @@
+"""
+Startup helpers - bring up only the SDL subsystems the games use
+
+pygame.init() starts every subsystem including audio, which is slow and
+unused here. The games only need video (display + events) and fonts, and
+fonts are started lazily by assets.get_font().
+"""
+import time
+
+# Captured as early as the entry point imports this module (before pygame)
+START_TIME = time.perf_counter()
+
+import os
+import sys
+import pygame
+
+# Set by benchmarks/startup_bench.py: print time-to-first-frame and exit
+FIRST_FRAME_ENV = "GAME_EXIT_AFTER_FIRST_FRAME"
+
+_first_frame_seen = False
+
+
+def init_display(size, caption):
+    """Initialise video only and open the window"""
+    pygame.display.init()
+    screen = pygame.display.set_mode(size)
+    pygame.display.set_caption(caption)
+    return screen
+
+
+def frame_presented():
+    """Call after each display flip; reports the first one when benchmarking"""
+    global _first_frame_seen
+    if _first_frame_seen:
+        return
+    _first_frame_seen = True
+    if os.environ.get(FIRST_FRAME_ENV):
+        elapsed_ms = (time.perf_counter() - START_TIME) * 1000
+        print(f"first_frame_ms={elapsed_ms:.2f}", flush=True)
+        pygame.quit()
+        sys.exit(0)
@@ -0,0 +1,65 @@
+"""
+Simulation time for the platformer: steps, substeps and countdowns
+
+Everything in the platformer moves by elapsed seconds (dt): velocities are
+pixels per second, gravity pixels per second squared, durations seconds.
+The game was tuned at 60 updates a second, so STEP is the dt an update gets
+when nothing says otherwise, and what the tuning numbers are quoted at.
+
+A player moves and collides in substeps of at most 1/GAME_SUBSTEP_RATE
+seconds (default 60; 0 moves in one go), so a long update cannot carry
+them through a platform. GAME_SIM_RATE sets how many fixed updates a
+second the simulation thread (GAME_SIM_THREAD) and the network server run:
+lower it on weak hardware, and the game plays the same, only in coarser
+steps. The plain game loop passes each frame's measured time instead,
+capped at MAX_FRAME_TIME so a stall is not one giant step.
+"""
+import math
+import os
+
+from constants import FPS
+
+SIM_RATE_ENV = "GAME_SIM_RATE"
+SUBSTEP_RATE_ENV = "GAME_SUBSTEP_RATE"
+STEP = 1.0 / FPS
+MAX_FRAME_TIME = 0.1        # seconds
+# Float steps rarely sum to a duration exactly: a timer this close to zero has run out
+EPSILON = 1e-6
+
+
+def sim_rate(rate=None):
+    """rate, else $GAME_SIM_RATE, else FPS: fixed updates a second"""
+    if rate is None:
+        rate = int(os.environ.get(SIM_RATE_ENV, FPS))
+    if rate <= 0:
+        raise ValueError(f"simulation rate must be positive, got {rate}")
+    return rate
+
+
+def substep_rate(rate=None):
+    """rate, else $GAME_SUBSTEP_RATE, else FPS; 0 means no substeps"""
+    if rate is None:
+        rate = int(os.environ.get(SUBSTEP_RATE_ENV, FPS))
+    if rate < 0:
+        raise ValueError(f"substep rate must be 0 or more, got {rate}")
+    return rate
+
+
+def substeps(dt, rate):
+    """How many equal substeps dt splits into so none is longer than 1/rate"""
+    if not rate:
+        return 1
+    return max(1, math.ceil(dt * rate - EPSILON))
+
+
+def frame_time(milliseconds):
+    """dt for an update from a frame's measured length (0: not measured, one STEP)"""
+    if not milliseconds:
+        return STEP
+    return min(milliseconds / 1000.0, MAX_FRAME_TIME)
+
+
+def countdown(timer, dt):
+    """timer seconds less dt, and 0 once it has run out"""
+    timer -= dt
+    return timer if timer > EPSILON else 0.0